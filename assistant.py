@@ -6,6 +6,7 @@ Uses OpenRouter and coding tools: apply_patch, shell, update_plan
 
 import asyncio
 import contextlib
+import contextvars
 import os
 import sys
 import platform
@@ -131,9 +132,18 @@ async def spinner(stop_event: asyncio.Event, prefix: str = "Thinking ") -> None:
 # Add parent/src to path for bhumi import
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from bhumi.base_client import BaseLLMClient, LLMConfig
-from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
-from muonry.clients import StrictLLMClient
+# bhumi, the tool modules and the parallel executor are imported on first use
+# (see setup / _ensure_client / _run_parallel_tool_calls) to keep startup fast.
+from muonry.client_pool import default_pool
+from muonry.lazy import lazy_import
+from muonry.tool_schemas import TOOL_SCHEMAS
+from muonry.prompt_layout import MessageLayout
+from muonry.journal import SessionJournal, find_session, journal_root_from_env, load_working_set
+from muonry.transport import default_transport
+from muonry.tracing import span, traced
+from muonry.metrics import format_stats, registry as metrics_registry
+from muonry.profiler import profiler_from_env
+from muonry.loopwatch import loopwatch_from_env
 
 # --- Settings helpers (persist API keys in ~/.muonry/.env) ---
 def _home_env_file() -> Path:
@@ -252,13 +262,9 @@ def _settings_menu() -> None:
                 print(_warn("Unknown key."))
         else:
             print(_warn("Invalid selection."))
-from tools.apply_patch import apply_patch as do_apply_patch
-from tools.shell import run_shell, ShellRequest
-from tools.update_plan import load_plan, update_plan as do_update_plan, PlanItem, Status
-from tools.build_analyzer import analyze_build_output, pick_package_manager
-from tools.websearch import websearch as websearch_tool
 # Orchestrator removed - using simple sequential approach with optional planning
-import tools.toolset as toolset
+# Tool implementations load on first call (the wrappers below resolve attributes lazily)
+toolset = lazy_import("tools.toolset")
 
 # --- Minimal Markdown → ANSI renderer (no external deps) ---
 import re
@@ -350,6 +356,7 @@ def _md_inline(text: str) -> str:
     return text
 
 
+@traced("render.markdown")
 def render_markdown_to_ansi(md: str) -> str:
     lines = md.splitlines()
     out_lines: list[str] = []
@@ -488,8 +495,8 @@ async def run_shell_tool(command: str, workdir: str = None, timeout_ms: int = 30
 async def update_plan_tool(steps: list = None, explanation: str = None) -> str:
     return await toolset.update_plan_tool(steps, explanation)
 
-async def smart_run_shell_tool(command: str, workdir: str = None, timeout_ms: int = 300000, auto_fix: bool = False) -> str:
-    return await toolset.smart_run_shell_tool(command, workdir, timeout_ms, auto_fix)
+async def smart_run_shell_tool(command: str, workdir: str = None, timeout_ms: int = 300000, auto_fix: bool = False, kill_on_fatal: bool = None) -> str:
+    return await toolset.smart_run_shell_tool(command, workdir, timeout_ms, auto_fix, kill_on_fatal)
 
 async def read_file_tool(file_path: str, start_line: int = None, end_line: int = None) -> str:
     return await toolset.read_file_tool(file_path, start_line, end_line)
@@ -503,8 +510,8 @@ async def search_replace_tool(file_path: str, search_text: str, replace_text: st
 async def get_system_info_tool() -> str:
     return await toolset.get_system_info_tool()
 
-async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, timeout_ms: int = 120000) -> str:
-    return await toolset.quick_check_tool(kind, target, max_files, timeout_ms)
+async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, timeout_ms: int = 120000, fail_fast: int = 0) -> str:
+    return await toolset.quick_check_tool(kind, target, max_files, timeout_ms, fail_fast)
 
 async def interactive_shell_tool(
     command: str,
@@ -532,11 +539,110 @@ async def deepwiki_tool(
     dest = write_to or writeto
     return await toolset.deepwiki_tool(action, repo, path, limit, dest)
 
+# Web search (Exa); tools.websearch and exa_py load on first search
+def websearch_tool(query: str, enabled: bool = True, api_key: str | None = None, text: bool = True, type: str = "auto") -> str:
+    from tools.websearch import websearch
+
+    return websearch(query, enabled, api_key, text, type)
+
+
+
+# Stable system prompt. Keep it free of per-session data (time, OS, ...) so the
+# provider can cache it as a byte-identical prefix; see muonry.prompt_layout.
+SYSTEM_PROMPT = """
+You are Muonry, a terminal-first AI coding assistant. You help the user get software work done quickly, safely, and pragmatically.
+
+SAFETY
+- Never assist with malicious or harmful intent.
+- Prefer minimal, non-destructive actions; explain risks briefly when relevant.
+
+INTERACTION CONTRACT
+- If the user asks a question (how to perform a task), provide concise instructions only and then ask if they want you to perform them.
+- If the user gives a task/command:
+  - Simple tasks: execute directly without unnecessary questions.
+  - Complex tasks: ask brief, high-value clarifying questions only when necessary to proceed; otherwise plan and act.
+- Be concise. Prefer bullet points and short code blocks. Reference files and symbols using backticks.
+
+TOOLS (Muonry runtime)
+- talk: respond with markdown in terminal. Use for explanations and non-file outputs.
+- planner: break down complex tasks into steps grouped in waves; run each wave's steps together with the parallel tool.
+- apply_patch: PREFERRED for modifying existing files safely.
+- write_file: ONLY for creating new files when the user explicitly asks to save/create/export.
+- read_file, grep, search_replace: reading and simple text edits.
+- run_shell: non-interactive commands; avoid pagers; prefer options that prevent pagination.
+- smart_run_shell: run, analyze failures, suggest or apply safe fixes.
+- interactive_shell: use only for CLI wizards (short, scripted interactions), not for long interactive sessions.
+- quick_check, get_system_info, update_plan: diagnostics and planning helpers.
+- websearch (optional): Exa search. Off by default; requires `EXA_API_KEY` and install of optional extra `muonry[websearch]`. Must set `enabled=true`.
+
+SHELL & VCS POLICY
+- Do not change directories implicitly; prefer specifying working directory explicitly.
+- Avoid interactive/fullscreen commands unless explicitly asked; prefer flags that produce non-paginated output (e.g., set pager to cat or use --no-pager if available).
+- For git, avoid pagers and keep outputs concise.
+
+SECRETS & SETTINGS
+- Never display secrets. If a command needs a secret, use an environment variable placeholder (e.g., {FOO_API_KEY}) and instruct the user to set it.
+- Keys are managed via /settings and persisted to `~/.muonry/.env` with 0600 perms.
+
+WHEN TO SAVE VS. TALK
+- Conversational requests → use talk. Do NOT create files.
+- Only create or modify files when asked or when required to complete the explicit task outcome.
+
+PLANNING WORKFLOW (for complex tasks)
+1) Call planner with the high-level task.
+2) Execute the plan wave by wave: steps in one wave are independent, so issue them together (one parallel call); waves run in order.
+3) Keep actions minimal and verifiable; show progress succinctly.
+
+OUTPUT STYLE
+- Markdown-friendly. Use short bullets. Reference paths like `path/to/file.py`.
+- Keep context trimmed. Be explicit about assumptions.
+
+WEB SEARCH
+- Only use `websearch` if explicitly enabled and configured. No browsing beyond Exa API.
+
+RUNTIME
+- Primary model: groq/moonshotai/kimi-k2-instruct; fallback: cerebras/qwen-3-coder-480b (auto on rate-limit).
+- Context trimming keeps the latest turns under budget.
+
+FRONTEND BRANDING (when editing web UI)
+- Choose style by context, not always developer-only.
+- Modes and font options (use open licenses when possible):
+  - Marketing Landing: Space Grotesk / Sora / Outfit / Geist Sans for headlines and UI; strong CTAs; allow tasteful text gradients.
+  - Developer/Docs: IBM Plex Mono / JetBrains Mono / Fira Code; monospace accents; high contrast; minimal gradients.
+  - App/Dashboard: Inter / Geist Sans / IBM Plex Sans; compact UI, subtle cards, clear focus rings.
+  - Blog/Longform: Source Serif Pro / IBM Plex Serif for body; Inter/Geist Sans for UI; comfortable reading width.
+- Palette: white base with cyan–magenta brand accents; ensure accessible contrast; support dark mode.
+- Gradients: sparingly; text (#06b6d4 → #d946ef), panels (rgba(6,182,212,0.2) → rgba(217,70,239,0.12)); avoid heavy motion.
+- Accessibility: keyboard focus-visible rings, prefers-reduced-motion, legible sizes.
+- No vendor lockups by default; do not add “Powered by …” unless the user asks.
+
+"""
+
+
+def _session_context() -> str:
+    """Volatile per-session facts, sent as a separate message after the stable prefix."""
+    from datetime import datetime
+    now_str = datetime.now().astimezone().strftime("%Y-%m-%d %H:%M:%S %Z%z")
+    return f"Environment OS: {OS_INFO}\nCurrent Datetime: {now_str}"
+
+
+# Assistant whose turn is running in the current task. Pooled clients are shared
+# by several sessions, so tools bound to a session (e.g. `parallel`) dispatch here.
+_ACTIVE_ASSISTANT: contextvars.ContextVar["MuonryAssistant | None"] = contextvars.ContextVar(
+    "muonry_active_assistant", default=None
+)
 
 
 class MuonryAssistant:
-    def __init__(self):
+    def __init__(self, *, headless: bool = False, rate_limiter=None, event_sink=None):
         self.client = None
+        # (api_key, pooled) recorded by setup(); the client is built lazily by _ensure_client
+        self._client_spec: tuple[str, bool] | None = None
+        # Headless sessions (batch runner, server) print nothing and may share a rate limiter
+        self.headless = headless
+        self._rate_limiter = rate_limiter
+        # Optional callback receiving turn/tool/text events as dicts (muonry.server streams them)
+        self._event_sink = event_sink
         # Primary and fallback models
         self.primary_model = "groq/moonshotai/kimi-k2-instruct"
         self.fallback_model = "cerebras/qwen-3-coder-480b"
@@ -573,16 +679,44 @@ class MuonryAssistant:
             self._type_chunk_size: int = int(os.getenv("MUONRY_TYPE_CHUNK", "128"))
         except Exception:
             self._type_chunk_size = 128
+        # Message layout of the active session (set by interactive_loop)
+        self._layout: MessageLayout | None = None
+        # Completion transport (live / record / replay, see muonry.transport)
+        self._transport = default_transport()
+        # Optional per-turn sampling profiler (MUONRY_PROFILE)
+        self._profiler = profiler_from_env()
+        # Optional event-loop lag watchdog (MUONRY_LOOPWATCH)
+        self._loopwatch = loopwatch_from_env()
         
-    async def setup(self):
-        """Initialize the assistant with OpenRouter"""
+    async def setup(self, *, pooled: bool = False):
+        """Initialize the assistant with OpenRouter
+
+        Only checks credentials; the client is built and tools registered on
+        the first completion (`_ensure_client`), so the prompt appears without
+        importing bhumi. pooled=True borrows the client (and its registered
+        tools) from the process-wide client pool so concurrent sessions share
+        connections.
+        """
         # Re-enable verbose websearch debug by default; unset MUONRY_WEBSEARCH_DEBUG to disable
         os.environ.setdefault("MUONRY_WEBSEARCH_DEBUG", "1")
         api_key = os.getenv("GROQ_API_KEY")
+        if not api_key and self._transport.offline:
+            api_key = "replay"  # replayed sessions never reach the provider
         if not api_key:
             print(_error("❌ Error: GROQ_API_KEY environment variable not set"))
             return False
-            
+        self._client_spec = (api_key, pooled)
+        if self._strict_tools_mode and not self.headless:
+            print(_style("🔒 Strict tools mode ENABLED: unregistered tools will be rejected", color=_Ansi.YELLOW, dim=True))
+        return True
+
+    async def _ensure_client(self) -> None:
+        """Build the primary client and register tools (first completion only)."""
+        if self.client is not None or self._client_spec is None:
+            return
+        from bhumi.base_client import BaseLLMClient, LLMConfig
+
+        api_key, pooled = self._client_spec
         config = LLMConfig(
             api_key=api_key,
             model=self.primary_model,  # Primary model via Groq
@@ -590,22 +724,46 @@ class MuonryAssistant:
         )
         
         # Choose client based on strict tools setting
-        ClientCls = StrictLLMClient if self._strict_tools_mode else BaseLLMClient
-        self.client = ClientCls(config)
-        await self.register_tools()
         if self._strict_tools_mode:
-            print(_style("🔒 Strict tools mode ENABLED: unregistered tools will be rejected", color=_Ansi.YELLOW, dim=True))
-        return True
+            from muonry.clients import StrictLLMClient as ClientCls
+        else:
+            ClientCls = BaseLLMClient
+        if pooled:
+            async def _register(client) -> None:
+                self.client = client
+                await self.register_tools()
+
+            self.client = await default_pool().get(
+                config,
+                profile="assistant-strict" if self._strict_tools_mode else "assistant",
+                client_cls=ClientCls,
+                setup=_register,
+                setup_key="assistant-tools",
+            )
+        else:
+            self.client = ClientCls(config)
+            await self.register_tools()
+
+    def release_client(self) -> None:
+        """Return the session's pooled client lease (no-op for unpooled clients)."""
+        client, self.client = self.client, None
+        if client is not None:
+            default_pool().release(client)
 
+    @traced("assistant.completion")
     async def _completion_with_fallback(self, messages: list[dict]) -> dict:
         """Call completion; on rate limit, switch to fallback model and retry once."""
+        await self._ensure_client()
         # Prepare a trimmed copy of messages under char budget
         def _trim_messages(msgs: list[dict]) -> list[dict]:
             if not msgs:
                 return msgs
             budget = max(10000, self.max_context_chars)
-            sys_msg = msgs[0] if msgs and msgs[0].get("role") == "system" else None
-            rest = msgs[1:] if sys_msg else msgs[:]
+            # Leading system messages (stable prompt + session context) are always kept
+            n_sys = 0
+            while n_sys < len(msgs) and msgs[n_sys].get("role") == "system":
+                n_sys += 1
+            rest = msgs[n_sys:]
             total = 0
             kept_rev: list[dict] = []
             for m in reversed(rest):
@@ -614,13 +772,32 @@ class MuonryAssistant:
                     break
                 kept_rev.append(m)
                 total += c
-            kept = list(reversed(kept_rev))
-            if sys_msg:
-                return [sys_msg] + kept
-            return kept
+            if len(kept_rev) == len(rest):
+                return msgs  # already under budget (the MessageLayout usually guarantees this)
+            return msgs[:n_sys] + list(reversed(kept_rev))
 
         async def _call() -> dict:
-            return await self.client.completion(_trim_messages(messages))
+            client = self.client
+            with span("context.trim", messages=len(messages)):
+                trimmed = _trim_messages(messages)
+            model = getattr(getattr(client, "config", None), "model", "") or "unknown"
+            metrics = metrics_registry()
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            t0 = time.perf_counter()
+            try:
+                with span("llm.call", model=model, messages=len(trimmed)):
+                    resp = await self._transport.complete(client, trimmed, channel="assistant")
+            except Exception:
+                # Feed pool health checks; no-op for clients not owned by the pool
+                default_pool().report(client, ok=False)
+                metrics.counter("muonry_llm_requests_total", "LLM completions", model=model, outcome="error").inc()
+                raise
+            finally:
+                metrics.histogram("muonry_llm_latency_seconds", "LLM completion latency", model=model).observe(time.perf_counter() - t0)
+            default_pool().report(client, ok=True)
+            metrics.counter("muonry_llm_requests_total", "LLM completions", model=model, outcome="ok").inc()
+            return resp
 
         def _is_rate_limit(resp: dict) -> bool:
             # Check explicit error structure or text mentioning rate limit
@@ -639,7 +816,7 @@ class MuonryAssistant:
             return False
 
         # First attempt with current client/model (show spinner if enabled)
-        if self._animations_enabled:
+        if self._animations_enabled and not self.headless:
             _stop = asyncio.Event()
             _task = asyncio.create_task(spinner(_stop, prefix="Thinking "))
             try:
@@ -654,21 +831,28 @@ class MuonryAssistant:
             return resp
 
         # Switch to fallback model and retry once
+        metrics_registry().counter("muonry_llm_rate_limits_total", "Rate-limited completions").inc()
+        metrics_registry().counter("muonry_llm_fallbacks_total", "Retries on the fallback model", model=self.fallback_model).inc()
         print(_warn(f"Rate limit encountered on {self.client.config.model if hasattr(self.client, 'config') else 'primary model'}; switching to {self.fallback_model} and retrying once..."))
         try:
             # Use Cerebras' own key for the Cerebras fallback model
             api_key = os.getenv("CEREBRAS_API_KEY")
+            from bhumi.base_client import LLMConfig
+
             fb_config = LLMConfig(
                 api_key=api_key,
                 model=self.fallback_model,
                 base_url="https://api.cerebras.ai/v1",
                 # debug=True,
             )
-            self.client = BaseLLMClient(fb_config)
+            # Reuse a pooled fallback client (keep-alive connections) instead of rebuilding per rate-limit
+            previous = self.client
+            self.client = await default_pool().get(fb_config, profile="fallback")
+            default_pool().release(previous)
         except Exception as e:
             print(_error(f"Failed to switch to fallback model: {e}"))
             return resp
-        if self._animations_enabled:
+        if self._animations_enabled and not self.headless:
             _stop2 = asyncio.Event()
             _task2 = asyncio.create_task(spinner(_stop2, prefix="Retrying with fallback "))
             try:
@@ -682,373 +866,45 @@ class MuonryAssistant:
             return await _call()
         
     async def register_tools(self):
-        """Register coding tools with Bhumi"""
+        """Register coding tools with Bhumi (static schemas from muonry.tool_schemas)"""
         print(_info("🔧 Registering coding tools..."))
-        
-        # Patch tool (PREFERRED for file modifications)
-        # Register both canonical name and a compatibility alias without underscore.
-        for tool_name in ("apply_patch", "applypatch"):
+
+        # Parallel batch tool: allow models to request concurrent execution explicitly.
+        # Dispatch to the session running the current turn (pooled clients are shared).
+        owner = self
+
+        async def parallel(calls: list[dict], concurrency: int | None = None, timeout_ms: int | None = None) -> str:
+            inst = _ACTIVE_ASSISTANT.get() or owner
+            return await inst.parallel_tool(calls, concurrency, timeout_ms)
+
+        funcs = {
+            "apply_patch": apply_patch_tool,
+            "applypatch": apply_patch_tool,
+            "run_shell": run_shell_tool,
+            "parallel": parallel,
+            "smart_run_shell": smart_run_shell_tool,
+            "interactive_shell": interactive_shell_tool,
+            "update_plan": update_plan_tool,
+            "talk": talk_tool,
+            "read_file": read_file_tool,
+            "grep": grep_tool,
+            "search_replace": search_replace_tool,
+            "get_system_info": get_system_info_tool,
+            "quick_check": quick_check_tool,
+            "websearch": websearch_tool,
+            "write_file": write_file_tool,
+            "deepwiki": deepwiki_tool,
+            "planner": planner_tool,
+        }
+        # Fixed order keeps the provider-side tool block stable for prompt caching
+        for schema in TOOL_SCHEMAS:
             self.client.register_tool(
-                name=tool_name,
-                func=apply_patch_tool,
-                description=(
-                    "PREFERRED for modifying existing files. Accepts Muonry patch envelope; "
-                    "also auto-wraps common unified diffs (---/+++ @@)."
-                ),
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "patch": {
-                            "type": "string",
-                            "description": "Patch content (Muonry patch or standard unified diff)"
-                        },
-                        "cwd": {
-                            "type": "string",
-                            "description": "Working directory for applying the patch (optional)"
-                        }
-                    },
-                    "required": ["patch"],
-                    "additionalProperties": False
-                }
+                name=schema.name,
+                func=funcs[schema.name],
+                description=schema.description,
+                parameters=schema.parameters,
             )
         
-        # Shell tool
-        self.client.register_tool(
-            name="run_shell",
-            func=run_shell_tool,
-            description="Execute a shell command",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "Shell command to execute"
-                    },
-                    "workdir": {
-                        "type": "string",
-                        "description": "Working directory for command (optional, default: current directory)"
-                    },
-                    "timeout_ms": {
-                        "type": "integer",
-                        "description": "Timeout in milliseconds (optional, default: 30000)"
-                    }
-                },
-                "required": ["command"],
-                "additionalProperties": False
-            }
-        )
-        
-        # Parallel batch tool: allow models to request concurrent execution explicitly
-        self.client.register_tool(
-            name="parallel",
-            func=self.parallel_tool,
-            description=(
-                "Execute multiple registered tools in parallel. Use when provider can't emit multi-tool calls natively. "
-                "Accepts an array of calls with {name, arguments, id?}."
-            ),
-            parameters={
-                "type": "object",
-                "properties": {
-                    "calls": {
-                        "type": "array",
-                        "description": "List of tool calls to run concurrently",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string", "description": "Registered tool name"},
-                                "arguments": {"type": "object", "description": "Arguments for the tool"},
-                                "id": {"type": "string", "description": "Optional call id for tracing"},
-                                "timeout_ms": {"type": "integer", "description": "Optional per-call timeout override"}
-                            },
-                            "required": ["name", "arguments"],
-                            "additionalProperties": False
-                        }
-                    },
-                    "concurrency": {"type": "integer", "description": "Max parallelism (default from env)"},
-                    "timeout_ms": {"type": "integer", "description": "Default per-call timeout in ms"}
-                },
-                "required": ["calls"],
-                "additionalProperties": False
-            }
-        )
-
-        # Smart shell tool
-        self.client.register_tool(
-            name="smart_run_shell",
-            func=smart_run_shell_tool,
-            description="Execute a shell command, analyze failures, suggest fixes, and optionally auto-fix safe issues (e.g., install missing deps).",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "command": {"type": "string", "description": "Shell command to execute"},
-                    "workdir": {"type": "string", "description": "Working directory (optional)"},
-                    "timeout_ms": {"type": "integer", "description": "Timeout in ms (optional, default: 300000)"},
-                    "auto_fix": {"type": "boolean", "description": "If true, apply safe fixes (e.g., install missing deps) and re-run"}
-                },
-                "required": ["command"],
-                "additionalProperties": False
-            }
-        )
-
-        # Interactive shell tool (PTY-based)
-        self.client.register_tool(
-            name="interactive_shell",
-            func=interactive_shell_tool,
-            description=(
-                "Run interactive CLI commands via a pseudo-terminal. Match prompts with regex and send answers. "
-                "Useful for wizards like create-next-app, npm init, etc."
-            ),
-            parameters={
-                "type": "object",
-                "properties": {
-                    "command": {"type": "string", "description": "Shell command to run (e.g., npx create-next-app@latest .)"},
-                    "workdir": {"type": "string", "description": "Working directory (optional)"},
-                    "timeout_ms": {"type": "integer", "description": "Overall timeout in ms (default: 600000)"},
-                    "answers": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "expect": {"type": "string", "description": "Regex to match in transcript"},
-                                "send": {"type": "string", "description": "Text to send when matched (newline auto-appended)"}
-                            },
-                            "required": ["expect", "send"],
-                            "additionalProperties": False
-                        },
-                        "description": "Ordered expect/send rules"
-                    },
-                    "input_script": {"type": "string", "description": "Initial input to send on start (optional)"},
-                    "env": {"type": "object", "description": "Extra environment variables (optional)"},
-                    "transcript_limit": {"type": "integer", "description": "Max transcript bytes to retain (default: 20000)"}
-                },
-                "required": ["command"],
-                "additionalProperties": False
-            }
-        )
-        
-        # Plan tool
-        self.client.register_tool(
-            name="update_plan",
-            func=update_plan_tool,
-            description="Update the development plan with new steps",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "steps": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "List of development steps"
-                    },
-                    "explanation": {
-                        "type": "string",
-                        "description": "Explanation of plan changes"
-                    }
-                }
-            }
-        )
-
-        # Talk tool (use for conversational replies; prints to terminal)
-        self.client.register_tool(
-            name="talk",
-            func=talk_tool,
-            description=(
-                "Use this to respond conversationally in the terminal. "
-                "Render answers, stories, explanations, brainstorming, and Q&A here. "
-                "Do not write files unless the user explicitly asks to save/create."
-            ),
-            parameters={
-                "type": "object",
-                "properties": {
-                    "content": {"type": "string", "description": "Markdown content to say to the user"}
-                },
-                "required": ["content"]
-            }
-        )
-
-        # File read tool
-        self.client.register_tool(
-            name="read_file",
-            func=read_file_tool,
-            description="Read contents of a file, optionally specifying line range",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to the file to read"
-                    }
-                },
-                "required": ["file_path"]
-            }
-        )
-        
-        # Grep tool
-        self.client.register_tool(
-            name="grep",
-            func=grep_tool,
-            description="Search for patterns in files using grep",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "pattern": {
-                        "type": "string",
-                        "description": "Pattern to search for"
-                    },
-                    "file_path": {
-                        "type": "string",
-                        "description": "File or directory to search in (optional, default: current directory)"
-                    },
-                    "recursive": {
-                        "type": "boolean",
-                        "description": "Whether to search recursively (optional, default: true)"
-                    },
-                    "case_sensitive": {
-                        "type": "boolean",
-                        "description": "Whether search should be case sensitive (optional, default: False)"
-                    }
-                },
-                "required": ["pattern"],
-                "additionalProperties": False
-            }
-        )
-        
-        # Search and replace tool (for simple text replacements)
-        self.client.register_tool(
-            name="search_replace",
-            func=search_replace_tool,
-            description="For simple text replacements in existing files. Use apply_patch for complex changes.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to the file to modify"
-                    },
-                    "search_text": {
-                        "type": "string",
-                        "description": "Text to search for"
-                    },
-                    "replace_text": {
-                        "type": "string",
-                        "description": "Text to replace with"
-                    }
-                },
-                "required": ["file_path", "search_text", "replace_text"]
-            }
-        )
-        
-        # System info tool
-        self.client.register_tool(
-            name="get_system_info",
-            func=get_system_info_tool,
-            description="Get system information including OS, Python version, and current directory",
-            parameters={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        )
-        
-        # Quick project/file checker (python | rust | js)
-        self.client.register_tool(
-            name="quick_check",
-            func=quick_check_tool,
-            description="Quickly sanity-check a project or file for Python (ast.parse), Rust (cargo/rustc), or JS/TS (tsc/package.json)",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "kind": {"type": "string", "enum": ["python", "rust", "js"], "description": "Type of project/file to check"},
-                    "target": {"type": "string", "description": "Path to file or directory (default: .)"},
-                    "max_files": {"type": "integer", "description": "Max files to scan for syntax (default: 200)"},
-                    "timeout_ms": {"type": "integer", "description": "Per-command timeout in ms (default: 120000)"}
-                },
-                "required": ["kind"],
-                "additionalProperties": False
-            }
-        )
-
-        # Web search (Exa) tool - off by default; requires EXA_API_KEY when enabled
-        self.client.register_tool(
-            name="websearch",
-            func=websearch_tool,
-            description=(
-                "Search the web via Exa. Off by default; set enabled=true and provide EXA_API_KEY env var."
-            ),
-            parameters={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "Search query"},
-                    "enabled": {"type": "boolean", "description": "Must be true to execute search (default: false)"}
-                },
-                "additionalProperties": False
-            }
-        )
-        
-        # Write file tool (for creating NEW files only)
-        self.client.register_tool(
-            name="write_file",
-            func=write_file_tool,
-            description="Create NEW files only. For modifying existing files, use apply_patch or search_replace instead.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to the NEW file to create"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "Content for the new file"
-                    }
-                },
-                "required": ["file_path", "content"]
-            }
-        )
-
-        # DeepWiki (naive HTTP) tool
-        self.client.register_tool(
-            name="deepwiki",
-            func=deepwiki_tool,
-            description=(
-                "Naively interact with DeepWiki repo pages via HTTPS scraping (no MCP). "
-                "Supports 'list' (pages) and 'get' (page content). Default repo: jennyzzt/dgm."
-            ),
-            parameters={
-                "type": "object",
-                "properties": {
-                    "action": {"type": "string", "enum": ["list", "get"], "description": "Operation: list pages or get a page"},
-                    "repo": {"type": "string", "description": "DeepWiki repo in owner/name format", "default": "jennyzzt/dgm"},
-                    "path": {"type": "string", "description": "Path within the repo for 'get' (e.g., docs/overview)"},
-                    "limit": {"type": "integer", "description": "Max pages to list (for action=list)", "default": 50},
-                    "write_to": {"type": "string", "description": "Optional file path to save JSON or text output (preferred)"},
-                    "writeto": {"type": "string", "description": "Alias for write_to (back-compat)"}
-                },
-                "required": ["action"],
-                "additionalProperties": False
-            }
-        )
-        
-        # Simple Planner Tool (using Cerebras for complex task breakdown)
-        self.client.register_tool(
-            name="planner",
-            func=planner_tool,
-            description="Break down complex tasks into sequential steps using AI planning. Useful for multi-file tasks or complex projects.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "task": {
-                        "type": "string",
-                        "description": "The complex task to break down into sequential steps"
-                    },
-                    "context": {
-                        "type": "string",
-                        "description": "Additional context about the task (optional)"
-                    }
-                },
-                "required": ["task"]
-            }
-        )
-        
         print(_success("✅ Tools registered successfully!"))
         print(_style(f"🔍 Debug: Registered {len(self.client.tool_registry.get_definitions())} tools", color=_Ansi.BLUE, dim=True))
         if self._parallel_tools_enabled:
@@ -1073,6 +929,8 @@ class MuonryAssistant:
         """
         if not tool_calls:
             return None
+        from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
+        from tools.plan_schedule import tool_call_locks
 
         # Parse arguments safely
         specs: list[ToolCallSpec] = []
@@ -1096,6 +954,9 @@ class MuonryAssistant:
         execu = ParallelToolExecutor(self._resolve_tool)
 
         async def _progress(update: dict):
+            await self._emit(update)
+            if self.headless:
+                return
             t = update.get("type")
             if t == "tool_state":
                 sid = update.get("tool_call_id")
@@ -1124,6 +985,8 @@ class MuonryAssistant:
                 progress_cb=_progress,
                 concurrency=self._parallel_concurrency,
                 default_timeout_ms=int(os.getenv("MUONRY_PARALLEL_TIMEOUT_MS", "60000")),
+                # Calls that touch the same file run in order; the rest stay concurrent
+                lock_cb=lambda spec: tool_call_locks(spec.name, spec.arguments),
             )
             return agg
         except Exception as e:
@@ -1186,87 +1049,161 @@ class MuonryAssistant:
                 lines.append(f"- {nm}#{cid}: error ({r.get('error')})")
         return "\n".join(lines)
     
-    async def interactive_loop(self):
-        """Main conversational loop"""
-        # Initial system message with orchestrator-first approach
-        from datetime import datetime
-        now_str = datetime.now().astimezone().strftime("%Y-%m-%d %H:%M:%S %Z%z")
-        conversation = [{
-            "role": "system",
-            "content": f"""
-You are Muonry, a terminal-first AI coding assistant. You help the user get software work done quickly, safely, and pragmatically.
-
-SAFETY
-- Never assist with malicious or harmful intent.
-- Prefer minimal, non-destructive actions; explain risks briefly when relevant.
+    @traced("assistant.turn")
+    async def _process_turn(self, layout: MessageLayout, user_input: str) -> str | None:
+        """Run one user turn: completion, parallel tool calls, rendering.
 
-INTERACTION CONTRACT
-- If the user asks a question (how to perform a task), provide concise instructions only and then ask if they want you to perform them.
-- If the user gives a task/command:
-  - Simple tasks: execute directly without unnecessary questions.
-  - Complex tasks: ask brief, high-value clarifying questions only when necessary to proceed; otherwise plan and act.
-- Be concise. Prefer bullet points and short code blocks. Reference files and symbols using backticks.
-
-TOOLS (Muonry runtime)
-- talk: respond with markdown in terminal. Use for explanations and non-file outputs.
-- planner: break down complex tasks into steps; then execute sequentially.
-- apply_patch: PREFERRED for modifying existing files safely.
-- write_file: ONLY for creating new files when the user explicitly asks to save/create/export.
-- read_file, grep, search_replace: reading and simple text edits.
-- run_shell: non-interactive commands; avoid pagers; prefer options that prevent pagination.
-- smart_run_shell: run, analyze failures, suggest or apply safe fixes.
-- interactive_shell: use only for CLI wizards (short, scripted interactions), not for long interactive sessions.
-- quick_check, get_system_info, update_plan: diagnostics and planning helpers.
-- websearch (optional): Exa search. Off by default; requires `EXA_API_KEY` and install of optional extra `muonry[websearch]`. Must set `enabled=true`.
-
-SHELL & VCS POLICY
-- Do not change directories implicitly; prefer specifying working directory explicitly.
-- Avoid interactive/fullscreen commands unless explicitly asked; prefer flags that produce non-paginated output (e.g., set pager to cat or use --no-pager if available).
-- For git, avoid pagers and keep outputs concise.
-
-SECRETS & SETTINGS
-- Never display secrets. If a command needs a secret, use an environment variable placeholder (e.g., {{FOO_API_KEY}}) and instruct the user to set it.
-- Keys are managed via /settings and persisted to `~/.muonry/.env` with 0600 perms.
+        Returns the last assistant message of the turn.
+        """
+        _ACTIVE_ASSISTANT.set(self)
+        # Add user message to conversation (append-only; layout compacts in bulk)
+        layout.append({"role": "user", "content": user_input})
+        await self._emit({"type": "turn_start"})
+
+        # Get response from assistant (with rate-limit fallback)
+        response = await self._completion_with_fallback(layout.messages())
+        _prompt_toks, _cached_toks = layout.record_usage(response)
+        await self._emit({"type": "usage", "prompt_tokens": _prompt_toks, "cached_tokens": _cached_toks})
+        metrics_registry().counter("muonry_prompt_tokens_total", "Prompt tokens sent").inc(_prompt_toks)
+        metrics_registry().counter("muonry_prompt_cached_tokens_total", "Prompt tokens served from provider cache").inc(_cached_toks)
+        if _cached_toks and os.getenv("MUONRY_CACHE_DEBUG"):
+            print(_style(f"(prompt cache hit: {_cached_toks}/{_prompt_toks} tokens)", color=_Ansi.BLUE, dim=True))
+
+        # If model emitted multiple tool calls (OpenAI-style), run them in parallel
+        final_text: str | None = None
+        if self._parallel_tools_enabled and isinstance(response, dict):
+            tc_list = response.get("tool_calls") or []
+            if isinstance(tc_list, list) and len(tc_list) >= 1:
+                if not self.headless:
+                    print(_style("\n⚡ Executing tool calls in parallel...", color=_Ansi.CYAN, bold=True))
+                agg = await self._run_parallel_tool_calls(tc_list)
+                if agg:
+                    # Print concise summary and inject a brief assistant message for transcript clarity
+                    summary = agg.get("summary") or {}
+                    results = agg.get("results") or []
+                    lines = ["### Parallel tool results", f"- Total: {summary.get('total')}", f"- OK: {summary.get('ok')}", f"- Errors: {summary.get('errors')}"]
+                    for r in results[:10]:  # cap to keep output tidy
+                        status = r.get("state")
+                        nm = r.get("name")
+                        cid = r.get("tool_call_id")
+                        if r.get("ok"):
+                            lines.append(f"- {nm}#{cid}: ok ({r.get('duration_ms')}ms)")
+                        else:
+                            lines.append(f"- {nm}#{cid}: error ({r.get('error')})")
+                    assistant_message = "\n".join(lines)
+                    await self._show_assistant_message(assistant_message)
+                    layout.append({"role": "assistant", "content": assistant_message})
+                    final_text = assistant_message
+
+        if response and 'text' in response:
+            assistant_message = response['text']
+            await self._show_assistant_message(assistant_message)
+            layout.append({"role": "assistant", "content": assistant_message})
+            final_text = assistant_message
+        await self._emit({"type": "turn_done"})
+        return final_text
+
+    async def _emit(self, event: dict) -> None:
+        """Forward an event to the sink; a failing sink never breaks the turn."""
+        if self._event_sink is None:
+            return
+        try:
+            out = self._event_sink(event)
+            if asyncio.iscoroutine(out):
+                await out
+        except Exception:
+            pass
 
-WHEN TO SAVE VS. TALK
-- Conversational requests → use talk. Do NOT create files.
-- Only create or modify files when asked or when required to complete the explicit task outcome.
+    def new_layout(self, max_chars: int | None = None) -> MessageLayout:
+        """Fresh message layout for a session (becomes the active one)."""
+        self._layout = MessageLayout(
+            SYSTEM_PROMPT,
+            volatile=_session_context(),
+            max_chars=max_chars or self.max_context_chars,
+            max_messages=20,
+        )
+        return self._layout
 
-PLANNING WORKFLOW (for complex tasks)
-1) Call planner with the high-level task.
-2) Execute steps sequentially using apply_patch/write_file/run_shell/etc.
-3) Keep actions minimal and verifiable; show progress succinctly.
+    async def turn(self, user_input: str) -> str | None:
+        """Run one turn on the session's layout (created on first use)."""
+        layout = self._layout or self.new_layout()
+        return await self._process_turn(layout, user_input)
 
-OUTPUT STYLE
-- Markdown-friendly. Use short bullets. Reference paths like `path/to/file.py`.
-- Keep context trimmed. Be explicit about assumptions.
+    async def _show_assistant_message(self, message: str) -> None:
+        """Pretty-print a Markdown assistant message (silent in headless mode)."""
+        await self._emit({"type": "text", "delta": message})
+        if self.headless:
+            return
+        print(_style("\n Muonry :>>", color=_Ansi.MAGENTA, bold=True))
+        rendered = render_markdown_to_ansi(message)
+        if self._animations_enabled:
+            await type_out(rendered, delay=self._type_delay, chunk_size=self._type_chunk_size)
+            print("")  # ensure newline after typing
+        else:
+            print(rendered)
 
-WEB SEARCH
-- Only use `websearch` if explicitly enabled and configured. No browsing beyond Exa API.
+    async def run_headless(self, prompts: list[str]) -> dict:
+        """Run prompts as sequential turns of one non-interactive session.
 
-RUNTIME
-- Primary model: groq/moonshotai/kimi-k2-instruct; fallback: cerebras/qwen-3-coder-480b (auto on rate-limit).
-- Context trimming keeps the latest turns under budget.
+        Used by the batch runner (muonry.batch); callers bind the session
+        workdir with tools.workspace.use_workdir.
+        """
+        layout = self.new_layout()
+        output: str | None = None
+        try:
+            for prompt in prompts:
+                output = await self._process_turn(layout, prompt)
+        finally:
+            self.release_client()
+        return {"output": output, "turns": len(prompts), "cache": layout.stats()}
+
+    def _attach_journal(self, layout: MessageLayout, resume: str | None = None) -> SessionJournal | None:
+        """Journal this session to disk; with `resume`, first restore that session's working set."""
+        root = journal_root_from_env()
+        if root is None:
+            if resume:
+                print(_warn("Session journal is off (MUONRY_JOURNAL=0); starting a new session."))
+            return None
+        try:
+            if resume:
+                path = find_session(root, resume)
+                if path is None:
+                    print(_warn(f"No session matching '{resume}' in {root}; starting a new session."))
+                else:
+                    msgs = load_working_set(path, max_messages=layout.max_messages, max_chars=layout.max_chars)
+                    layout.restore(msgs)
+                    journal = SessionJournal(path)
+                    layout.journal = journal
+                    print(_success(f"↩️  Resumed session {journal.id} ({len(msgs)} messages)"))
+                    return journal
+            journal = SessionJournal.create(root, meta={"model": self.primary_model})
+        except Exception as e:
+            print(_warn(f"Session journal unavailable: {e}"))
+            return None
+        layout.journal = journal
+        print(_style(f"📝 Session {journal.id} (resume with: muonry --resume {journal.id})", color=_Ansi.BLUE, dim=True))
+        return journal
 
-FRONTEND BRANDING (when editing web UI)
-- Choose style by context, not always developer-only.
-- Modes and font options (use open licenses when possible):
-  - Marketing Landing: Space Grotesk / Sora / Outfit / Geist Sans for headlines and UI; strong CTAs; allow tasteful text gradients.
-  - Developer/Docs: IBM Plex Mono / JetBrains Mono / Fira Code; monospace accents; high contrast; minimal gradients.
-  - App/Dashboard: Inter / Geist Sans / IBM Plex Sans; compact UI, subtle cards, clear focus rings.
-  - Blog/Longform: Source Serif Pro / IBM Plex Serif for body; Inter/Geist Sans for UI; comfortable reading width.
-- Palette: white base with cyan–magenta brand accents; ensure accessible contrast; support dark mode.
-- Gradients: sparingly; text (#06b6d4 → #d946ef), panels (rgba(6,182,212,0.2) → rgba(217,70,239,0.12)); avoid heavy motion.
-- Accessibility: keyboard focus-visible rings, prefers-reduced-motion, legible sizes.
-- No vendor lockups by default; do not add “Powered by …” unless the user asks.
+    async def interactive_loop(self, resume: str | None = None):
+        """Main conversational loop"""
+        layout = self.new_layout()
+        journal = self._attach_journal(layout, resume)
+        try:
+            await self._interactive_loop(layout)
+        finally:
+            if journal is not None:
+                journal.close()
 
-Environment OS: {OS_INFO}
-Current Datetime: {now_str}
-"""
-        }]
+    async def _interactive_loop(self, layout: MessageLayout):
+        if self._loopwatch is not None:
+            self._loopwatch.start()
         while True:
             try:
-                user_input = self._smart_read_input()
+                if self._loopwatch is not None:
+                    with self._loopwatch.paused():  # waiting at the prompt is not a loop block
+                        user_input = self._smart_read_input()
+                else:
+                    user_input = self._smart_read_input()
                 if user_input is None:
                     # EOF (e.g., Ctrl-D) — exit quietly
                     break
@@ -1281,6 +1218,24 @@ Current Datetime: {now_str}
                 if trimmed.lower() in {'/settings', 'settings'}:
                     _settings_menu()
                     continue
+                if trimmed.lower() == '/stats':
+                    print(_style(format_stats(), color=_Ansi.BLUE, dim=True))
+                    continue
+                if trimmed.lower() == '/lag':
+                    if self._loopwatch is None:
+                        print(_warn("Loop watchdog is off (set MUONRY_LOOPWATCH=1)."))
+                    else:
+                        print(_style(self._loopwatch.report(), color=_Ansi.YELLOW, dim=True))
+                    continue
+                if trimmed.lower() == '/cache':
+                    st = layout.stats()
+                    print(_style(
+                        f"Prompt cache: {st['cached_tokens']}/{st['prompt_tokens']} prompt tokens cached "
+                        f"({st['cache_hit_rate']:.0%}) over {st['requests']} requests; "
+                        f"window={st['window_messages']} msgs, compactions={st['compactions']}",
+                        color=_Ansi.BLUE, dim=True,
+                    ))
+                    continue
 
                 # Fast local Markdown preview: md <file>
                 try:
@@ -1308,56 +1263,14 @@ Current Datetime: {now_str}
                     print(render_markdown_to_ansi(content))
                     continue
 
-                # Add user message to conversation
-                conversation.append({"role": "user", "content": user_input})
-
-                # Get response from assistant (with rate-limit fallback)
-                response = await self._completion_with_fallback(conversation.copy())
-
-                # If model emitted multiple tool calls (OpenAI-style), run them in parallel
-                if self._parallel_tools_enabled and isinstance(response, dict):
-                    tc_list = response.get("tool_calls") or []
-                    if isinstance(tc_list, list) and len(tc_list) >= 1:
-                        print(_style("\n⚡ Executing tool calls in parallel...", color=_Ansi.CYAN, bold=True))
-                        agg = await self._run_parallel_tool_calls(tc_list)
-                        if agg:
-                            # Print concise summary and inject a brief assistant message for transcript clarity
-                            summary = agg.get("summary") or {}
-                            results = agg.get("results") or []
-                            lines = ["### Parallel tool results", f"- Total: {summary.get('total')}", f"- OK: {summary.get('ok')}", f"- Errors: {summary.get('errors')}"]
-                            for r in results[:10]:  # cap to keep output tidy
-                                status = r.get("state")
-                                nm = r.get("name")
-                                cid = r.get("tool_call_id")
-                                if r.get("ok"):
-                                    lines.append(f"- {nm}#{cid}: ok ({r.get('duration_ms')}ms)")
-                                else:
-                                    lines.append(f"- {nm}#{cid}: error ({r.get('error')})")
-                            assistant_message = "\n".join(lines)
-                            print(_style("\n Muonry :>>", color=_Ansi.MAGENTA, bold=True))
-                            rendered = render_markdown_to_ansi(assistant_message)
-                            if self._animations_enabled:
-                                await type_out(rendered, delay=self._type_delay, chunk_size=self._type_chunk_size)
-                                print("")  # ensure newline after typing
-                            else:
-                                print(rendered)
-                            conversation.append({"role": "assistant", "content": assistant_message})
-
-                if response and 'text' in response:
-                    assistant_message = response['text']
-                    # Pretty-print Markdown response in terminal
-                    print(_style("\n Muonry :>>", color=_Ansi.MAGENTA, bold=True))
-                    rendered = render_markdown_to_ansi(assistant_message)
-                    if self._animations_enabled:
-                        await type_out(rendered, delay=self._type_delay, chunk_size=self._type_chunk_size)
-                        print("")
+                with metrics_registry().timer("muonry_turn_seconds", "End-to-end user turn latency"):
+                    if self._profiler is None:
+                        await self._process_turn(layout, user_input)
                     else:
-                        print(rendered)
-                    conversation.append({"role": "assistant", "content": assistant_message})
-
-                # Keep conversation manageable
-                if len(conversation) > 20:
-                    conversation = conversation[-20:]
+                        with self._profiler.profile() as prof:
+                            await self._process_turn(layout, user_input)
+                        if prof.path:
+                            print(_style(prof.report(), color=_Ansi.YELLOW, dim=True))
 
             except KeyboardInterrupt:
                 now = time.time()
@@ -1479,16 +1392,17 @@ Current Datetime: {now_str}
     
 
 
-async def main():
+async def main(resume: str | None = None):
     assistant = MuonryAssistant()
     if await assistant.setup():
-        await assistant.interactive_loop()
+        await assistant.interactive_loop(resume=resume)
     else:
         print(_error("Failed to initialize assistant"))
         
 if __name__ == "__main__":
+    _resume = sys.argv[sys.argv.index("--resume") + 1] if "--resume" in sys.argv[:-1] else None
     try:
-        asyncio.run(main())
+        asyncio.run(main(resume=_resume))
     except KeyboardInterrupt:
         # Quiet exit on Ctrl-C at top-level
         pass
@@ -0,0 +1 @@
+"""Benchmarks for the Muonry agent loop and tools (see benchmarks/run.py)."""
@@ -0,0 +1,202 @@
+"""
+Benchmark cases for the agent loop and tools.
+
+Each factory prepares its inputs under the scratch dir and returns the
+operation that is timed. Cases that need Bhumi-backed modules (toolset,
+assistant) raise `SkipCase` when those imports are unavailable.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.harness import SkipCase, case
+
+
+def _toolset():
+    try:
+        from tools import toolset
+    except Exception as e:  # bhumi missing
+        raise SkipCase(f"tools.toolset unavailable: {e}")
+    return toolset
+
+
+@case("parallel_executor", sizes=[1, 10, 100, 1000], quick_sizes=[1, 100], unit="call")
+def parallel_executor(size: int, scratch: Path) -> Callable[[], Any]:
+    """ParallelToolExecutor overhead per no-op tool call."""
+    import logging
+
+    from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
+
+    async def noop(i: int = 0) -> str:
+        return "ok"
+
+    log = logging.getLogger("bench.orchestratorv2")
+    log.addHandler(logging.NullHandler())
+    executor = ParallelToolExecutor(lambda name: noop, logger=log)
+    log.setLevel(logging.WARNING)
+    specs = [ToolCallSpec(tool_call_id=f"c{i}", name="noop", arguments={"i": i}) for i in range(size)]
+
+    async def op() -> None:
+        await executor.execute(specs, concurrency=64)
+
+    return op
+
+
+@case("apply_patch", sizes=[1_000, 10_000, 100_000, 1_000_000], quick_sizes=[1_000, 10_000], unit="line")
+def apply_patch(size: int, scratch: Path) -> Callable[[], Any]:
+    """apply_patch updating one hunk near the end of an N-line file."""
+    from tools.apply_patch import apply_patch as do_apply_patch
+
+    target = scratch / "big.txt"
+    target.write_text("".join(f"line {i}\n" for i in range(size)), encoding="utf-8")
+    at = max(0, size - 5)
+
+    def patch(old: str, new: str) -> str:
+        # Envelope markers as parsed by tools.apply_patch
+        context = f" line {at - 1}\n" if at else ""
+        return f"**_ Begin Patch\n*** Update File: big.txt\n@@\n{context}-{old}\n+{new}\n_** End Patch\n"
+
+    forward = patch(f"line {at}", f"line {at} changed")
+    backward = patch(f"line {at} changed", f"line {at}")
+    state = {"fwd": True}
+
+    def op() -> None:
+        do_apply_patch(forward if state["fwd"] else backward, str(scratch))
+        state["fwd"] = not state["fwd"]
+
+    return op
+
+
+@case("read_file", sizes=[1_000, 100_000], unit="line")
+def read_file(size: int, scratch: Path) -> Callable[[], Any]:
+    """read_file_tool on an N-line file (full read)."""
+    toolset = _toolset()
+    target = scratch / "f.py"
+    target.write_text("".join(f"value_{i} = {i}  # filler text\n" for i in range(size)), encoding="utf-8")
+
+    async def op() -> None:
+        await toolset.read_file_tool(str(target))
+
+    return op
+
+
+@case("grep", sizes=[100, 1_000], quick_sizes=[100], unit="file")
+def grep(size: int, scratch: Path) -> Callable[[], Any]:
+    """grep_tool over a synthetic tree of N files x 200 lines."""
+    toolset = _toolset()
+    body = "".join(f"def fn_{j}():\n    return {j}\n" for j in range(100))
+    for i in range(size):
+        d = scratch / f"pkg{i % 20}"
+        d.mkdir(exist_ok=True)
+        (d / f"mod{i}.py").write_text(body + ("NEEDLE = 1\n" if i % 10 == 0 else ""), encoding="utf-8")
+
+    async def op() -> None:
+        await toolset.grep_tool("NEEDLE", str(scratch))
+
+    return op
+
+
+@case("render_markdown", sizes=[1_000, 10_000, 100_000], quick_sizes=[1_000], unit="line")
+def render_markdown(size: int, scratch: Path) -> Callable[[], Any]:
+    """render_markdown_to_ansi throughput on an N-line document."""
+    try:
+        from assistant import render_markdown_to_ansi
+    except Exception as e:
+        raise SkipCase(f"assistant unavailable: {e}")
+    block = (
+        "# Heading\n"
+        "Some **bold** and *italic* text with `code` and a [link](https://example.com).\n"
+        "- item one\n"
+        "- item two\n"
+        "```python\n"
+        "print('hello')\n"
+        "```\n"
+        "> quoted line\n"
+        "\n"
+        "Plain paragraph text that goes on for a while to mimic model output.\n"
+    )
+    doc = block * max(1, size // 10)
+
+    def op() -> None:
+        render_markdown_to_ansi(doc)
+
+    return op
+
+
+@case("run_shell_spawn", sizes=[1], quick_sizes=[1], unit="spawn")
+def run_shell_spawn(size: int, scratch: Path) -> Callable[[], Any]:
+    """run_shell latency for a trivial command (process spawn + pipe threads)."""
+    from tools.shell import ShellRequest, run_shell
+
+    req = ShellRequest(command=["true"], workdir=str(scratch), timeout_ms=10_000)
+
+    def op() -> None:
+        run_shell(req)
+
+    return op
+
+
+@case("orchestrator_claim", sizes=[10, 50], quick_sizes=[10], unit="claim")
+def orchestrator_claim(size: int, scratch: Path) -> Callable[[], Any]:
+    """TaskOrchestrator: claim N pending tasks through the worker claim path."""
+    from tools.orchestrator import (
+        AsyncWorkerAgent, OrchestratorState, SubTask, TaskOrchestrator, TaskStatus, WorkerAgent, WorkerStatus,
+    )
+
+    orch = TaskOrchestrator(max_workers=1)
+    orch.state_file = scratch / ".orchestrator_state.db"
+    worker = AsyncWorkerAgent("worker_1", orch)
+
+    def fresh_state() -> OrchestratorState:
+        now = time.time()
+        return OrchestratorState(
+            main_task="bench",
+            subtasks=[
+                SubTask(id=f"task_{i}", description=f"task {i}", file_path=f"out/f{i}.txt", status=TaskStatus.PENDING, created_at=now)
+                for i in range(size)
+            ],
+            workers=[WorkerAgent(id="worker_1", status=WorkerStatus.IDLE, created_at=now)],
+            file_locks={},
+            created_at=now,
+        )
+
+    async def op() -> None:
+        orch._save_state(fresh_state())
+        claimed = 0
+        while await worker._get_next_task():
+            claimed += 1
+        assert claimed == size, f"claimed {claimed}/{size}"
+
+    return op
+
+
+@case("context_layout", sizes=[10, 100, 1_000, 10_000], quick_sizes=[10, 1_000], unit="message", items_per_op=1)
+def context_layout(size: int, scratch: Path) -> Callable[[], Any]:
+    """Per-message context cost (append, compaction, build request) vs. conversation length.
+
+    Uses the assistant's limits (120k chars, 20 messages) and a realistic mix
+    of message sizes, including a whole-file tool output every tenth message,
+    so the measured loop compacts the window every few appends.
+    """
+    from muonry.prompt_layout import MessageLayout
+
+    text = {"user": "x" * 300, "assistant": "x" * 1_500, "tool": "x" * 6_000, "file": "x" * 40_000}
+    roles = ["user", "assistant", "tool", "assistant", "tool", "assistant"]
+
+    def message(i: int) -> dict:
+        role = roles[i % len(roles)]
+        return {"role": role, "content": text["file" if i % 10 == 9 else role]}  # an occasional whole-file read
+
+    layout = MessageLayout("system " * 500, volatile="ctx", max_chars=120_000, max_messages=20)
+    for i in range(size):
+        layout.append(message(i))
+    counter = [size]
+
+    def op() -> None:
+        layout.append(message(counter[0]))
+        counter[0] += 1
+        layout.messages()
+
+    return op
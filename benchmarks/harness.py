@@ -0,0 +1,175 @@
+"""
+Minimal benchmark harness shared by the standalone runner and pytest-benchmark.
+
+A `Case` builds an operation for one problem size; the harness calibrates the
+number of rounds to a time budget and reports per-round and per-item timings.
+Results are plain dicts so they can be written to JSON and diffed between runs.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Operation factory: (size, scratch dir) -> zero-arg callable (sync or async)
+OpFactory = Callable[[int, Path], Callable[[], Any]]
+
+
+class SkipCase(Exception):
+    """Raised by a case factory when an optional dependency is missing."""
+
+
+@dataclass
+class Case:
+    name: str
+    make: OpFactory
+    sizes: List[int]
+    quick_sizes: List[int]
+    unit: str = "item"
+    description: str = ""
+    items_per_op: Optional[int] = None  # units handled by one op; None means `size`
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(
+    name: str,
+    *,
+    sizes: List[int],
+    quick_sizes: Optional[List[int]] = None,
+    unit: str = "item",
+    items_per_op: Optional[int] = None,
+) -> Callable[[OpFactory], OpFactory]:
+    """Register a benchmark case factory.
+
+    `per_item_us` divides each op's time by `items_per_op`, or by the size when
+    one op processes `size` units.
+    """
+    def deco(fn: OpFactory) -> OpFactory:
+        CASES[name] = Case(
+            name=name,
+            make=fn,
+            sizes=list(sizes),
+            quick_sizes=list(quick_sizes or sizes[:2]),
+            unit=unit,
+            items_per_op=items_per_op,
+            description=(fn.__doc__ or "").strip().splitlines()[0] if fn.__doc__ else "",
+        )
+        return fn
+    return deco
+
+
+def sync_op(op: Callable[[], Any], loop: Optional[asyncio.AbstractEventLoop] = None) -> Callable[[], Any]:
+    """Adapt an async op to a sync callable driven by `loop`."""
+    if not asyncio.iscoroutinefunction(op):
+        return op
+    loop = loop or asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(op())
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow tool chatter (emoji status prints) while timing."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(op: Callable[[], Any], *, min_time_s: float = 0.5, max_rounds: int = 1000, min_rounds: int = 3) -> List[float]:
+    """Run `op` repeatedly until `min_time_s` elapses; returns per-round seconds."""
+    op()  # warm-up
+    times: List[float] = []
+    budget_start = time.perf_counter()
+    while len(times) < max_rounds:
+        t0 = time.perf_counter()
+        op()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= min_rounds and time.perf_counter() - budget_start >= min_time_s:
+            break
+    return times
+
+
+def summarize(name: str, size: int, unit: str, times: List[float], items: Optional[int] = None) -> Dict[str, Any]:
+    ordered = sorted(times)
+    items = size if items is None else items
+    median = statistics.median(ordered)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "case": name,
+        "size": size,
+        "unit": unit,
+        "rounds": len(times),
+        "min_s": ordered[0],
+        "median_s": median,
+        "mean_s": statistics.fmean(ordered),
+        "p95_s": p95,
+        "per_item_us": (median / items) * 1e6 if items else None,
+    }
+
+
+def make_op(c: Case, size: int, scratch: Path) -> Callable[[], Any]:
+    """Build the case operation; a missing optional module skips the case."""
+    try:
+        return c.make(size, scratch)
+    except ModuleNotFoundError as e:
+        raise SkipCase(f"{e.name} not installed")
+
+
+def run_case(c: Case, size: int, *, min_time_s: float = 0.5, scratch: Optional[Path] = None) -> Dict[str, Any]:
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix=f"muonry-bench-{c.name}-", dir=scratch) as d:
+        loop = asyncio.new_event_loop()
+        try:
+            with quiet():
+                op = sync_op(make_op(c, size, Path(d)), loop)
+                times = measure(op, min_time_s=min_time_s)
+        finally:
+            loop.close()
+    return summarize(c.name, size, c.unit, times, c.items_per_op)
+
+
+def environment() -> Dict[str, Any]:
+    commit = None
+    with contextlib.suppress(Exception):
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.time(),
+    }
+
+
+def write_json(path: Path, results: List[Dict[str, Any]], *, meta: Optional[Dict[str, Any]] = None) -> None:
+    payload = {"meta": {**environment(), **(meta or {})}, "results": results}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def compare(baseline: Dict[str, Any], results: List[Dict[str, Any]], *, threshold: float) -> List[Dict[str, Any]]:
+    """Return results whose median regressed by more than `threshold` (0.2 = 20%)."""
+    base = {(r["case"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["case"], r["size"]))
+        if not b or not b.get("median_s"):
+            continue
+        ratio = r["median_s"] / b["median_s"]
+        if ratio > 1.0 + threshold:
+            regressions.append({**r, "baseline_median_s": b["median_s"], "ratio": round(ratio, 3)})
+    return regressions
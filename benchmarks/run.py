@@ -0,0 +1,62 @@
+"""
+Standalone benchmark runner.
+
+Usage (from the repo root):
+    python -m benchmarks.run                       # full sizes, results to .muonry/bench/latest.json
+    python -m benchmarks.run --quick -k apply      # small sizes, only matching cases
+    python -m benchmarks.run --compare old.json    # exit 1 if any median regressed > --threshold
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks import cases as _cases  # noqa: F401  (registers cases)
+from benchmarks.harness import CASES, SkipCase, compare, run_case, write_json
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Muonry benchmarks")
+    ap.add_argument("--quick", action="store_true", help="run only the small problem sizes")
+    ap.add_argument("-k", "--filter", default="", help="substring filter on case names")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds of timing per case/size")
+    ap.add_argument("--out", default=".muonry/bench/latest.json", help="JSON output path")
+    ap.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    results = []
+    skipped = []
+    for name, c in CASES.items():
+        if args.filter and args.filter not in name:
+            continue
+        for size in (c.quick_sizes if args.quick else c.sizes):
+            try:
+                r = run_case(c, size, min_time_s=args.min_time)
+            except SkipCase as e:
+                skipped.append({"case": name, "reason": str(e)})
+                print(f"⏭️  {name}: skipped ({e})")
+                break
+            results.append(r)
+            per = f"{r['per_item_us']:.2f}µs/{c.unit}" if r["per_item_us"] is not None else ""
+            print(f"⏱️  {name:<20} n={size:<8} median={r['median_s'] * 1e3:9.3f}ms p95={r['p95_s'] * 1e3:9.3f}ms {per}")
+
+    out = Path(args.out)
+    write_json(out, results, meta={"quick": args.quick, "skipped": skipped})
+    print(f"📄 Wrote {len(results)} results to {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(baseline, results, threshold=args.threshold)
+        for r in regressions:
+            print(f"❌ {r['case']} n={r['size']}: {r['ratio']}x slower than baseline")
+        if regressions:
+            return 1
+        print("✅ No regressions beyond threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
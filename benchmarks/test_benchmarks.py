@@ -0,0 +1,28 @@
+"""pytest-benchmark entry point: `pytest benchmarks --benchmark-json=out.json`."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks import cases as _cases  # noqa: E402,F401
+from benchmarks.harness import CASES, SkipCase, make_op, quiet, sync_op  # noqa: E402
+
+PARAMS = [(name, size) for name, c in CASES.items() for size in c.quick_sizes]
+
+
+@pytest.mark.parametrize("name,size", PARAMS, ids=[f"{n}-{s}" for n, s in PARAMS])
+def test_bench(benchmark, tmp_path, name, size):
+    c = CASES[name]
+    try:
+        factory_op = make_op(c, size, tmp_path)
+    except SkipCase as e:
+        pytest.skip(str(e))
+    loop = asyncio.new_event_loop()
+    try:
+        op = sync_op(factory_op, loop)
+        benchmark.extra_info.update({"size": size, "unit": c.unit})
+        with quiet():
+            benchmark(op)
+    finally:
+        loop.close()
@@ -0,0 +1,266 @@
+"""
+Headless batch runner: `muonry run --tasks tasks.jsonl --concurrency N`.
+
+Runs many independent `MuonryAssistant` sessions concurrently in one event
+loop, for CI and bulk codemods:
+
+- each JSONL line is a task: `{"id": ..., "prompt": "..."}` (or `"prompts":
+  [...]` for several turns) and an optional `"workdir"`;
+- tasks run under an `asyncio.Semaphore(concurrency)`; each gets its own
+  working directory (default `.muonry/runs/<run-id>/<task-id>`) bound with
+  `tools.workspace.use_workdir`, so file and shell tools never see another
+  task's files;
+- sessions borrow their LLM client from the process-wide client pool, so tool
+  registration and keep-alive connections are shared;
+- an optional token bucket (`--rps`) caps LLM requests across all sessions;
+- one JSON result per task (id, ok, output, error, timing) is streamed to
+  `--out` (default stdout), followed by a throughput summary on stderr; when
+  results go to stdout, tool and assistant output is moved to stderr so the
+  stream stays valid JSONL.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from muonry.metrics import registry as metrics_registry
+
+logger = logging.getLogger("muonry.batch")
+
+SessionFactory = Callable[["BatchTask", "Optional[RateLimiter]"], Awaitable[Any]]
+
+
+@dataclass
+class BatchTask:
+    id: str
+    prompts: List[str]
+    workdir: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_tasks(path: os.PathLike | str) -> List[BatchTask]:
+    """Parse a tasks JSONL file (blank lines and `#` comments are skipped)."""
+    tasks: List[BatchTask] = []
+    seen: set[str] = set()
+    with Path(path).open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{lineno}: invalid JSON: {e}") from e
+            if isinstance(obj, str):
+                obj = {"prompt": obj}
+            prompts = obj.get("prompts") or ([obj["prompt"]] if obj.get("prompt") else [])
+            if not prompts or not all(isinstance(p, str) and p.strip() for p in prompts):
+                raise ValueError(f"{path}:{lineno}: task needs a non-empty 'prompt' or 'prompts'")
+            tid = str(obj.get("id") or f"task-{lineno}")
+            if tid in seen:
+                raise ValueError(f"{path}:{lineno}: duplicate task id {tid!r}")
+            seen.add(tid)
+            meta = {k: v for k, v in obj.items() if k not in {"id", "prompt", "prompts", "workdir"}}
+            tasks.append(BatchTask(id=tid, prompts=list(prompts), workdir=obj.get("workdir"), meta=meta))
+    return tasks
+
+
+class RateLimiter:
+    """Async token bucket shared by all sessions of a batch (`rps` requests/s)."""
+
+    def __init__(self, rps: float, *, burst: Optional[int] = None) -> None:
+        if rps <= 0:
+            raise ValueError("rps must be > 0")
+        self.rps = float(rps)
+        self.capacity = float(burst if burst is not None else max(1, int(rps)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rps)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rps)
+
+
+def _safe_name(task_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", task_id)[:80] or "task"
+
+
+async def _default_session(task: BatchTask, rate_limiter: Optional[RateLimiter]) -> Any:
+    # Imported lazily: assistant pulls in bhumi and the full tool set
+    from assistant import MuonryAssistant  # type: ignore
+
+    session = MuonryAssistant(headless=True, rate_limiter=rate_limiter)
+    if not await session.setup(pooled=True):
+        raise RuntimeError("assistant setup failed (is GROQ_API_KEY set?)")
+    return session
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+async def run_batch(
+    tasks: List[BatchTask],
+    *,
+    concurrency: int = 4,
+    workdir_root: Optional[os.PathLike | str] = None,
+    session_factory: Optional[SessionFactory] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    timeout_s: Optional[float] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run tasks concurrently; returns {"results": [...], "summary": {...}}.
+
+    `session_factory(task, rate_limiter)` returns an object with
+    `async run_headless(prompts) -> dict`; the default builds a headless
+    `MuonryAssistant` on a pooled client.
+    """
+    from tools.workspace import use_workdir
+
+    factory = session_factory or _default_session
+    run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    root = Path(workdir_root) if workdir_root else Path(".muonry") / "runs" / run_id
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    metrics = metrics_registry()
+
+    async def _one(task: BatchTask) -> Dict[str, Any]:
+        async with sem:
+            wd = Path(task.workdir) if task.workdir else root / _safe_name(task.id)
+            result: Dict[str, Any] = {
+                "id": task.id,
+                "ok": False,
+                "output": None,
+                "error": None,
+                "turns": 0,
+                "workdir": str(wd),
+                "started_at": time.time(),
+            }
+            t0 = time.perf_counter()
+            try:
+                wd.mkdir(parents=True, exist_ok=True)
+                with use_workdir(wd):
+                    session = await factory(task, rate_limiter)
+                    coro = session.run_headless(task.prompts)
+                    out = await (asyncio.wait_for(coro, timeout_s) if timeout_s else coro)
+                out = out if isinstance(out, dict) else {"output": out}
+                result["output"] = out.get("output")
+                result["turns"] = out.get("turns", len(task.prompts))
+                if out.get("cache"):
+                    result["cache"] = out["cache"]
+                result["ok"] = True
+            except asyncio.TimeoutError:
+                result["error"] = f"timed out after {timeout_s}s"
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["duration_s"] = round(time.perf_counter() - t0, 4)
+            if task.meta:
+                result["meta"] = task.meta
+            outcome = "ok" if result["ok"] else "error"
+            metrics.counter("muonry_batch_tasks_total", "Batch tasks by outcome", outcome=outcome).inc()
+            metrics.histogram("muonry_batch_task_seconds", "Batch task duration").observe(result["duration_s"])
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.debug(f"batch: on_result failed: {e}")
+            return result
+
+    t_start = time.perf_counter()
+    results = await asyncio.gather(*(asyncio.create_task(_one(t), name=f"batch:{t.id}") for t in tasks))
+    wall = time.perf_counter() - t_start
+    durations = [r["duration_s"] for r in results]
+    ok = sum(1 for r in results if r["ok"])
+    summary = {
+        "run_id": run_id,
+        "total": len(results),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "concurrency": max(1, int(concurrency)),
+        "wall_s": round(wall, 4),
+        "tasks_per_s": round(len(results) / wall, 3) if wall > 0 else 0.0,
+        "p50_s": round(_percentile(durations, 0.5), 4),
+        "p95_s": round(_percentile(durations, 0.95), 4),
+        "workdir_root": str(root),
+    }
+    return {"results": list(results), "summary": summary}
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="muonry run", description="Run Muonry tasks headlessly and concurrently.")
+    p.add_argument("--tasks", required=True, help="JSONL file: one {id, prompt|prompts, workdir?} per line")
+    p.add_argument("--concurrency", "-j", type=int, default=4, help="sessions running at once (default 4)")
+    p.add_argument("--out", help="write one JSON result per line here (default: stdout)")
+    p.add_argument("--rps", type=float, default=0.0, help="cap LLM requests per second across all sessions")
+    p.add_argument("--workdir-root", help="parent of per-task workdirs (default .muonry/runs/<run-id>)")
+    p.add_argument("--timeout", type=float, default=0.0, help="per-task timeout in seconds (0 = none)")
+    return p.parse_args(argv)
+
+
+async def main_run(argv: Optional[List[str]] = None, *, session_factory: Optional[SessionFactory] = None) -> int:
+    """`muonry run` entry point. Exit code 1 if any task failed."""
+    args = _parse_args(argv)
+    try:
+        tasks = load_tasks(args.tasks)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    saved_fd: Optional[int] = None
+    if args.out:
+        out_f = open(args.out, "w", encoding="utf-8")
+    else:
+        # Tools and the assistant print progress to stdout; move fd 1 to
+        # stderr and keep a private copy of the original stdout for results.
+        sys.stdout.flush()
+        saved_fd = os.dup(1)
+        out_f = os.fdopen(os.dup(saved_fd), "w", encoding="utf-8")
+        os.dup2(2, 1)
+
+    def _emit(result: Dict[str, Any]) -> None:
+        out_f.write(json.dumps(result, default=str) + "\n")
+        out_f.flush()
+
+    try:
+        report = await run_batch(
+            tasks,
+            concurrency=args.concurrency,
+            workdir_root=args.workdir_root,
+            rate_limiter=RateLimiter(args.rps) if args.rps > 0 else None,
+            timeout_s=args.timeout or None,
+            session_factory=session_factory,
+            on_result=_emit,
+        )
+    finally:
+        out_f.close()
+        if saved_fd is not None:
+            sys.stdout.flush()
+            os.dup2(saved_fd, 1)
+            os.close(saved_fd)
+    s = report["summary"]
+    print(
+        f"✅ {s['ok']}/{s['total']} tasks ok in {s['wall_s']:.1f}s "
+        f"({s['tasks_per_s']:.2f} tasks/s, p50 {s['p50_s']:.1f}s, p95 {s['p95_s']:.1f}s, concurrency {s['concurrency']})",
+        file=sys.stderr,
+    )
+    return 0 if s["failed"] == 0 else 1
@@ -30,7 +30,11 @@ async def _validate_keys_async(
                 {"role": "system", "content": f"You are a helpful {name} test bot."},
                 {"role": "user", "content": "Say 'hello there' and nothing else."},
             ]
-            resp = await asyncio.wait_for(client.completion(msgs), timeout=15)
+            # Key fingerprint is part of the cache key so one key's PASS never vouches for another
+            import hashlib
+            from muonry.llm_cache import cached_completion
+            extra = {"key": hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], "base_url": base_url}
+            resp = await asyncio.wait_for(cached_completion(client, msgs, config=cfg, extra=extra), timeout=15)
             return bool(resp and isinstance(resp, dict) and isinstance(resp.get("text"), str) and resp.get("text").strip())
         except Exception:
             return False
@@ -193,8 +197,51 @@ def _ensure_home_env() -> None:
         pass
 
 
+def _run_headless(command: str, argv: list) -> None:
+    """`muonry run|serve ...`: non-interactive modes (never prompt for keys)."""
+    try:
+        dotenv.load_dotenv(Path.home() / ".muonry" / ".env", override=False)
+    except Exception:
+        pass
+    if command == "serve":
+        from muonry.server import main_serve as entry
+    else:
+        from muonry.batch import main_run as entry
+    try:
+        code = asyncio.run(entry(argv))
+    except KeyboardInterrupt:
+        code = 130
+    sys.exit(code)
+
+
+def _list_sessions() -> None:
+    from muonry.journal import journal_root_from_env, list_sessions
+    import time
+
+    root = journal_root_from_env()
+    sessions = list_sessions(root) if root is not None and root.exists() else []
+    if not sessions:
+        print("No saved sessions.")
+        return
+    for s in sessions:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["modified"]))
+        print(f"{s['id']}  {when}  {s['bytes'] / 1024:7.1f} KiB  {s['first_prompt']}")
+
+
 def main() -> None:
     """Console entry point for Muonry assistant."""
+    if len(sys.argv) > 1 and sys.argv[1] in {"run", "serve"}:
+        _run_headless(sys.argv[1], sys.argv[2:])
+        return
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="muonry", description="Muonry interactive coding assistant.")
+    parser.add_argument("--resume", metavar="ID", help="resume a saved session (id, unique prefix, or 'last')")
+    parser.add_argument("--sessions", action="store_true", help="list saved sessions and exit")
+    args, _unknown = parser.parse_known_args(sys.argv[1:])
+    if args.sessions:
+        _list_sessions()
+        return
     _ensure_home_env()
     # Briefly surface strict tools mode if requested via env so users see it from CLI too
     try:
@@ -206,7 +253,7 @@ def main() -> None:
     # Import after env is ensured
     from assistant import main as assistant_main  # type: ignore
     try:
-        asyncio.run(assistant_main())
+        asyncio.run(assistant_main(resume=args.resume) if args.resume else assistant_main())
     except KeyboardInterrupt:
         # Quiet exit on Ctrl-C
         pass
@@ -0,0 +1,322 @@
+"""
+Process-wide pool of Bhumi LLM clients.
+
+Building a client per call (planner runs, orchestrator worker tasks, the
+rate-limit fallback) means fresh HTTP connections, a new TLS handshake and
+re-registering every tool schema each time. Callers borrow a long-lived client
+from this pool instead.
+
+- Clients are keyed by (provider, model, base_url, profile). `profile` separates
+  clients that carry different tool sets (e.g. the assistant vs. orchestrator
+  workers); a fingerprint of the API key is included so different credentials
+  never share a client.
+- Tool sets are registered once per client via `setup`/`setup_key`; callers
+  that arrive while a setup is still running wait for it to finish.
+- The pool is LRU-bounded (`MUONRY_CLIENT_POOL_SIZE`, default 8).
+- Health checks: a client is evicted after `MUONRY_CLIENT_POOL_MAX_FAILURES`
+  consecutive failures (default 3) or `MUONRY_CLIENT_POOL_MAX_IDLE_S` seconds of
+  idleness (default 900); the next `get()` rebuilds it.
+- Every `get()` is a lease, returned with `release(client)` (or use `lease()`).
+  Eviction only removes a client from the pool; it is closed once its last
+  lease is released, so borrowers mid-call never see it closed under them.
+
+Bhumi is imported lazily so importing this module stays cheap.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger("muonry.client_pool")
+
+ClientFactory = Callable[[Any, Optional[type]], Any]
+SetupFn = Callable[[Any], Optional[Awaitable[None]]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _cfg_get(config: Any, name: str) -> Any:
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+@dataclass(frozen=True)
+class PoolKey:
+    provider: str
+    model: str
+    base_url: str
+    profile: str
+    key_fp: str
+
+    @classmethod
+    def from_config(cls, config: Any, profile: str = "default") -> "PoolKey":
+        model = str(_cfg_get(config, "model") or "")
+        provider = model.split("/", 1)[0] if "/" in model else "default"
+        base_url = str(_cfg_get(config, "base_url") or "")
+        api_key = str(_cfg_get(config, "api_key") or "")
+        key_fp = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12] if api_key else ""
+        return cls(provider=provider, model=model, base_url=base_url, profile=profile, key_fp=key_fp)
+
+
+@dataclass
+class _Entry:
+    client: Any
+    created_at: float
+    last_used: float
+    failures: int = 0
+    uses: int = 0
+    leases: int = 0
+    evicted: bool = False
+    tool_sets: Set[str] = field(default_factory=set)
+    setups: Dict[str, "asyncio.Future[None]"] = field(default_factory=dict)  # setup_key -> in flight
+
+
+def _default_factory(config: Any, client_cls: Optional[type]) -> Any:
+    from bhumi.base_client import BaseLLMClient, LLMConfig  # type: ignore
+
+    cls = client_cls or BaseLLMClient
+    cfg = LLMConfig(**config) if isinstance(config, dict) else config
+    return cls(cfg)
+
+
+def _close_quietly(client: Any) -> None:
+    """Best-effort release of an evicted client's resources."""
+    for attr in ("aclose", "close"):
+        fn = getattr(client, attr, None)
+        if not callable(fn):
+            continue
+        try:
+            out = fn()
+            if asyncio.iscoroutine(out):
+                try:
+                    asyncio.get_running_loop().create_task(out)
+                except RuntimeError:
+                    out.close()
+        except Exception:
+            pass
+        return
+
+
+class ClientPool:
+    """LRU-bounded registry of reusable LLM clients with simple health checks."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        *,
+        max_failures: Optional[int] = None,
+        max_idle_s: Optional[float] = None,
+        factory: Optional[ClientFactory] = None,
+    ) -> None:
+        self.max_size = max(1, max_size if max_size is not None else _env_int("MUONRY_CLIENT_POOL_SIZE", 8))
+        self.max_failures = max(1, max_failures if max_failures is not None else _env_int("MUONRY_CLIENT_POOL_MAX_FAILURES", 3))
+        self.max_idle_s = max_idle_s if max_idle_s is not None else _env_float("MUONRY_CLIENT_POOL_MAX_IDLE_S", 900.0)
+        self._factory: ClientFactory = factory or _default_factory
+        self._entries: "OrderedDict[PoolKey, _Entry]" = OrderedDict()
+        self._by_client: Dict[int, _Entry] = {}  # pooled and evicted-but-leased clients
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    async def get(
+        self,
+        config: Any,
+        *,
+        profile: str = "default",
+        client_cls: Optional[type] = None,
+        setup: Optional[SetupFn] = None,
+        setup_key: Optional[str] = None,
+    ) -> Any:
+        """Lease a pooled client for `config`, building it on first use.
+
+        `setup(client)` (sync or async) runs once per client for each distinct
+        `setup_key`, so tool registration is not repeated on reuse; concurrent
+        callers wait for an in-flight setup instead of skipping it. Pair with
+        `release(client)`.
+        """
+        key = PoolKey.from_config(config, profile)
+        self.health_check()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+                now = time.time()
+                entry = _Entry(client=self._factory(config, client_cls), created_at=now, last_used=now)
+                self._entries[key] = entry
+                self._by_client[id(entry.client)] = entry
+                logger.debug(f"client pool: built {key.provider}/{key.model} profile={profile}")
+                self._evict_overflow()
+            entry.last_used = time.time()
+            entry.uses += 1
+            entry.leases += 1
+        try:
+            skey = setup_key or (getattr(setup, "__qualname__", None) if setup else None)
+            if setup and skey:
+                await self._ensure_setup(entry, skey, setup)
+        except BaseException:
+            self.release(entry.client)
+            raise
+        return entry.client
+
+    async def _ensure_setup(self, entry: _Entry, skey: str, setup: SetupFn) -> None:
+        """Run `setup` once for `skey`; later callers await the first one's run."""
+        while True:
+            with self._lock:
+                if skey in entry.tool_sets:
+                    return
+                pending = entry.setups.get(skey)
+                if pending is None:
+                    fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+                    entry.setups[skey] = fut
+            if pending is not None:
+                try:
+                    await asyncio.shield(pending)
+                except Exception:
+                    pass  # that setup failed; loop round and try it ourselves
+                continue
+            try:
+                out = setup(entry.client)
+                if asyncio.iscoroutine(out):
+                    await out
+            except BaseException as e:
+                with self._lock:
+                    entry.setups.pop(skey, None)
+                fut.set_exception(e if isinstance(e, Exception) else RuntimeError("setup cancelled"))
+                fut.exception()  # retrieved: waiters retry, nobody else needs it
+                raise
+            with self._lock:
+                entry.tool_sets.add(skey)
+                entry.setups.pop(skey, None)
+            fut.set_result(None)
+            return
+
+    def release(self, client: Any) -> None:
+        """Return a lease taken by `get()`; closes the client if it was evicted meanwhile."""
+        with self._lock:
+            entry = self._by_client.get(id(client))
+            if entry is None or entry.client is not client:
+                return
+            entry.leases = max(0, entry.leases - 1)
+            if not (entry.evicted and entry.leases == 0):
+                return
+            self._by_client.pop(id(client), None)
+        _close_quietly(client)
+
+    @asynccontextmanager
+    async def lease(self, config: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """`async with pool.lease(config) as client:` -- `get()` plus `release()`."""
+        client = await self.get(config, **kwargs)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def report(self, client: Any, ok: bool) -> None:
+        """Record the outcome of a call made with a pooled client."""
+        with self._lock:
+            entry = self._by_client.get(id(client))
+            if entry is None or entry.evicted or entry.client is not client:
+                return
+            key = next(k for k, e in self._entries.items() if e is entry)
+            if ok:
+                entry.failures = 0
+                return
+            entry.failures += 1
+            if entry.failures >= self.max_failures:
+                logger.debug(f"client pool: evicting unhealthy {key.model} after {entry.failures} failures")
+                self._drop(key)
+
+    def health_check(self) -> int:
+        """Evict unhealthy or idle clients. Returns the number evicted."""
+        now = time.time()
+        with self._lock:
+            stale = [
+                k for k, e in self._entries.items()
+                if e.failures >= self.max_failures or (self.max_idle_s > 0 and now - e.last_used > self.max_idle_s)
+            ]
+            for k in stale:
+                self._drop(k)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            for k in list(self._entries):
+                self._drop(k)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "clients": [
+                    {"provider": k.provider, "model": k.model, "profile": k.profile, "uses": e.uses, "failures": e.failures}
+                    for k, e in self._entries.items()
+                ],
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Callers must hold self._lock
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def _drop(self, key: PoolKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        entry.evicted = True
+        self._evictions += 1
+        if entry.leases:
+            return  # still borrowed: the last release() closes it
+        self._by_client.pop(id(entry.client), None)
+        _close_quietly(entry.client)
+
+
+_POOL: Optional[ClientPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def default_pool() -> ClientPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ClientPool()
+    return _POOL
+
+
+async def get_client(config: Any, **kwargs: Any) -> Any:
+    """Shorthand for `default_pool().get(config, **kwargs)` (pair with `release`)."""
+    return await default_pool().get(config, **kwargs)
@@ -0,0 +1,206 @@
+"""
+Append-only on-disk session journal with fast resume.
+
+Every interactive session writes `MUONRY_JOURNAL_DIR/<id>.jsonl` (default
+`.muonry/sessions`; `MUONRY_JOURNAL=0` disables):
+
+- line 1 is a `meta` record (id, created, cwd, model);
+- each message appended to the conversation becomes a `msg` record with a
+  sequence number; contents longer than `compress_over` characters (tool
+  output, pasted files, ...) are stored zlib-compressed and base64-encoded;
+- each layout compaction writes a `compact` record with the number of
+  messages that survived it.
+
+`muonry --resume <id>` (or `last`) rebuilds only the working set: the file is
+read backwards from the end in blocks and stops at the most recent compaction
+boundary or once the window budget is full, so resuming costs the size of the
+window, not the session, and needs no tool calls.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import secrets
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_FALSY = {"0", "false", "no", "off"}
+
+_BLOCK = 64 * 1024
+
+
+def journal_root_from_env() -> Optional[Path]:
+    """Journal directory, or None when MUONRY_JOURNAL is off."""
+    if str(os.getenv("MUONRY_JOURNAL", "1")).strip().lower() in _FALSY:
+        return None
+    return Path(os.getenv("MUONRY_JOURNAL_DIR") or Path(".muonry") / "sessions")
+
+
+def _encode_content(content: Any, compress_over: int) -> Dict[str, Any]:
+    if isinstance(content, str) and len(content) > compress_over:
+        z = zlib.compress(content.encode("utf-8"), 6)
+        return {"z": base64.b64encode(z).decode("ascii")}
+    return {"content": content}
+
+
+def _decode_content(rec: Dict[str, Any]) -> Any:
+    if "z" in rec:
+        return zlib.decompress(base64.b64decode(rec["z"])).decode("utf-8")
+    return rec.get("content")
+
+
+def _lines_reversed(path: Path) -> Iterator[bytes]:
+    """Yield the lines of a file last-first, reading fixed-size blocks from the end."""
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0:
+            step = min(_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + tail
+            lines = chunk.split(b"\n")
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                if line.strip():
+                    yield line
+        if tail.strip():
+            yield tail
+
+
+class SessionJournal:
+    """Append-only JSONL journal for one session."""
+
+    def __init__(self, path: os.PathLike | str, *, compress_over: int = 1024) -> None:
+        self.path = Path(path)
+        self.id = self.path.stem
+        self.compress_over = max(0, compress_over)
+        self.seq = 0
+        for line in _lines_reversed(self.path) if self.path.exists() else ():
+            try:
+                self.seq = int(json.loads(line).get("seq", 0))
+            except Exception:
+                continue
+            break
+        self._f: Optional[Any] = None  # opened on first write, so empty sessions leave no file
+        self._meta: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, root: os.PathLike | str, *, meta: Optional[Dict[str, Any]] = None, **kwargs: Any) -> "SessionJournal":
+        session_id = time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(3)
+        journal = cls(Path(root) / f"{session_id}.jsonl", **kwargs)
+        journal._meta = {"t": "meta", "id": session_id, "created": time.time(), "cwd": os.getcwd(), **(meta or {})}
+        return journal
+
+    def _write(self, rec: Dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._f is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._f = self.path.open("a", encoding="utf-8")
+                if self._meta is not None:
+                    self._f.write(json.dumps(self._meta, ensure_ascii=False, default=str) + "\n")
+            self._f.write(line)
+            self._f.flush()
+
+    def record(self, msg: Dict[str, Any]) -> None:
+        """Append one conversation message."""
+        self.seq += 1
+        rec: Dict[str, Any] = {"t": "msg", "seq": self.seq, "ts": round(time.time(), 3)}
+        rec.update({k: v for k, v in msg.items() if k != "content"})
+        rec.update(_encode_content(msg.get("content"), self.compress_over))
+        self._write(rec)
+
+    def compacted(self, kept: int) -> None:
+        """Note that the layout dropped all but the last `kept` messages."""
+        self._write({"t": "compact", "seq": self.seq, "keep": kept})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                try:
+                    self._f.close()
+                except Exception:
+                    pass
+                self._f = None
+
+
+def load_working_set(
+    path: os.PathLike | str,
+    *,
+    max_messages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Messages of the current window, oldest first, read from the end of the journal."""
+    out: List[Dict[str, Any]] = []
+    chars = 0
+    limit: Optional[int] = None  # messages still allowed before a compaction boundary
+    for line in _lines_reversed(Path(path)):
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue  # torn last line after a crash
+        kind = rec.get("t")
+        if kind == "meta":
+            break
+        if kind == "compact":
+            if limit is None:
+                limit = int(rec.get("keep", 0))
+            continue
+        if kind != "msg":
+            continue
+        if limit is not None:
+            if limit <= 0:
+                break
+            limit -= 1
+        msg = {k: v for k, v in rec.items() if k not in {"t", "seq", "ts", "z", "content"}}
+        msg["content"] = _decode_content(rec)
+        size = len(str(msg["content"] or ""))
+        if out and ((max_chars is not None and chars + size > max_chars) or (max_messages is not None and len(out) >= max_messages)):
+            break
+        out.append(msg)
+        chars += size
+    out.reverse()
+    # Never start the window on a dangling tool result
+    while out and out[0].get("role") == "tool":
+        out.pop(0)
+    return out
+
+
+def list_sessions(root: os.PathLike | str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Most recent sessions first: id, modified time, size and first prompt."""
+    files = sorted(Path(root).glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    sessions = []
+    for p in files:
+        first_prompt = ""
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                for _, line in zip(range(50), f):
+                    rec = json.loads(line)
+                    if rec.get("t") == "msg" and rec.get("role") == "user":
+                        first_prompt = str(_decode_content(rec) or "")[:80]
+                        break
+        except Exception:
+            pass
+        st = p.stat()
+        sessions.append({"id": p.stem, "modified": st.st_mtime, "bytes": st.st_size, "first_prompt": first_prompt})
+    return sessions
+
+
+def find_session(root: os.PathLike | str, ref: str) -> Optional[Path]:
+    """Resolve a session id, unique id prefix or `last` to its journal file."""
+    root = Path(root)
+    if ref in {"last", "latest"}:
+        recent = list_sessions(root, limit=1)
+        return root / f"{recent[0]['id']}.jsonl" if recent else None
+    exact = root / f"{ref}.jsonl"
+    if exact.exists():
+        return exact
+    matches = [p for p in root.glob("*.jsonl") if p.stem.startswith(ref)]
+    return matches[0] if len(matches) == 1 else None
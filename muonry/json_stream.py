@@ -0,0 +1,175 @@
+"""
+Incremental JSON plan extractor for streamed model output.
+
+Thinking models wrap the plan in `<think>` blocks, prose and code fences, and
+the planner used to wait for the whole response, then try `orjson.loads`,
+`json.loads` and finally a greedy `\\{[\\s\\S]*\\}` regex. `PlanStream` instead
+scans the text once as it arrives:
+
+- `<think>...</think>` blocks and anything outside a JSON value are skipped
+  (fences, prose, a stray `{` in prose that never parses);
+- string/escape state and a container stack are kept across chunks, so each
+  character is looked at exactly once (linear in the response size);
+- as soon as an object inside a `steps` / `subtasks` / `tasks` array (or a
+  top-level array) closes, it is parsed and returned from `feed()`, so step 1
+  is available while the model is still writing step 10;
+- `close()` returns the last complete top-level JSON value, if any.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+STEP_KEYS = ("steps", "subtasks", "tasks")
+
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_VALUE_OR_TAG = re.compile(r"[{\[<]")
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start", "pending_key", "current_key")
+
+    def __init__(self, kind: str, key: Optional[str], start: int) -> None:
+        self.kind = kind  # "{" or "["
+        self.key = key  # key this container is stored under in its parent object
+        self.start = start
+        self.pending_key: Optional[str] = None  # last string seen in key position
+        self.current_key: Optional[str] = None  # key whose value is being read
+
+
+class PlanStream:
+    """Feed text chunks; get plan steps back as soon as each one is complete."""
+
+    def __init__(self, step_keys: Sequence[str] = STEP_KEYS) -> None:
+        self.step_keys = set(step_keys)
+        self.steps: List[Dict[str, Any]] = []
+        self.result: Any = None
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._think = False
+
+    def _is_step_array(self, frame: _Frame) -> bool:
+        return frame.kind == "[" and (frame.key in self.step_keys or (frame.key is None and len(self._stack) == 1))
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk; returns the steps completed by it."""
+        new: List[Dict[str, Any]] = []
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        n = len(text)
+        stack = self._stack
+        while i < n:
+            if not stack:
+                # Outside any JSON value: skip thinking blocks and prose
+                if self._think:
+                    end = text.find(_THINK_CLOSE, i)
+                    if end < 0:
+                        i = max(i, n - len(_THINK_CLOSE) + 1)
+                        break
+                    self._think = False
+                    i = end + len(_THINK_CLOSE)
+                    continue
+                m = _VALUE_OR_TAG.search(text, i)
+                if m is None:
+                    i = n
+                    break
+                nxt = m.start()
+                ch = text[nxt]
+                if ch == "<":
+                    if text.startswith(_THINK_OPEN, nxt):
+                        self._think = True
+                        i = nxt + len(_THINK_OPEN)
+                    elif n - nxt < len(_THINK_OPEN) and _THINK_OPEN.startswith(text[nxt:]):
+                        i = nxt  # maybe a tag split across chunks
+                        break
+                    else:
+                        i = nxt + 1
+                    continue
+                stack.append(_Frame(ch, None, nxt))
+                i = nxt + 1
+                continue
+
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    top = stack[-1]
+                    if top.kind == "{" and top.current_key is None:
+                        try:
+                            top.pending_key = json.loads(text[self._string_start:i + 1])
+                        except ValueError:
+                            top.pending_key = None
+                i += 1
+                continue
+
+            top = stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and top.kind == "{":
+                top.current_key = top.pending_key
+            elif ch == "," and top.kind == "{":
+                top.current_key = top.pending_key = None
+            elif ch in "{[":
+                stack.append(_Frame(ch, top.current_key if top.kind == "{" else None, i))
+            elif ch in "}]":
+                frame = stack.pop()
+                if not stack:
+                    self._finish_root(text[frame.start:i + 1])
+                elif ch == "}" and self._is_step_array(stack[-1]):
+                    try:
+                        step = _loads(text[frame.start:i + 1])
+                    except ValueError:
+                        step = None
+                    if isinstance(step, dict):
+                        self.steps.append(step)
+                        new.append(step)
+            i += 1
+
+        # Keep only what an unfinished value still needs
+        keep = stack[0].start if stack else i
+        self._text = text[keep:]
+        self._pos = i - keep
+        for frame in stack:
+            frame.start -= keep
+        if self._in_string:
+            self._string_start -= keep
+        return new
+
+    def _finish_root(self, raw: str) -> None:
+        try:
+            value = _loads(raw)
+        except ValueError:
+            return  # braces in prose
+        if isinstance(value, (dict, list)):
+            self.result = value
+
+    def close(self) -> Any:
+        """End of stream: the last complete top-level JSON value (or None)."""
+        return self.result
+
+
+def extract_plan(text: str, step_keys: Sequence[str] = STEP_KEYS) -> tuple[Any, List[Dict[str, Any]]]:
+    """One-shot helper: (top-level value, steps) from a complete response."""
+    stream = PlanStream(step_keys)
+    stream.feed(text)
+    return stream.close(), stream.steps
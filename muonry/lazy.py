@@ -0,0 +1,29 @@
+"""
+Deferred module imports for a fast cold start.
+
+`lazy_import("tools.toolset")` returns the module object immediately but only
+executes it on first attribute access (stdlib `importlib.util.LazyLoader`), so
+heavy tool modules and their dependencies load when a tool is first used
+rather than before the first prompt.
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return `name` as a module that is executed on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,252 @@
+"""
+Opt-in on-disk cache for deterministic LLM completions.
+
+Planner calls and key-validation pings often send byte-identical prompts.
+With the cache enabled those calls are answered from disk instantly and
+deterministically, which also makes CI/offline runs reproducible.
+
+- Keyed on (model, messages hash, tool schema hash, temperature, extra), where
+  `extra` covers anything else that changes the answer (response_format,
+  credential fingerprint, ...).
+- Entries live under `MUONRY_LLM_CACHE_DIR` (default `.muonry/cache/llm`), one
+  JSON file each, expire after `MUONRY_LLM_CACHE_TTL_S` seconds (default
+  86400, `0` = never) and are evicted oldest-first once the directory exceeds
+  `MUONRY_LLM_CACHE_MAX_MB` (default 64).
+- `MUONRY_LLM_CACHE` selects the mode:
+  - `off` (default): every call goes to the provider;
+  - `on`: read-through/write-back;
+  - `replay`: read-only, a miss raises `CacheMiss` instead of calling out.
+
+Only dict responses with non-empty `text` are stored, so errors are never
+replayed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from muonry.metrics import registry as metrics_registry
+
+logger = logging.getLogger("muonry.llm_cache")
+
+MODES = ("off", "on", "replay")
+
+
+class CacheMiss(RuntimeError):
+    """Raised in replay mode when no cached response exists for a request."""
+
+
+def _cfg_get(config: Any, name: str) -> Any:
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def _canonical(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    *,
+    tools: Any = None,
+    temperature: Any = None,
+    extra: Any = None,
+) -> str:
+    """Stable cache key for a completion request."""
+    parts = {
+        "model": model or "",
+        "messages": _sha(_canonical(messages)),
+        "tools": _sha(_canonical(tools)) if tools else "",
+        "temperature": temperature,
+        "extra": _sha(_canonical(extra)) if extra else "",
+    }
+    return _sha(_canonical(parts))
+
+
+class CompletionCache:
+    """Directory of cached completion responses."""
+
+    def __init__(
+        self,
+        root: Optional[os.PathLike | str] = None,
+        *,
+        mode: Optional[str] = None,
+        ttl_s: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        env_mode = str(os.getenv("MUONRY_LLM_CACHE", "off")).strip().lower()
+        if env_mode in {"1", "true", "yes"}:
+            env_mode = "on"
+        self.mode = (mode or env_mode) if (mode or env_mode) in MODES else "off"
+        self.root = Path(root or os.getenv("MUONRY_LLM_CACHE_DIR") or Path(".muonry") / "cache" / "llm")
+        if ttl_s is None:
+            try:
+                ttl_s = float(os.getenv("MUONRY_LLM_CACHE_TTL_S", "86400"))
+            except Exception:
+                ttl_s = 86400.0
+        self.ttl_s = ttl_s
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(os.getenv("MUONRY_LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+            except Exception:
+                max_bytes = 64 * 1024 * 1024
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for `key`, or None if missing/expired."""
+        p = self._path(key)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            self.misses += 1
+            return None
+        created = float(entry.get("created", 0) or 0)
+        if self.ttl_s and self.ttl_s > 0 and time.time() - created > self.ttl_s and self.mode != "replay":
+            try:
+                p.unlink()
+            except Exception:
+                pass
+            self.misses += 1
+            return None
+        try:
+            os.utime(p, None)  # refresh recency for eviction
+        except Exception:
+            pass
+        self.hits += 1
+        resp = entry.get("response")
+        return resp if isinstance(resp, dict) else None
+
+    def put(self, key: str, response: Any, *, model: str = "") -> bool:
+        """Store a response. Returns False for responses that are not cacheable."""
+        if self.mode != "on" or not isinstance(response, dict):
+            return False
+        text = response.get("text")
+        if not isinstance(text, str) or not text.strip():
+            return False
+        try:
+            payload = json.dumps({"created": time.time(), "model": model, "response": response}, default=str)
+        except Exception:
+            return False
+        p = self._path(key)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, p)
+        except Exception as e:
+            logger.debug(f"llm cache: write failed: {e}")
+            return False
+        self.writes += 1
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        if not self.max_bytes:
+            return
+        with self._lock:
+            files = []
+            total = 0
+            for f in self.root.glob("*/*.json"):
+                try:
+                    st = f.stat()
+                except Exception:
+                    continue
+                files.append((st.st_mtime, st.st_size, f))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            files.sort()
+            for _, size, f in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    f.unlink()
+                    total -= size
+                    self.evictions += 1
+                except Exception:
+                    pass
+
+    def clear(self) -> None:
+        for f in self.root.glob("*/*.json"):
+            try:
+                f.unlink()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "dir": str(self.root),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+_CACHE: Optional[CompletionCache] = None
+
+
+def default_cache() -> CompletionCache:
+    """Process-wide cache configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = CompletionCache()
+    return _CACHE
+
+
+async def cached_completion(
+    client: Any,
+    messages: List[Dict[str, Any]],
+    *,
+    config: Any = None,
+    tools: Any = None,
+    extra: Any = None,
+    cache: Optional[CompletionCache] = None,
+    **kwargs: Any,
+) -> Any:
+    """`client.completion(messages, **kwargs)` through the completion cache.
+
+    `config` supplies model/temperature for the key (falls back to
+    `client.config`). With the cache off this is a plain call.
+    """
+    cache = cache or default_cache()
+    if not cache.enabled:
+        return await client.completion(messages, **kwargs)
+    cfg = config if config is not None else getattr(client, "config", None)
+    model = str(_cfg_get(cfg, "model") or "")
+    key = make_key(model, messages, tools=tools, temperature=_cfg_get(cfg, "temperature"), extra=extra)
+    hit = cache.get(key)
+    metrics_registry().counter("muonry_llm_cache_total", "Completion cache lookups", result="hit" if hit is not None else "miss").inc()
+    if hit is not None:
+        logger.debug(f"llm cache: hit {key[:12]} model={model}")
+        return hit
+    if cache.mode == "replay":
+        raise CacheMiss(f"no cached completion for model={model} key={key[:12]}")
+    response = await client.completion(messages, **kwargs)
+    cache.put(key, response, model=model)
+    return response
@@ -0,0 +1,209 @@
+"""
+Event-loop lag watchdog and blocking-call detector.
+
+Enable with `MUONRY_LOOPWATCH=1`. Two cooperating parts:
+
+- a heartbeat coroutine that sleeps `interval` and records how late it wakes
+  up (scheduling delay) into the `muonry_loop_lag_seconds` histogram;
+- a watcher thread that notices when the heartbeat is overdue by more than
+  `MUONRY_LOOPWATCH_MS` (default 100) and captures the loop thread's stack
+  while the blocking call is still on it.
+
+Each blocking episode is attributed to a tool: the innermost `*_tool`
+function or `tools/` frame on the captured stack, else the name of the
+running asyncio task (the parallel executor names its tasks `tool:<name>`).
+Episodes feed `muonry_loop_blocked_total` / `muonry_loop_block_seconds` per
+tool, and `/lag` prints the most recent ones with their stacks.
+
+Deliberate waits on the loop thread (the interactive prompt's `input()`) are
+wrapped in `paused()`: nothing is captured or recorded while paused, and the
+heartbeat that spans the pause is not counted as lag.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Iterator, List, Optional
+
+from muonry.metrics import registry as metrics_registry
+
+logger = logging.getLogger("muonry.loopwatch")
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+@dataclass
+class BlockingEvent:
+    tool: str
+    started_at: float
+    duration_s: float
+    stack: List[str]
+
+    def format(self) -> str:
+        return f"⛔ loop blocked {self.duration_s * 1000:.0f}ms by {self.tool}\n" + "".join(self.stack)
+
+
+def attribute_stack(frame: Any) -> Optional[str]:
+    """Name the tool responsible for a stack (innermost match wins)."""
+    module_hit: Optional[str] = None
+    f = frame
+    while f is not None:
+        code = f.f_code
+        if code.co_name.endswith("_tool"):
+            return code.co_name[: -len("_tool")]
+        if module_hit is None:
+            path = code.co_filename.replace("\\", "/")
+            if "/tools/" in path and not path.endswith("/orchestratorv2.py"):
+                module_hit = f"{os.path.splitext(os.path.basename(path))[0]}.{code.co_name}"
+        f = f.f_back
+    return module_hit
+
+
+class LoopWatchdog:
+    def __init__(self, *, interval_s: float = 0.05, threshold_s: float = 0.1, keep: int = 50) -> None:
+        self.interval_s = max(0.005, interval_s)
+        self.threshold_s = max(self.interval_s, threshold_s)
+        self.events: Deque[BlockingEvent] = deque(maxlen=keep)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._last_beat = time.perf_counter()
+        self._pending: Optional[BlockingEvent] = None
+        self._pending_beat: Optional[float] = None
+        self._lock = threading.Lock()
+        self._paused = 0
+        self._epoch = 0  # bumped on pause/resume; heartbeats spanning a change are discarded
+        self._hb_task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._hb_task is not None and not self._hb_task.done()
+
+    def start(self) -> None:
+        """Start watching the running loop (call from inside it)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._hb_task = self._loop.create_task(self._heartbeat(), name="muonry-loopwatch")
+        self._watcher = threading.Thread(target=self._watch, name="muonry-loopwatch", daemon=True)
+        self._watcher.start()
+
+    @contextlib.contextmanager
+    def paused(self) -> Iterator[None]:
+        """Suspend detection around an intentional blocking wait on the loop thread."""
+        with self._lock:
+            self._paused += 1
+            self._epoch += 1
+            self._pending = None
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                self._epoch += 1
+                self._pending = None
+                self._last_beat = time.perf_counter()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._hb_task is not None:
+            self._hb_task.cancel()
+            try:
+                await self._hb_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._watcher is not None:
+            self._watcher.join(timeout=1.0)
+
+    async def _heartbeat(self) -> None:
+        lag_hist = metrics_registry().histogram("muonry_loop_lag_seconds", "Event-loop scheduling delay")
+        while True:
+            t0 = time.perf_counter()
+            epoch = self._epoch
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            lag = max(0.0, now - t0 - self.interval_s)
+            with self._lock:
+                self._last_beat = now
+                pending, self._pending = self._pending, None
+                if self._paused or epoch != self._epoch:
+                    continue
+            lag_hist.observe(lag)
+            if pending is not None:
+                pending.duration_s = lag + self.interval_s
+                self._record(pending)
+
+    def _record(self, ev: BlockingEvent) -> None:
+        self.events.append(ev)
+        metrics = metrics_registry()
+        metrics.counter("muonry_loop_blocked_total", "Event-loop blocking episodes", tool=ev.tool).inc()
+        metrics.histogram("muonry_loop_block_seconds", "Event-loop blocking duration", tool=ev.tool).observe(ev.duration_s)
+        logger.debug(ev.format())
+
+    def _watch(self) -> None:
+        poll = min(self.interval_s, self.threshold_s / 2)
+        while not self._stop.wait(poll):
+            with self._lock:
+                beat, epoch = self._last_beat, self._epoch
+                overdue = time.perf_counter() - beat - self.interval_s
+                if self._paused or overdue < self.threshold_s or self._pending_beat == beat:
+                    continue
+                self._pending_beat = beat
+            ev = self._capture()
+            if ev is not None:
+                with self._lock:
+                    if self._paused or epoch != self._epoch:  # a prompt wait began meanwhile
+                        continue
+                    if self._last_beat == beat:  # still blocked; heartbeat will finalize
+                        self._pending = ev
+                        continue
+                ev.duration_s = overdue + self.interval_s
+                self._record(ev)
+
+    def _capture(self) -> Optional[BlockingEvent]:
+        frame = sys._current_frames().get(self._loop_thread or -1)
+        if frame is None:
+            return None
+        tool = attribute_stack(frame)
+        if tool is None:
+            tool = self._task_name() or "unknown"
+        stack = traceback.format_stack(frame)[-25:]
+        return BlockingEvent(tool=tool, started_at=time.time(), duration_s=0.0, stack=stack)
+
+    def _task_name(self) -> Optional[str]:
+        try:
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            return None
+        if task is None:
+            return None
+        name = task.get_name()
+        return name[len("tool:"):] if name.startswith("tool:") else name
+
+    def report(self, n: int = 5) -> str:
+        if not self.events:
+            return "No event-loop blocking detected."
+        recent = list(self.events)[-n:]
+        return "\n".join(ev.format() for ev in recent)
+
+
+def loopwatch_from_env() -> Optional[LoopWatchdog]:
+    if str(os.getenv("MUONRY_LOOPWATCH", "")).strip().lower() not in _TRUTHY:
+        return None
+    try:
+        threshold_s = float(os.getenv("MUONRY_LOOPWATCH_MS", "100")) / 1000.0
+    except Exception:
+        threshold_s = 0.1
+    return LoopWatchdog(interval_s=min(0.05, threshold_s / 2), threshold_s=threshold_s)
@@ -0,0 +1,307 @@
+"""
+In-process metrics registry: counters, gauges and HDR-style latency histograms.
+
+Fed by the assistant loop, `ParallelToolExecutor`, `run_shell` and the LLM
+client paths; surfaced by the `/stats` command and, when
+`MUONRY_METRICS_FILE` is set, dumped in Prometheus text format on exit.
+
+Histograms use log-linear buckets (16 linear sub-buckets per power of two over
+microseconds), so p50/p95/p99 are accurate to ~6% at any scale with a small,
+bounded number of buckets and O(1) recording.
+"""
+from __future__ import annotations
+
+import atexit
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_SUB_BUCKETS = 16
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Gauge:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, v: float) -> None:
+        self.value = float(v)
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+    def dec(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value -= n
+
+
+class Histogram:
+    """Log-linear bucketed histogram of non-negative values (seconds)."""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(us: int) -> int:
+        if us < _SUB_BUCKETS:
+            return us
+        exp = us.bit_length() - 5  # keep 4 significant bits below the leading one
+        return (exp + 1) * _SUB_BUCKETS + ((us >> exp) - _SUB_BUCKETS)
+
+    @staticmethod
+    def _upper(index: int) -> float:
+        """Upper bound (seconds) of a bucket."""
+        if index < _SUB_BUCKETS:
+            return (index + 1) / 1e6
+        exp = index // _SUB_BUCKETS - 1
+        sub = index % _SUB_BUCKETS + _SUB_BUCKETS
+        return ((sub + 1) << exp) / 1e6
+
+    def observe(self, seconds: float) -> None:
+        v = max(0.0, float(seconds))
+        idx = self._index(int(v * 1e6))
+        with self._lock:
+            self.buckets[idx] = self.buckets.get(idx, 0) + 1
+            self.count += 1
+            self.sum += v
+            if v < self.min:
+                self.min = v
+            if v > self.max:
+                self.max = v
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for idx in sorted(self.buckets):
+                seen += self.buckets[idx]
+                if seen >= rank:
+                    return min(self.max, max(self.min, self._upper(idx)))
+            return self.max
+
+
+class MetricsRegistry:
+    """Get-or-create store of labelled metrics."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[LabelKey, Counter]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, Gauge]] = {}
+        self._hists: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _get(self, store: Dict[str, Dict[LabelKey, Any]], cls: type, name: str, help: str, labels: Dict[str, Any]) -> Any:
+        key = _labels(labels)
+        series = store.get(name)
+        if series is not None:
+            m = series.get(key)
+            if m is not None:
+                return m
+        with self._lock:
+            series = store.setdefault(name, {})
+            m = series.get(key)
+            if m is None:
+                m = series[key] = cls()
+            if help and name not in self._help:
+                self._help[name] = help
+            return m
+
+    def counter(self, name: str, help: str = "", **labels: Any) -> Counter:
+        return self._get(self._counters, Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", **labels: Any) -> Gauge:
+        return self._get(self._gauges, Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", **labels: Any) -> Histogram:
+        return self._get(self._hists, Histogram, name, help, labels)
+
+    @contextmanager
+    def timer(self, name: str, help: str = "", **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, help, **labels).observe(time.perf_counter() - t0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._hists.clear()
+            self.started_at = time.time()
+
+    # --- Read side ---
+    def counter_total(self, name: str, **match: Any) -> float:
+        want = {k: str(v) for k, v in match.items()}
+        return sum(
+            c.value for key, c in self._counters.get(name, {}).items()
+            if all(dict(key).get(k) == v for k, v in want.items())
+        )
+
+    def histograms(self, name: str) -> Dict[LabelKey, Histogram]:
+        return dict(self._hists.get(name, {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        def fmt(key: LabelKey) -> str:
+            return ",".join(f"{k}={v}" for k, v in key)
+
+        return {
+            "uptime_s": round(time.time() - self.started_at, 3),
+            "counters": {n: {fmt(k): c.value for k, c in s.items()} for n, s in self._counters.items()},
+            "gauges": {n: {fmt(k): g.value for k, g in s.items()} for n, s in self._gauges.items()},
+            "histograms": {
+                n: {
+                    fmt(k): {
+                        "count": h.count,
+                        "sum_s": round(h.sum, 6),
+                        **{f"p{int(q * 100)}_s": round(h.quantile(q), 6) for q in QUANTILES},
+                    }
+                    for k, h in s.items()
+                }
+                for n, s in self._hists.items()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (histograms as summaries)."""
+        out: List[str] = []
+
+        def lbl(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(key) + ([extra] if extra else [])
+            if not items:
+                return ""
+            body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+            return "{" + body + "}"
+
+        for name, series in sorted(self._counters.items()):
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} counter")
+            out.extend(f"{name}{lbl(k)} {c.value:g}" for k, c in series.items())
+        for name, series in sorted(self._gauges.items()):
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} gauge")
+            out.extend(f"{name}{lbl(k)} {g.value:g}" for k, g in series.items())
+        for name, series in sorted(self._hists.items()):
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} summary")
+            for k, h in series.items():
+                for q in QUANTILES:
+                    out.append(f"{name}{lbl(k, ('quantile', str(q)))} {h.quantile(q):.6f}")
+                out.append(f"{name}_sum{lbl(k)} {h.sum:.6f}")
+                out.append(f"{name}_count{lbl(k)} {h.count}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_REGISTRY: Optional[MetricsRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _dump_on_exit(registry: MetricsRegistry, path: str) -> None:
+    try:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(registry.to_prometheus(), encoding="utf-8")
+    except Exception:
+        pass
+
+
+def registry() -> MetricsRegistry:
+    """Process-wide registry; registers the Prometheus dump when MUONRY_METRICS_FILE is set."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = MetricsRegistry()
+                path = os.getenv("MUONRY_METRICS_FILE")
+                if path:
+                    atexit.register(_dump_on_exit, _REGISTRY, path)
+    return _REGISTRY
+
+
+def format_stats(reg: Optional[MetricsRegistry] = None) -> str:
+    """Human-readable session summary used by `/stats`."""
+    reg = reg or registry()
+    lines: List[str] = []
+    llm = reg.histograms("muonry_llm_latency_seconds")
+    tools = reg.histograms("muonry_tool_latency_seconds")
+    model_s = sum(h.sum for h in llm.values())
+    tool_s = sum(h.sum for h in tools.values())
+    shell_s = sum(h.sum for h in reg.histograms("muonry_shell_seconds").values())
+    lines.append(f"Session {time.time() - reg.started_at:.0f}s: waiting on models {model_s:.2f}s, tools {tool_s:.2f}s (shell {shell_s:.2f}s)")
+
+    def table(title: str, hists: Dict[LabelKey, Histogram], label: str) -> None:
+        if not hists:
+            return
+        lines.append(title)
+        rows = sorted(hists.items(), key=lambda kv: -kv[1].sum)
+        for key, h in rows:
+            name = dict(key).get(label, "-")
+            lines.append(
+                f"  {name:<36} n={h.count:<5} p50={h.quantile(0.5) * 1e3:8.1f}ms "
+                f"p95={h.quantile(0.95) * 1e3:8.1f}ms p99={h.quantile(0.99) * 1e3:8.1f}ms total={h.sum:.2f}s"
+            )
+
+    table("Per model:", llm, "model")
+    table("Per tool:", tools, "tool")
+
+    reqs = reg.counter_total("muonry_llm_requests_total")
+    if reqs:
+        errors = reg.counter_total("muonry_llm_requests_total", outcome="error")
+        rl = reg.counter_total("muonry_llm_rate_limits_total")
+        fb = reg.counter_total("muonry_llm_fallbacks_total")
+        lines.append(f"LLM requests: {reqs:.0f} (errors {errors:.0f}, rate limits {rl:.0f}, fallback retries {fb:.0f})")
+    prompt = reg.counter_total("muonry_prompt_tokens_total")
+    if prompt:
+        cached = reg.counter_total("muonry_prompt_cached_tokens_total")
+        lines.append(f"Prompt cache: {cached:.0f}/{prompt:.0f} tokens ({cached / prompt:.0%})")
+    hits = reg.counter_total("muonry_llm_cache_total", result="hit")
+    misses = reg.counter_total("muonry_llm_cache_total", result="miss")
+    if hits or misses:
+        lines.append(f"Completion cache: {hits:.0f} hits / {misses:.0f} misses")
+    lag = reg.histograms("muonry_loop_lag_seconds")
+    if lag:
+        h = next(iter(lag.values()))
+        lines.append(f"Event-loop lag: p50={h.quantile(0.5) * 1e3:.1f}ms p99={h.quantile(0.99) * 1e3:.1f}ms max={h.max * 1e3:.1f}ms")
+    table("Loop blocked by:", reg.histograms("muonry_loop_block_seconds"), "tool")
+    calls = reg.counter_total("muonry_tool_calls_total")
+    if calls:
+        failed = calls - reg.counter_total("muonry_tool_calls_total", state="done")
+        lines.append(f"Tool calls: {calls:.0f} (failed/rejected {failed:.0f})")
+    return "\n".join(lines)
@@ -0,0 +1,288 @@
+"""
+On-disk plan library keyed by task fingerprint and MinHash similarity.
+
+`planner_tool` and `TaskOrchestrator` call a large thinking model for every
+plan, so re-running the same (or nearly the same) task pays the full planning
+latency again. With `MUONRY_PLAN_CACHE=on`:
+
+- every successful plan is stored under `MUONRY_PLAN_CACHE_DIR` (default
+  `.muonry/cache/plans`) together with its task text, a fingerprint of the
+  normalized text (lowercased, punctuation and extra whitespace removed) and
+  a 64-value MinHash signature of its word 1-2-grams;
+- a lookup first tries the exact fingerprint, then the candidates sharing an
+  LSH band (16 bands x 4 rows) and accepts the best one whose estimated
+  Jaccard similarity is at least `MUONRY_PLAN_CACHE_THRESHOLD` (default 0.8);
+  no embeddings or network calls involved;
+- `scope` (planner vs. orchestrator, requested step count, target folder, ...)
+  partitions the library so a near match never changes the plan's shape;
+- callers return a hit immediately and, unless `MUONRY_PLAN_CACHE_REFRESH=0`,
+  re-plan in the background so the next lookup gets a fresh plan.
+
+`MUONRY_PLAN_CACHE_MAX` (default 500) bounds the number of stored plans;
+the least recently used ones are dropped first.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from muonry.metrics import registry as metrics_registry
+
+logger = logging.getLogger("muonry.plan_cache")
+
+_TRUTHY = {"1", "true", "yes", "on"}
+_FALSY = {"0", "false", "no", "off"}
+
+NUM_PERM = 64
+BANDS = 16
+_ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+_WORD = re.compile(r"[a-z0-9_./-]+")
+
+
+def _perms() -> List[Tuple[int, int]]:
+    # Fixed seeds so signatures stay comparable across processes and runs
+    out = []
+    for i in range(NUM_PERM):
+        d = hashlib.blake2b(f"muonry-minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(d[:8], "big") % (_PRIME - 1) + 1
+        b = int.from_bytes(d[8:], "big") % _PRIME
+        out.append((a, b))
+    return out
+
+
+_PERMS = _perms()
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation (paths like `src/app.py` stay whole), collapse whitespace."""
+    words = (w.strip("./-") for w in _WORD.findall(str(text).lower()))
+    return " ".join(w for w in words if w)
+
+
+def _scope_key(scope: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(scope or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def fingerprint(task: str, scope: Optional[Dict[str, Any]] = None) -> str:
+    return hashlib.sha256(f"{_scope_key(scope)}\n{normalize(task)}".encode("utf-8")).hexdigest()
+
+
+def shingles(text: str) -> Set[str]:
+    words = normalize(text).split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(text: str) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles(text)]
+    if not hashes:
+        return [_MASK] * NUM_PERM
+    return [min(((a * h + b) % _PRIME) for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _bands(scope_key: str, sig: List[int]) -> List[str]:
+    return [
+        hashlib.blake2b(f"{scope_key}|{b}|{sig[b * _ROWS:(b + 1) * _ROWS]}".encode(), digest_size=8).hexdigest()
+        for b in range(BANDS)
+    ]
+
+
+class PlanCache:
+    """Directory of cached plans with an LSH index over MinHash signatures."""
+
+    def __init__(
+        self,
+        root: Optional[os.PathLike | str] = None,
+        *,
+        enabled: Optional[bool] = None,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        refresh: Optional[bool] = None,
+    ) -> None:
+        if enabled is None:
+            enabled = str(os.getenv("MUONRY_PLAN_CACHE", "off")).strip().lower() in _TRUTHY
+        self.enabled = enabled
+        self.root = Path(root or os.getenv("MUONRY_PLAN_CACHE_DIR") or Path(".muonry") / "cache" / "plans")
+        if threshold is None:
+            try:
+                threshold = float(os.getenv("MUONRY_PLAN_CACHE_THRESHOLD", "0.8"))
+            except Exception:
+                threshold = 0.8
+        self.threshold = threshold
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv("MUONRY_PLAN_CACHE_MAX", "500"))
+            except Exception:
+                max_entries = 500
+        self.max_entries = max(1, max_entries)
+        if refresh is None:
+            refresh = str(os.getenv("MUONRY_PLAN_CACHE_REFRESH", "1")).strip().lower() not in _FALSY
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, List[str]]] = None
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    # --- index -------------------------------------------------------------
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _load_index(self) -> Dict[str, List[str]]:
+        if self._index is None:
+            index: Dict[str, List[str]] = {}
+            for p in self.root.glob("*.json"):
+                try:
+                    entry = json.loads(p.read_text(encoding="utf-8"))
+                except Exception:
+                    continue
+                for band in _bands(entry.get("scope_key", ""), entry.get("signature") or []):
+                    index.setdefault(band, []).append(p.stem)
+            self._index = index
+        return self._index
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._entry_path(key).read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    # --- API ---------------------------------------------------------------
+
+    def lookup(self, task: str, scope: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Best cached plan for `task` in `scope`: {"plan", "similarity", "task", "key"} or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            key = fingerprint(task, scope)
+            entry = self._read(key)
+            best: Optional[Tuple[float, str, Dict[str, Any]]] = (1.0, key, entry) if entry else None
+            if best is None:
+                scope_key = _scope_key(scope)
+                sig = minhash(task)
+                index = self._load_index()
+                seen: Set[str] = set()
+                for band in _bands(scope_key, sig):
+                    for cand in index.get(band, ()):
+                        if cand in seen:
+                            continue
+                        seen.add(cand)
+                        cand_entry = self._read(cand)
+                        if not cand_entry or cand_entry.get("scope_key") != scope_key:
+                            continue
+                        sim = similarity(sig, cand_entry.get("signature") or [])
+                        if sim >= self.threshold and (best is None or sim > best[0]):
+                            best = (sim, cand, cand_entry)
+        metrics_registry().counter("muonry_plan_cache_total", "Plan cache lookups", result="hit" if best else "miss").inc()
+        if best is None:
+            return None
+        sim, hit_key, hit = best
+        try:
+            os.utime(self._entry_path(hit_key), None)  # recency for eviction
+        except Exception:
+            pass
+        logger.debug(f"plan cache: hit {hit_key[:12]} similarity={sim:.2f}")
+        return {"plan": hit.get("plan"), "similarity": sim, "task": hit.get("task"), "key": hit_key}
+
+    def store(self, task: str, plan: Any, scope: Optional[Dict[str, Any]] = None) -> bool:
+        """Save a plan for `task` (replacing any plan with the same fingerprint)."""
+        if not self.enabled or not plan:
+            return False
+        scope_key = _scope_key(scope)
+        key = fingerprint(task, scope)
+        entry = {
+            "created": time.time(),
+            "task": task,
+            "scope_key": scope_key,
+            "signature": minhash(task),
+            "plan": plan,
+        }
+        try:
+            payload = json.dumps(entry, ensure_ascii=False, default=str)
+        except Exception:
+            return False
+        with self._lock:
+            p = self._entry_path(key)
+            try:
+                p.parent.mkdir(parents=True, exist_ok=True)
+                tmp = p.with_suffix(f".tmp{os.getpid()}")
+                tmp.write_text(payload, encoding="utf-8")
+                os.replace(tmp, p)
+            except Exception as e:
+                logger.debug(f"plan cache: write failed: {e}")
+                return False
+            if self._index is not None:
+                for band in _bands(scope_key, entry["signature"]):
+                    keys = self._index.setdefault(band, [])
+                    if key not in keys:
+                        keys.append(key)
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        files = []
+        for f in self.root.glob("*.json"):
+            try:
+                files.append((f.stat().st_mtime, f))
+            except Exception:
+                continue
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, f in files[: len(files) - self.max_entries]:
+            try:
+                f.unlink()
+            except Exception:
+                pass
+        self._index = None  # rebuilt lazily
+
+    def refresh_in_background(self, task: str, scope: Optional[Dict[str, Any]], make_plan: Callable[[], Awaitable[Any]]) -> Optional[asyncio.Task]:
+        """Re-plan `task` off the critical path and store the result (one refresh per task at a time)."""
+        if not (self.enabled and self.refresh):
+            return None
+        key = fingerprint(task, scope)
+        if key in self._refreshing:
+            return None
+        self._refreshing.add(key)
+
+        async def run() -> None:
+            try:
+                plan = await make_plan()
+                if plan:
+                    self.store(task, plan, scope)
+            except Exception as e:
+                logger.debug(f"plan cache: background refresh failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        t = asyncio.get_running_loop().create_task(run(), name="plan-cache-refresh")
+        self._tasks.add(t)  # keep a reference until done
+        t.add_done_callback(self._tasks.discard)
+        return t
+
+
+_CACHE: Optional[PlanCache] = None
+
+
+def default_plan_cache() -> PlanCache:
+    """Process-wide plan cache configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = PlanCache()
+    return _CACHE
@@ -0,0 +1,270 @@
+"""
+Opt-in sampling profiler for interactive turns.
+
+Enable with `MUONRY_PROFILE=1`. Each turn runs under a background sampler that
+snapshots every thread's Python stack (`sys._current_frames()`) every
+`MUONRY_PROFILE_INTERVAL_MS` (default 5ms). Turns slower than
+`MUONRY_PROFILE_SLOW_MS` (default 2000) are dumped to `MUONRY_PROFILE_DIR`
+(default `.muonry/profiles`) as:
+
+- `MUONRY_PROFILE_FORMAT=collapsed` (default): folded stacks, one
+  `thread;outer;...;leaf count` per line (flamegraph.pl, speedscope, inferno);
+- `MUONRY_PROFILE_FORMAT=speedscope`: speedscope JSON.
+
+A short report of the top self-time functions is printed for dumped turns.
+Sampling touches only frame objects, so overhead stays low and fast turns cost
+nothing beyond the sampler thread.
+
+Idle samples are dropped so parked threads do not drown out the hot spots:
+any sample whose leaf is a known waiting frame (the event loop's selector,
+`threading` waits, queue and executor workers, socket / pipe reads), and
+samples of other threads that barely used CPU since their previous sample
+(per thread CPU clocks, where the platform has them; a thread's first sample
+has no baseline and is dropped too). The thread running the turn is always
+sampled, so blocking calls on the event loop still show up. The number of
+dropped samples is reported as `idle`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def _frame_key(frame: Any) -> Frame:
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+
+def _frame_label(f: Frame) -> str:
+    return f"{f[0]} ({os.path.basename(f[1])}:{f[2]})"
+
+
+# (function, file) leaves of threads parked in a blocking wait
+_IDLE_LEAVES = {
+    ("select", "selectors.py"),
+    ("wait", "threading.py"),
+    ("_wait_for_tstate_lock", "threading.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py"),  # concurrent.futures idle worker
+    ("wait", "connection.py"),  # multiprocessing
+    ("_recv", "connection.py"),
+    ("accept", "socket.py"),
+    ("readinto", "socket.py"),
+}
+
+
+# Other threads count as busy only if they spent at least this share of the
+# wall time since their previous sample on CPU; a brief wake-up does not.
+_BUSY_SHARE = 0.1
+
+
+def _is_idle_leaf(frame: Any) -> bool:
+    code = frame.f_code
+    return (code.co_name, os.path.basename(code.co_filename)) in _IDLE_LEAVES
+
+
+def _thread_cpu(tid: int) -> Optional[float]:
+    """CPU seconds used by thread `tid`, or None where per-thread clocks are unavailable."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(tid))
+    except (AttributeError, OSError, OverflowError, ValueError):
+        return None
+
+
+@dataclass
+class ProfileResult:
+    label: str
+    duration_s: float
+    interval_s: float
+    stacks: Counter = field(default_factory=Counter)  # tuple(Frame...) root-first -> samples
+    idle: int = 0  # samples dropped as idle
+    path: Optional[Path] = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def top_self(self, n: int = 10) -> List[Tuple[str, int, float]]:
+        """(function, samples, share) ranked by self time (leaf frames)."""
+        leaf: Counter = Counter()
+        for stack, count in self.stacks.items():
+            if len(stack) > 1:  # first element is the thread marker
+                leaf[stack[-1]] += count
+        total = self.samples or 1
+        return [(_frame_label(f), c, c / total) for f, c in leaf.most_common(n)]
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, count in self.stacks.items():
+            names = [stack[0][0]] + [_frame_label(f) for f in stack[1:]]
+            lines.append(";".join(s.replace(";", ":") for s in names) + f" {count}")
+        return "\n".join(sorted(lines)) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.stacks.items():
+            ids = []
+            for f in stack:
+                if f not in index:
+                    index[f] = len(frames)
+                    frames.append({"name": f[0] if not f[1] else _frame_label(f), "file": f[1], "line": f[2]})
+                ids.append(index[f])
+            samples.append(ids)
+            weights.append(count * self.interval_s * 1000.0)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.label,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": self.label,
+            "exporter": "muonry.profiler",
+        }
+
+    def report(self, n: int = 10) -> str:
+        lines = [f"🐢 Slow turn '{self.label}': {self.duration_s * 1000:.0f}ms, {self.samples} samples ({self.idle} idle dropped)"]
+        if self.path:
+            lines.append(f"   profile: {self.path}")
+        for name, count, share in self.top_self(n):
+            lines.append(f"   {share:6.1%} {count:6d}  {name}")
+        return "\n".join(lines)
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval_s: float, result: ProfileResult, max_depth: int, target: int) -> None:
+        super().__init__(name="muonry-profiler", daemon=True)
+        self.interval_s = interval_s
+        self.result = result
+        self.stacks = result.stacks
+        self.max_depth = max_depth
+        self.target = target  # the turn's own thread: never dropped for lack of CPU
+        self._cpu: Dict[int, Tuple[float, float]] = {}  # tid -> (cpu seconds, wall clock) at last sample
+        self._stop_evt = threading.Event()
+
+    def _idle(self, tid: int, frame: Any) -> bool:
+        if _is_idle_leaf(frame):
+            return True
+        if tid == self.target:
+            return False
+        cpu = _thread_cpu(tid)
+        if cpu is None:
+            return False
+        now = time.perf_counter()
+        prev, self._cpu[tid] = self._cpu.get(tid), (cpu, now)
+        if prev is None:
+            return True  # no baseline yet: busy only once a CPU delta is measured
+        return cpu - prev[0] < _BUSY_SHARE * (now - prev[1])
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop_evt.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if self._idle(tid, frame):
+                    self.result.idle += 1
+                    continue
+                stack: List[Frame] = []
+                f = frame
+                while f is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_key(f))
+                    f = f.f_back
+                stack.append((f"thread:{names.get(tid, tid)}", "", 0))
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        self.join(timeout=1.0)
+
+
+class TurnProfiler:
+    """Samples each profiled turn; dumps the slow ones."""
+
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.005,
+        threshold_s: float = 2.0,
+        out_dir: os.PathLike | str = Path(".muonry") / "profiles",
+        fmt: str = "collapsed",
+        max_depth: int = 128,
+    ) -> None:
+        self.interval_s = max(0.001, interval_s)
+        self.threshold_s = max(0.0, threshold_s)
+        self.out_dir = Path(out_dir)
+        self.fmt = "speedscope" if fmt == "speedscope" else "collapsed"
+        self.max_depth = max_depth
+        self.turns = 0
+        self.last: Optional[ProfileResult] = None
+
+    @contextmanager
+    def profile(self, label: Optional[str] = None) -> Iterator[ProfileResult]:
+        self.turns += 1
+        result = ProfileResult(label=label or f"turn-{self.turns}", duration_s=0.0, interval_s=self.interval_s)
+        sampler = _Sampler(self.interval_s, result, self.max_depth, threading.get_ident())
+        t0 = time.perf_counter()
+        sampler.start()
+        try:
+            yield result
+        finally:
+            sampler.stop()
+            result.duration_s = time.perf_counter() - t0
+            self.last = result
+            if result.duration_s >= self.threshold_s and result.samples:
+                result.path = self.dump(result)
+
+    def dump(self, result: ProfileResult) -> Optional[Path]:
+        ext = "speedscope.json" if self.fmt == "speedscope" else "collapsed.txt"
+        path = self.out_dir / f"{result.label}-{int(time.time())}.{ext}"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.fmt == "speedscope":
+                path.write_text(json.dumps(result.speedscope()), encoding="utf-8")
+            else:
+                path.write_text(result.collapsed(), encoding="utf-8")
+        except Exception:
+            return None
+        return path
+
+
+def profiler_from_env() -> Optional[TurnProfiler]:
+    """TurnProfiler configured from MUONRY_PROFILE_* or None when disabled."""
+    if str(os.getenv("MUONRY_PROFILE", "")).strip().lower() not in _TRUTHY:
+        return None
+    try:
+        interval_s = float(os.getenv("MUONRY_PROFILE_INTERVAL_MS", "5")) / 1000.0
+    except Exception:
+        interval_s = 0.005
+    try:
+        threshold_s = float(os.getenv("MUONRY_PROFILE_SLOW_MS", "2000")) / 1000.0
+    except Exception:
+        threshold_s = 2.0
+    return TurnProfiler(
+        interval_s=interval_s,
+        threshold_s=threshold_s,
+        out_dir=os.getenv("MUONRY_PROFILE_DIR") or Path(".muonry") / "profiles",
+        fmt=str(os.getenv("MUONRY_PROFILE_FORMAT", "collapsed")).strip().lower(),
+    )
@@ -0,0 +1,160 @@
+"""
+Prefix-cache friendly message layout.
+
+Providers that support prompt-prefix caching (Groq, OpenAI-compatible APIs,
+...) only reuse work for a byte-identical leading run of the request. The
+layout therefore keeps:
+
+1. a stable prefix: the system prompt (tool schemas are registered once, in a
+   fixed order, so the provider-side tool block is stable as well);
+2. one volatile context message right after it (OS, datetime, ...), fixed for
+   the lifetime of the session;
+3. an append-only window of conversation messages.
+
+When the window exceeds its budget it is compacted in one large step (down to
+`compact_ratio` of the budget) instead of sliding by one message per turn, so
+the cached prefix survives many turns between compactions.
+
+`record_usage()` reads cache-hit token counts from provider responses
+(`usage.prompt_tokens_details.cached_tokens` or `cache_read_input_tokens`).
+
+An optional `journal` (see muonry.journal) receives every appended message
+and each compaction, so a session can be resumed from disk.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _msg_chars(msg: Dict[str, Any]) -> int:
+    return len(str(msg.get("content", "") or ""))
+
+
+def extract_cache_usage(resp: Any) -> Tuple[int, int]:
+    """Return (prompt_tokens, cached_prompt_tokens) from a completion response.
+
+    Looks at `resp["usage"]` and `resp["raw_response"]["usage"]`; missing
+    fields count as 0.
+    """
+    if not isinstance(resp, dict):
+        return 0, 0
+    usage: Any = resp.get("usage")
+    if not isinstance(usage, dict):
+        raw = resp.get("raw_response")
+        usage = raw.get("usage") if isinstance(raw, dict) else None
+    if not isinstance(usage, dict):
+        return 0, 0
+    prompt = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+    details = usage.get("prompt_tokens_details") or {}
+    cached = (
+        (details.get("cached_tokens") if isinstance(details, dict) else None)
+        or usage.get("cache_read_input_tokens")
+        or usage.get("cached_tokens")
+        or 0
+    )
+    try:
+        return int(prompt), int(cached)
+    except Exception:
+        return 0, 0
+
+
+class MessageLayout:
+    """Owns the message list sent to the model for one session."""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        *,
+        volatile: Optional[str] = None,
+        max_chars: int = 120000,
+        max_messages: Optional[int] = None,
+        compact_ratio: float = 0.5,
+        journal: Optional[Any] = None,
+    ) -> None:
+        self._prefix: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
+        if volatile:
+            self._prefix.append({"role": "system", "content": volatile})
+        self._window: List[Dict[str, Any]] = []
+        self._window_chars = 0
+        self.max_chars = max(1000, int(max_chars))
+        self.max_messages = max_messages if (max_messages is None or max_messages > 1) else 2
+        self.compact_ratio = min(0.9, max(0.1, float(compact_ratio)))
+        self.compactions = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.journal = journal
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Conversation messages currently in the window (excludes the prefix)."""
+        return list(self._window)
+
+    def append(self, msg: Dict[str, Any]) -> None:
+        self._window.append(msg)
+        self._window_chars += _msg_chars(msg)
+        if self.journal is not None:
+            self.journal.record(msg)
+        if self._over_budget():
+            self._compact()
+
+    def restore(self, msgs: List[Dict[str, Any]]) -> None:
+        """Seed the window with previously journaled messages (not re-journaled)."""
+        self._window = list(msgs)
+        self._window_chars = sum(_msg_chars(m) for m in self._window)
+        if self._over_budget():
+            self._compact()
+
+    def extend(self, msgs: List[Dict[str, Any]]) -> None:
+        for m in msgs:
+            self.append(m)
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Full request: stable prefix followed by the append-only window."""
+        return self._prefix + self._window
+
+    def record_usage(self, resp: Any) -> Tuple[int, int]:
+        prompt, cached = extract_cache_usage(resp)
+        self.requests += 1
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        return prompt, cached
+
+    def stats(self) -> Dict[str, Any]:
+        hit_rate = (self.cached_tokens / self.prompt_tokens) if self.prompt_tokens else 0.0
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_hit_rate": round(hit_rate, 3),
+            "window_messages": len(self._window),
+            "window_chars": self._window_chars,
+            "compactions": self.compactions,
+        }
+
+    def _over_budget(self) -> bool:
+        if self._window_chars > self.max_chars:
+            return True
+        return self.max_messages is not None and len(self._window) > self.max_messages
+
+    def _compact(self) -> None:
+        """Drop the oldest messages in one step, down to compact_ratio of the budget."""
+        char_target = int(self.max_chars * self.compact_ratio)
+        msg_target = int(self.max_messages * self.compact_ratio) if self.max_messages else None
+        chars = self._window_chars
+        start = 0
+        while start < len(self._window) - 1 and (
+            chars > char_target or (msg_target is not None and len(self._window) - start > msg_target)
+        ):
+            chars -= _msg_chars(self._window[start])
+            start += 1
+        # Never start the window on a dangling tool result
+        while start < len(self._window) - 1 and self._window[start].get("role") == "tool":
+            chars -= _msg_chars(self._window[start])
+            start += 1
+        if start:
+            self._window = self._window[start:]
+            self._window_chars = chars
+            self.compactions += 1
+            if self.journal is not None:
+                self.journal.compacted(len(self._window))
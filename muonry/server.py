@@ -0,0 +1,478 @@
+"""
+Long-running JSON-RPC server hosting many assistant sessions: `muonry serve`.
+
+Editors and web frontends embed Muonry by spawning one server and talking
+JSON-RPC 2.0 over stdio, one message per line (newline-delimited JSON), instead
+of starting a Python process (and re-registering tools) per user.
+
+Methods:
+
+- `initialize` -> server info and method list;
+- `session.create` {workdir?} -> {session_id};
+- `session.prompt` {session_id, prompt} -> {output, turns}; while it runs,
+  `session.event` notifications stream {session_id, event} for turn start,
+  usage, tool state changes and assistant text;
+- `session.cancel` {session_id}, `session.close` {session_id},
+  `session.list`, `server.stats`, `shutdown`;
+- `$/cancelRequest` {id} cancels any in-flight request.
+
+Sessions share the pooled LLM clients and their registered tool set, run
+concurrently in one event loop, and each turn executes under the session's
+workdir (`tools.workspace`). Memory is bounded: each session's message window
+is capped at `MUONRY_SERVER_SESSION_CHARS` (default 60000), at most
+`MUONRY_SERVER_MAX_SESSIONS` (default 32) are kept with idle ones evicted
+LRU-first or after `MUONRY_SERVER_IDLE_TTL_S` (default 1800), and outgoing
+events go through a bounded queue (`MUONRY_SERVER_QUEUE`, default 1000)
+that drops events, never responses, when a client stops reading.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from muonry.metrics import registry as metrics_registry
+
+logger = logging.getLogger("muonry.server")
+
+PROTOCOL_VERSION = "1"
+
+# JSON-RPC error codes (-32000.. range is server-defined)
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SESSION_NOT_FOUND = -32001
+TOO_MANY_SESSIONS = -32002
+REQUEST_CANCELLED = -32800
+
+EventSink = Callable[[Dict[str, Any]], Awaitable[None]]
+SessionFactory = Callable[[EventSink], Awaitable[Any]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Outbox:
+    """Serialized writer with a bounded queue; events are dropped when full."""
+
+    def __init__(self, write: Callable[[bytes], Awaitable[None]], *, max_pending: int = 1000) -> None:
+        self._write = write
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+        self.dropped = 0
+        self.sent = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain(), name="muonry-server-outbox")
+
+    async def send(self, msg: Dict[str, Any]) -> None:
+        """Queue a response (waits for room)."""
+        await self._queue.put(self._encode(msg))
+
+    def post(self, msg: Dict[str, Any]) -> bool:
+        """Queue an event; returns False (and counts a drop) when the queue is full."""
+        try:
+            self._queue.put_nowait(self._encode(msg))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    @staticmethod
+    def _encode(msg: Dict[str, Any]) -> bytes:
+        return (json.dumps(msg, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+    async def _drain(self) -> None:
+        while True:
+            data = await self._queue.get()
+            try:
+                await self._write(data)
+                self.sent += 1
+            except Exception as e:
+                logger.debug(f"server: write failed: {e}")
+
+    async def close(self) -> None:
+        """Flush queued messages, then stop the writer."""
+        if self._task is None:
+            return
+        while not self._queue.empty() and not self._task.done():
+            await asyncio.sleep(0.005)
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+@dataclass
+class ServerSession:
+    id: str
+    assistant: Any
+    workdir: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    turns: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    running: Optional[asyncio.Task] = None
+    closed: bool = False
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "workdir": self.workdir,
+            "turns": self.turns,
+            "busy": self.busy,
+            "created_at": self.created_at,
+            "idle_s": round(time.monotonic() - self.last_used, 3),
+        }
+
+
+async def _default_session(sink: EventSink) -> Any:
+    # Imported lazily: assistant pulls in bhumi and the full tool set
+    from assistant import MuonryAssistant  # type: ignore
+
+    session = MuonryAssistant(headless=True, event_sink=sink)
+    if not await session.setup(pooled=True):
+        raise RuntimeError("assistant setup failed (is GROQ_API_KEY set?)")
+    return session
+
+
+class MuonryServer:
+    """Transport-independent JSON-RPC dispatcher over a set of sessions."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        *,
+        session_factory: Optional[SessionFactory] = None,
+        max_sessions: Optional[int] = None,
+        idle_ttl_s: Optional[float] = None,
+        session_chars: Optional[int] = None,
+    ) -> None:
+        self.outbox = outbox
+        self._factory = session_factory or _default_session
+        self.max_sessions = max(1, max_sessions or _env_int("MUONRY_SERVER_MAX_SESSIONS", 32))
+        self.idle_ttl_s = idle_ttl_s if idle_ttl_s is not None else float(_env_int("MUONRY_SERVER_IDLE_TTL_S", 1800))
+        self.session_chars = max(4000, session_chars or _env_int("MUONRY_SERVER_SESSION_CHARS", 60000))
+        self.sessions: "OrderedDict[str, ServerSession]" = OrderedDict()
+        self._creating = 0  # slots reserved by session.create calls awaiting their factory
+        self._inflight: Dict[Any, asyncio.Task] = {}
+        self.stopped = asyncio.Event()
+        self._methods: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            "initialize": self._initialize,
+            "session.create": self._session_create,
+            "session.prompt": self._session_prompt,
+            "session.cancel": self._session_cancel,
+            "session.close": self._session_close,
+            "session.list": self._session_list,
+            "server.stats": self._server_stats,
+            "shutdown": self._shutdown,
+        }
+
+    # --- Dispatch ---
+    async def handle_line(self, line: str | bytes) -> None:
+        """Parse one incoming line and dispatch it (requests run as tasks)."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line.strip():
+            return
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError as e:
+            await self.outbox.send(_error(None, PARSE_ERROR, f"Parse error: {e}"))
+            return
+        await self.handle(msg)
+
+    async def handle(self, msg: Any) -> None:
+        if not isinstance(msg, dict) or msg.get("jsonrpc") != "2.0" or not isinstance(msg.get("method"), str):
+            rid = msg.get("id") if isinstance(msg, dict) else None
+            await self.outbox.send(_error(rid, INVALID_REQUEST, "Invalid request"))
+            return
+        method = msg["method"]
+        rid = msg.get("id")
+        params = msg.get("params") or {}
+        if method == "$/cancelRequest":
+            task = self._inflight.get((params or {}).get("id"))
+            if task is not None:
+                task.cancel()
+            return
+        task = asyncio.get_running_loop().create_task(self._run(rid, method, params), name=f"rpc:{method}")
+        if rid is not None:
+            self._inflight[rid] = task
+            task.add_done_callback(lambda _t, rid=rid: self._inflight.pop(rid, None))
+
+    async def _run(self, rid: Any, method: str, params: Any) -> None:
+        metrics = metrics_registry()
+        t0 = time.perf_counter()
+        fn = self._methods.get(method)
+        try:
+            if fn is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            result = await fn(params)
+            reply = {"jsonrpc": "2.0", "id": rid, "result": result}
+            outcome = "ok"
+        except RpcError as e:
+            reply = _error(rid, e.code, e.message)
+            outcome = "error"
+        except asyncio.CancelledError:
+            reply = _error(rid, REQUEST_CANCELLED, "Request cancelled")
+            outcome = "cancelled"
+        except Exception as e:
+            logger.debug(f"server: {method} failed: {e}")
+            reply = _error(rid, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+            outcome = "error"
+        metrics.counter("muonry_server_requests_total", "Server requests", method=method, outcome=outcome).inc()
+        metrics.histogram("muonry_server_request_seconds", "Server request latency", method=method).observe(time.perf_counter() - t0)
+        if rid is not None:
+            await self.outbox.send(reply)
+        if method == "shutdown" and outcome == "ok":
+            self.stopped.set()  # after the reply is queued
+
+    # --- Sessions ---
+    def _get(self, params: Dict[str, Any]) -> ServerSession:
+        sid = params.get("session_id")
+        session = self.sessions.get(sid) if isinstance(sid, str) else None
+        if session is None:
+            raise RpcError(SESSION_NOT_FOUND, f"Unknown session: {sid}")
+        self.sessions.move_to_end(session.id)
+        return session
+
+    def reap(self) -> int:
+        """Close sessions idle longer than idle_ttl_s; returns how many."""
+        if not self.idle_ttl_s or self.idle_ttl_s <= 0:
+            return 0
+        now = time.monotonic()
+        stale = [s.id for s in self.sessions.values() if not s.busy and now - s.last_used > self.idle_ttl_s]
+        for sid in stale:
+            self._discard(sid)
+        return len(stale)
+
+    def _discard(self, sid: str) -> None:
+        session = self.sessions.pop(sid, None)
+        if session is None:
+            return
+        session.closed = True  # prompts still queued on its lock must not run
+        release = getattr(session.assistant, "release_client", None)
+        if callable(release):
+            release()  # hand the pooled client lease back
+
+    def _make_room(self) -> None:
+        self.reap()
+        while len(self.sessions) + self._creating >= self.max_sessions:
+            victim = next((s for s in self.sessions.values() if not s.busy), None)
+            if victim is None:
+                raise RpcError(TOO_MANY_SESSIONS, f"All {self.max_sessions} sessions are busy or being created")
+            self._discard(victim.id)
+            metrics_registry().counter("muonry_server_evictions_total", "Idle sessions evicted to make room").inc()
+
+    def _sink(self, sid: str) -> EventSink:
+        async def sink(event: Dict[str, Any]) -> None:
+            self.outbox.post({"jsonrpc": "2.0", "method": "session.event", "params": {"session_id": sid, "event": event}})
+        return sink
+
+    # --- Methods ---
+    async def _initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        from muonry import __version__
+
+        return {
+            "server": "muonry",
+            "version": __version__,
+            "protocol": PROTOCOL_VERSION,
+            "methods": sorted(self._methods) + ["$/cancelRequest"],
+            "limits": {"max_sessions": self.max_sessions, "session_chars": self.session_chars, "idle_ttl_s": self.idle_ttl_s},
+        }
+
+    async def _session_create(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        workdir = params.get("workdir")
+        if workdir is not None:
+            if not isinstance(workdir, str) or not os.path.isdir(workdir):
+                raise RpcError(INVALID_PARAMS, f"workdir is not a directory: {workdir}")
+            workdir = os.path.abspath(workdir)
+        self._make_room()
+        self._creating += 1  # reserve the slot before awaiting, so concurrent creates see it
+        try:
+            sid = uuid.uuid4().hex[:12]
+            assistant = await self._factory(self._sink(sid))
+            new_layout = getattr(assistant, "new_layout", None)
+            if callable(new_layout):
+                new_layout(self.session_chars)
+            self.sessions[sid] = ServerSession(id=sid, assistant=assistant, workdir=workdir)
+        finally:
+            self._creating -= 1
+        return {"session_id": sid}
+
+    async def _session_prompt(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = params.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise RpcError(INVALID_PARAMS, "prompt must be a non-empty string")
+        session = self._get(params)
+        async with session.lock:  # one turn at a time per session; others queue
+            if session.closed:  # closed or evicted while this prompt was queued
+                raise RpcError(SESSION_NOT_FOUND, f"Unknown session: {session.id}")
+            from tools.workspace import use_workdir
+
+            session.running = asyncio.current_task()
+            try:
+                with use_workdir(session.workdir) if session.workdir else nullcontext():
+                    output = await session.assistant.turn(prompt)
+            finally:
+                session.running = None
+                session.last_used = time.monotonic()
+            session.turns += 1
+        return {"output": output, "turns": session.turns}
+
+    async def _session_cancel(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        session = self._get(params)
+        task = session.running
+        if task is not None and not task.done():
+            task.cancel()
+            return {"cancelled": True}
+        return {"cancelled": False}
+
+    async def _session_close(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        session = self._get(params)
+        if session.running is not None:
+            session.running.cancel()
+        self._discard(session.id)
+        return {"closed": True}
+
+    async def _session_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"sessions": [s.info() for s in self.sessions.values()]}
+
+    async def _server_stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "sessions": len(self.sessions),
+            "busy": sum(1 for s in self.sessions.values() if s.busy),
+            "inflight": len(self._inflight),
+            "events_sent": self.outbox.sent,
+            "events_dropped": self.outbox.dropped,
+            "metrics": metrics_registry().snapshot(),
+        }
+        try:
+            from muonry.client_pool import default_pool
+
+            stats["client_pool"] = default_pool().stats()
+        except Exception:
+            pass
+        return stats
+
+    async def _shutdown(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True}
+
+    async def close(self) -> None:
+        """Cancel in-flight requests (each still answers) and drop all sessions."""
+        tasks = [t for t in self._inflight.values() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for sid in list(self.sessions):
+            self._discard(sid)
+
+
+def _error(rid: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": rid, "error": {"code": code, "message": message}}
+
+
+def _stdin_reader(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+    # Blocking readline in a daemon thread: never holds up interpreter exit
+    stream = sys.stdin.buffer
+    while True:
+        line = stream.readline()
+        loop.call_soon_threadsafe(queue.put_nowait, line)
+        if not line:
+            return
+
+
+async def serve_stdio(**server_kwargs: Any) -> int:
+    """Serve JSON-RPC on stdin/stdout until EOF or `shutdown`."""
+    loop = asyncio.get_running_loop()
+    # Tools print progress to stdout; move fd 1 to stderr and keep a private
+    # copy of the original stdout for protocol messages only.
+    sys.stdout.flush()
+    proto_fd = os.dup(1)
+    os.dup2(2, 1)
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="muonry-server-write")
+
+    def _write_all(data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            n = os.write(proto_fd, view)
+            view = view[n:]
+
+    async def write(data: bytes) -> None:
+        await loop.run_in_executor(writer, _write_all, data)
+
+    outbox = Outbox(write, max_pending=_env_int("MUONRY_SERVER_QUEUE", 1000))
+    outbox.start()
+    server = MuonryServer(outbox, **server_kwargs)
+    lines: asyncio.Queue = asyncio.Queue()
+    threading.Thread(target=_stdin_reader, args=(loop, lines), name="muonry-server-read", daemon=True).start()
+    print("🛰️  muonry server ready (JSON-RPC over stdio)", file=sys.stderr)
+    stop = loop.create_task(server.stopped.wait())
+    try:
+        while not server.stopped.is_set():
+            get = loop.create_task(lines.get())
+            done, _ = await asyncio.wait({get, stop}, return_when=asyncio.FIRST_COMPLETED)
+            if get not in done:
+                get.cancel()
+                break
+            line = get.result()
+            if not line:
+                break
+            await server.handle_line(line)
+    finally:
+        stop.cancel()
+        await server.close()
+        await outbox.close()
+        writer.shutdown(wait=True)
+        os.close(proto_fd)
+    return 0
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="muonry serve", description="Serve Muonry sessions over JSON-RPC (stdio).")
+    p.add_argument("--max-sessions", type=int, help="sessions kept at once (default 32)")
+    p.add_argument("--idle-ttl", type=float, help="close sessions idle this many seconds (default 1800, 0 = never)")
+    p.add_argument("--session-chars", type=int, help="per-session message window budget in characters (default 60000)")
+    return p.parse_args(argv)
+
+
+async def main_serve(argv: Optional[List[str]] = None) -> int:
+    """`muonry serve` entry point."""
+    args = _parse_args(argv)
+    return await serve_stdio(
+        max_sessions=args.max_sessions,
+        idle_ttl_s=args.idle_ttl,
+        session_chars=args.session_chars,
+    )
@@ -0,0 +1,343 @@
+"""
+Static JSON schemas for the assistant's tools.
+
+Defined once at import time (no per-session construction) and registered in
+this fixed order, so the provider-side tool block is byte-identical across
+sessions and stays inside the cached prompt prefix (see muonry.prompt_layout).
+`MuonryAssistant.register_tools` pairs each schema with its implementation.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class ToolSchema:
+    name: str
+    description: str
+    parameters: Dict[str, Any]
+
+
+# Patch tool (PREFERRED for file modifications)
+_APPLY_PATCH = ToolSchema(
+    name="apply_patch",
+    description=(
+        "PREFERRED for modifying existing files. Accepts Muonry patch envelope; "
+        "also auto-wraps common unified diffs (---/+++ @@)."
+    ),
+    parameters={
+        "type": "object",
+        "properties": {
+            "patch": {
+                "type": "string",
+                "description": "Patch content (Muonry patch or standard unified diff)"
+            },
+            "cwd": {
+                "type": "string",
+                "description": "Working directory for applying the patch (optional)"
+            }
+        },
+        "required": ["patch"],
+        "additionalProperties": False
+    },
+)
+
+TOOL_SCHEMAS: Tuple[ToolSchema, ...] = (
+    _APPLY_PATCH,
+    replace(_APPLY_PATCH, name="applypatch"),  # compatibility alias without underscore
+    ToolSchema(
+        name="run_shell",
+        description="Execute a shell command",
+        parameters={
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "Shell command to execute"
+                },
+                "workdir": {
+                    "type": "string",
+                    "description": "Working directory for command (optional, default: current directory)"
+                },
+                "timeout_ms": {
+                    "type": "integer",
+                    "description": "Timeout in milliseconds (optional, default: 30000)"
+                }
+            },
+            "required": ["command"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="parallel",
+        description=(
+            "Execute multiple registered tools in parallel. Use when provider can't emit multi-tool calls natively. "
+            "Accepts an array of calls with {name, arguments, id?}."
+        ),
+        parameters={
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "description": "List of tool calls to run concurrently",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "Registered tool name"},
+                            "arguments": {"type": "object", "description": "Arguments for the tool"},
+                            "id": {"type": "string", "description": "Optional call id for tracing"},
+                            "timeout_ms": {"type": "integer", "description": "Optional per-call timeout override"}
+                        },
+                        "required": ["name", "arguments"],
+                        "additionalProperties": False
+                    }
+                },
+                "concurrency": {"type": "integer", "description": "Max parallelism (default from env)"},
+                "timeout_ms": {"type": "integer", "description": "Default per-call timeout in ms"}
+            },
+            "required": ["calls"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="smart_run_shell",
+        description="Execute a shell command, analyze failures, suggest fixes, and optionally auto-fix safe issues (e.g., install missing deps).",
+        parameters={
+            "type": "object",
+            "properties": {
+                "command": {"type": "string", "description": "Shell command to execute"},
+                "workdir": {"type": "string", "description": "Working directory (optional)"},
+                "timeout_ms": {"type": "integer", "description": "Timeout in ms (optional, default: 300000)"},
+                "auto_fix": {"type": "boolean", "description": "If true, apply safe fixes (e.g., install missing deps) and re-run"},
+                "kill_on_fatal": {"type": "boolean", "description": "Stop the command as soon as its output shows a failure with a safe fix (default: same as auto_fix)"}
+            },
+            "required": ["command"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="interactive_shell",
+        description=(
+            "Run interactive CLI commands via a pseudo-terminal. Match prompts with regex and send answers. "
+            "Useful for wizards like create-next-app, npm init, etc."
+        ),
+        parameters={
+            "type": "object",
+            "properties": {
+                "command": {"type": "string", "description": "Shell command to run (e.g., npx create-next-app@latest .)"},
+                "workdir": {"type": "string", "description": "Working directory (optional)"},
+                "timeout_ms": {"type": "integer", "description": "Overall timeout in ms (default: 600000)"},
+                "answers": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "expect": {"type": "string", "description": "Regex to match in transcript"},
+                            "send": {"type": "string", "description": "Text to send when matched (newline auto-appended)"}
+                        },
+                        "required": ["expect", "send"],
+                        "additionalProperties": False
+                    },
+                    "description": "Ordered expect/send rules"
+                },
+                "input_script": {"type": "string", "description": "Initial input to send on start (optional)"},
+                "env": {"type": "object", "description": "Extra environment variables (optional)"},
+                "transcript_limit": {"type": "integer", "description": "Max transcript bytes to retain (default: 20000)"}
+            },
+            "required": ["command"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="update_plan",
+        description="Update the development plan with new steps",
+        parameters={
+            "type": "object",
+            "properties": {
+                "steps": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of development steps"
+                },
+                "explanation": {
+                    "type": "string",
+                    "description": "Explanation of plan changes"
+                }
+            }
+        },
+    ),
+    ToolSchema(
+        name="talk",
+        description=(
+            "Use this to respond conversationally in the terminal. "
+            "Render answers, stories, explanations, brainstorming, and Q&A here. "
+            "Do not write files unless the user explicitly asks to save/create."
+        ),
+        parameters={
+            "type": "object",
+            "properties": {
+                "content": {"type": "string", "description": "Markdown content to say to the user"}
+            },
+            "required": ["content"]
+        },
+    ),
+    ToolSchema(
+        name="read_file",
+        description="Read contents of a file, optionally specifying line range",
+        parameters={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to read"
+                }
+            },
+            "required": ["file_path"]
+        },
+    ),
+    ToolSchema(
+        name="grep",
+        description="Search for patterns in files using grep",
+        parameters={
+            "type": "object",
+            "properties": {
+                "pattern": {
+                    "type": "string",
+                    "description": "Pattern to search for"
+                },
+                "file_path": {
+                    "type": "string",
+                    "description": "File or directory to search in (optional, default: current directory)"
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "Whether to search recursively (optional, default: true)"
+                },
+                "case_sensitive": {
+                    "type": "boolean",
+                    "description": "Whether search should be case sensitive (optional, default: False)"
+                }
+            },
+            "required": ["pattern"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="search_replace",
+        description="For simple text replacements in existing files. Use apply_patch for complex changes.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to modify"
+                },
+                "search_text": {
+                    "type": "string",
+                    "description": "Text to search for"
+                },
+                "replace_text": {
+                    "type": "string",
+                    "description": "Text to replace with"
+                }
+            },
+            "required": ["file_path", "search_text", "replace_text"]
+        },
+    ),
+    ToolSchema(
+        name="get_system_info",
+        description="Get system information including OS, Python version, and current directory",
+        parameters={
+            "type": "object",
+            "properties": {},
+            "required": []
+        },
+    ),
+    ToolSchema(
+        name="quick_check",
+        description="Quickly sanity-check a project or file for Python (ast.parse), Rust (cargo/rustc), or JS/TS (tsc/package.json)",
+        parameters={
+            "type": "object",
+            "properties": {
+                "kind": {"type": "string", "enum": ["python", "rust", "js"], "description": "Type of project/file to check"},
+                "target": {"type": "string", "description": "Path to file or directory (default: .)"},
+                "max_files": {"type": "integer", "description": "Max files to scan for syntax (default: 200)"},
+                "timeout_ms": {"type": "integer", "description": "Per-command timeout in ms (default: 120000)"},
+                "fail_fast": {"type": "integer", "description": "Stop Rust/JS checks after this many failures (default: 0 = check everything)"}
+            },
+            "required": ["kind"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="websearch",
+        description="Search the web via Exa. Off by default; set enabled=true and provide EXA_API_KEY env var.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Search query"},
+                "enabled": {"type": "boolean", "description": "Must be true to execute search (default: false)"}
+            },
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="write_file",
+        description="Create NEW files only. For modifying existing files, use apply_patch or search_replace instead.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the NEW file to create"
+                },
+                "content": {
+                    "type": "string",
+                    "description": "Content for the new file"
+                }
+            },
+            "required": ["file_path", "content"]
+        },
+    ),
+    ToolSchema(
+        name="deepwiki",
+        description=(
+            "Naively interact with DeepWiki repo pages via HTTPS scraping (no MCP). "
+            "Supports 'list' (pages) and 'get' (page content). Default repo: jennyzzt/dgm."
+        ),
+        parameters={
+            "type": "object",
+            "properties": {
+                "action": {"type": "string", "enum": ["list", "get"], "description": "Operation: list pages or get a page"},
+                "repo": {"type": "string", "description": "DeepWiki repo in owner/name format", "default": "jennyzzt/dgm"},
+                "path": {"type": "string", "description": "Path within the repo for 'get' (e.g., docs/overview)"},
+                "limit": {"type": "integer", "description": "Max pages to list (for action=list)", "default": 50},
+                "write_to": {"type": "string", "description": "Optional file path to save JSON or text output (preferred)"},
+                "writeto": {"type": "string", "description": "Alias for write_to (back-compat)"}
+            },
+            "required": ["action"],
+            "additionalProperties": False
+        },
+    ),
+    ToolSchema(
+        name="planner",
+        description="Break down complex tasks into steps using AI planning, grouped into waves of independent steps that run in parallel (later waves wait for earlier ones). Useful for multi-file tasks or complex projects.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "task": {
+                    "type": "string",
+                    "description": "The complex task to break down into waves of parallel steps"
+                },
+                "context": {
+                    "type": "string",
+                    "description": "Additional context about the task (optional)"
+                }
+            },
+            "required": ["task"]
+        },
+    ),
+)
+
+TOOL_NAMES: Tuple[str, ...] = tuple(s.name for s in TOOL_SCHEMAS)
@@ -0,0 +1,288 @@
+"""
+Lightweight tracing spans (OpenTelemetry-style span model, no dependencies).
+
+Enable with `MUONRY_TRACE=1` (or set `MUONRY_TRACE_FILE`). Spans are exported
+to `MUONRY_TRACE_FILE` (default `.muonry/traces/trace-<pid>-<time>.<ext>`):
+
+- `MUONRY_TRACE_FORMAT=chrome` (default): Chrome Trace Event JSON, loadable in
+  chrome://tracing, Perfetto or speedscope as a flame chart. Each asyncio task
+  gets its own track so concurrent tool calls render side by side.
+- `MUONRY_TRACE_FORMAT=jsonl`: one span per line with OTel field names
+  (trace_id, span_id, parent_span_id, start/end_time_unix_nano, attributes,
+  status).
+
+When disabled, `span()` returns a shared no-op context manager and `traced`
+wrappers cost a single attribute check per call.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger("muonry.tracing")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+    error: Optional[str] = None
+    tid: int = 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otel(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.error} if self.error else {"code": self.status},
+        }
+
+    def to_chrome(self, pid: int) -> Dict[str, Any]:
+        args = dict(self.attributes)
+        if self.error:
+            args["error"] = self.error
+        return {
+            "name": self.name,
+            "cat": self.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": self.start_ns / 1000.0,
+            "dur": ((self.end_ns or self.start_ns) - self.start_ns) / 1000.0,
+            "pid": pid,
+            "tid": self.tid,
+            "args": args,
+        }
+
+
+class _NoopSpan:
+    """Stand-in used when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("muonry_span", default=None)
+
+
+class SpanExporter:
+    """Buffered writer for finished spans."""
+
+    def __init__(self, path: os.PathLike | str, fmt: str = "chrome", *, flush_every: int = 64) -> None:
+        self.path = Path(path)
+        self.fmt = "jsonl" if fmt == "jsonl" else "chrome"
+        self.flush_every = max(1, flush_every)
+        self._buf: List[Span] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._pid = os.getpid()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._buf.append(span)
+            if len(self._buf) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        spans, self._buf = self._buf, []
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                for s in spans:
+                    if self.fmt == "jsonl":
+                        f.write(json.dumps(s.to_otel(), default=str) + "\n")
+                    else:
+                        # JSON array format; the closing bracket is optional for trace viewers
+                        f.write(("[\n" if not self._started else ",\n") + json.dumps(s.to_chrome(self._pid), default=str))
+                        self._started = True
+        except Exception as e:
+            logger.debug(f"tracing: export failed: {e}")
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None) -> None:
+        self.exporter = exporter
+        self.enabled = exporter is not None
+        self._tids: Dict[int, int] = {}
+        self._tid_lock = threading.Lock()
+
+    def _track_id(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task) if task is not None else threading.get_ident()
+        with self._tid_lock:
+            tid = self._tids.get(key)
+            if tid is None:
+                tid = len(self._tids) + 1
+                self._tids[key] = tid
+            return tid
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """Context manager for a child of the current span (no-op when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return _SpanScope(self, name, attributes)
+
+    def _start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+            tid=self._track_id(),
+        )
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+class _SpanScope:
+    __slots__ = ("_tracer", "_name", "_attrs", "_span", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, attrs: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._attrs = attrs
+
+    def __enter__(self) -> Span:
+        self._span = self._tracer._start(self._name, self._attrs)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        if exc is not None and not isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            self._span.set_error(exc)
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            _current.set(None)  # exited in a different context (e.g. a cancelled task)
+        self._tracer._finish(self._span)
+        return False
+
+
+def _tracer_from_env() -> Tracer:
+    flag = str(os.getenv("MUONRY_TRACE", "")).strip().lower()
+    path = os.getenv("MUONRY_TRACE_FILE")
+    if flag not in _TRUTHY and not path:
+        return Tracer(None)
+    fmt = str(os.getenv("MUONRY_TRACE_FORMAT", "chrome")).strip().lower()
+    if not path:
+        ext = "jsonl" if fmt == "jsonl" else "json"
+        path = str(Path(".muonry") / "traces" / f"trace-{os.getpid()}-{int(time.time())}.{ext}")
+    tracer = Tracer(SpanExporter(path, fmt))
+    atexit.register(tracer.flush)
+    return tracer
+
+
+_TRACER: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    global _TRACER
+    if _TRACER is None:
+        _TRACER = _tracer_from_env()
+    return _TRACER
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Install a tracer (None re-reads the environment on next use)."""
+    global _TRACER
+    _TRACER = tracer
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """`with span("tool.read_file", path=p): ...` on the process tracer."""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span() -> Any:
+    """The active span, or a no-op span when none is active."""
+    return _current.get() or _NOOP
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator wrapping a sync or async function in a span."""
+    def deco(fn: F) -> F:
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                tracer = get_tracer()
+                if not tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with tracer.span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
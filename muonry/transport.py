@@ -0,0 +1,232 @@
+"""
+Pluggable transport under LLM `completion()` calls.
+
+`MuonryAssistant` and `TaskOrchestrator` route every Bhumi completion through a
+transport so real sessions can be recorded and later replayed on a machine
+with no network or API keys, e.g. to benchmark the tool loop reproducibly.
+
+- `live` (default): call the provider directly.
+- `record`: call the provider and append one JSON line per completion to
+  `MUONRY_TRANSPORT_FILE` (request hash, channel, model, latency, response).
+- `replay`: answer from the recording without touching the network. Records
+  are matched by (channel, request hash) first, then in recorded order per
+  channel, so volatile prompt parts (datetime, ...) do not break replays.
+  Recorded latency is reproduced, scaled by `MUONRY_REPLAY_LATENCY_SCALE`
+  (default 1.0; 0 replays as fast as possible).
+
+Select the mode with `MUONRY_TRANSPORT=live|record|replay`.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger("muonry.transport")
+
+DEFAULT_FILE = Path(".muonry") / "transport.jsonl"
+
+
+class ReplayExhausted(RuntimeError):
+    """Raised when a replay has no recorded response left for a request."""
+
+
+def request_hash(messages: Any) -> str:
+    text = json.dumps(messages, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def _model_of(client: Any) -> str:
+    cfg = getattr(client, "config", None)
+    if isinstance(cfg, dict):
+        return str(cfg.get("model") or "")
+    return str(getattr(cfg, "model", "") or "")
+
+
+class Transport:
+    """Live transport: plain `client.completion()`."""
+
+    mode = "live"
+
+    @property
+    def offline(self) -> bool:
+        """True when no provider calls (and so no API keys) are needed."""
+        return False
+
+    async def complete(self, client: Any, messages: List[Dict[str, Any]], *, channel: str = "default", **kwargs: Any) -> Any:
+        return await client.completion(messages, **kwargs)
+
+    def wrap(self, client: Any, channel: str = "default") -> Any:
+        """Return a client-like object whose `completion()` goes through this transport."""
+        if self.mode == "live":
+            return client
+        return _TransportClient(self, client, channel)
+
+
+class _TransportClient:
+    """Proxy that forwards everything but `completion()` to the wrapped client."""
+
+    def __init__(self, transport: Transport, client: Any, channel: str) -> None:
+        self._transport = transport
+        self._client = client
+        self._channel = channel
+
+    async def completion(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        return await self._transport.complete(self._client, messages, channel=self._channel, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class RecordingTransport(Transport):
+    """Live calls, each appended to a JSONL recording."""
+
+    mode = "record"
+
+    def __init__(self, path: os.PathLike | str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._seq = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        except Exception:
+            pass
+
+    async def complete(self, client: Any, messages: List[Dict[str, Any]], *, channel: str = "default", **kwargs: Any) -> Any:
+        t0 = time.perf_counter()
+        error: Optional[str] = None
+        response: Any = None
+        try:
+            response = await client.completion(messages, **kwargs)
+            return response
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._write({
+                "channel": channel,
+                "model": _model_of(client),
+                "key": request_hash(messages),
+                "latency_s": round(time.perf_counter() - t0, 6),
+                "response": response,
+                "error": error,
+            })
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._seq += 1
+            record = {"seq": self._seq, "ts": time.time(), **record}
+            try:
+                line = json.dumps(record, ensure_ascii=False, default=str)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception as e:
+                logger.debug(f"transport: failed to record completion: {e}")
+
+
+class ReplayTransport(Transport):
+    """Answers completions from a recording, reproducing recorded latency."""
+
+    mode = "replay"
+
+    def __init__(self, path: os.PathLike | str, *, latency_scale: float = 1.0) -> None:
+        self.path = Path(path)
+        self.latency_scale = max(0.0, float(latency_scale))
+        self._by_key: Dict[tuple, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._by_channel: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.served = 0
+        for rec in self._load():
+            ch = str(rec.get("channel") or "default")
+            self._by_key[(ch, rec.get("key"))].append(rec)
+            self._by_channel[ch].append(rec)
+
+    @property
+    def offline(self) -> bool:
+        return True
+
+    def _load(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        out.append(json.loads(line))
+                    except Exception:
+                        continue
+        except FileNotFoundError:
+            logger.debug(f"transport: no recording at {self.path}")
+        return out
+
+    def _take(self, channel: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            exact = self._by_key.get((channel, key))
+            while exact:
+                rec = exact.popleft()
+                if not rec.get("_used"):
+                    rec["_used"] = True
+                    return rec
+            queue = self._by_channel.get(channel)
+            while queue:
+                rec = queue.popleft()
+                if not rec.get("_used"):
+                    rec["_used"] = True
+                    return rec
+        return None
+
+    def remaining(self) -> int:
+        with self._lock:
+            return sum(1 for q in self._by_channel.values() for r in q if not r.get("_used"))
+
+    async def complete(self, client: Any, messages: List[Dict[str, Any]], *, channel: str = "default", **kwargs: Any) -> Any:
+        rec = self._take(channel, request_hash(messages))
+        if rec is None:
+            raise ReplayExhausted(f"no recorded completion left for channel '{channel}' in {self.path}")
+        delay = float(rec.get("latency_s") or 0.0) * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.served += 1
+        if rec.get("error"):
+            raise RuntimeError(f"replayed error: {rec['error']}")
+        return rec.get("response")
+
+
+def transport_from_env() -> Transport:
+    mode = str(os.getenv("MUONRY_TRANSPORT", "live")).strip().lower()
+    path = os.getenv("MUONRY_TRANSPORT_FILE") or str(DEFAULT_FILE)
+    if mode == "record":
+        return RecordingTransport(path)
+    if mode == "replay":
+        try:
+            scale = float(os.getenv("MUONRY_REPLAY_LATENCY_SCALE", "1.0"))
+        except Exception:
+            scale = 1.0
+        return ReplayTransport(path, latency_scale=scale)
+    return Transport()
+
+
+_TRANSPORT: Optional[Transport] = None
+
+
+def default_transport() -> Transport:
+    """Process-wide transport configured from the environment."""
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        _TRANSPORT = transport_from_env()
+    return _TRANSPORT
+
+
+def set_transport(transport: Optional[Transport]) -> None:
+    """Install a transport (None re-reads the environment on next use)."""
+    global _TRANSPORT
+    _TRANSPORT = transport
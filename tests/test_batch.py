@@ -0,0 +1,125 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from muonry.batch import RateLimiter, load_tasks, run_batch
+from tools.workspace import current_workdir, resolve
+
+
+class FakeSession:
+    """Writes its prompt into the bound workdir after a short await."""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+
+    async def run_headless(self, prompts):
+        await asyncio.sleep(self.delay)
+        resolve("out.txt").write_text(prompts[-1], encoding="utf-8")
+        return {"output": f"{prompts[-1]} @ {current_workdir()}", "turns": len(prompts)}
+
+
+def _tasks(tmp_path, n):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("\n".join(json.dumps({"id": f"t{i}", "prompt": f"p{i}"}) for i in range(n)) + "\n")
+    return load_tasks(path)
+
+
+def test_load_tasks_validates(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text('# comment\n{"id": "a", "prompts": ["x", "y"], "tag": 1}\n"bare prompt"\n')
+    tasks = load_tasks(path)
+    assert [t.id for t in tasks] == ["a", "task-3"]
+    assert tasks[0].prompts == ["x", "y"] and tasks[0].meta == {"tag": 1}
+    path.write_text('{"id": "a"}\n')
+    with pytest.raises(ValueError):
+        load_tasks(path)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_isolates_workdirs(tmp_path):
+    async def factory(task, limiter):
+        return FakeSession(delay=0.01)
+
+    report = await run_batch(_tasks(tmp_path, 5), concurrency=3, workdir_root=tmp_path / "runs", session_factory=factory)
+    assert report["summary"]["ok"] == 5
+    for r in report["results"]:
+        assert r["ok"] and r["turns"] == 1
+        assert (tmp_path / "runs" / r["id"] / "out.txt").read_text() == "p" + r["id"][1:]
+        assert r["output"].endswith(str((tmp_path / "runs" / r["id"]).resolve()))
+
+
+@pytest.mark.asyncio
+async def test_run_batch_scales_with_concurrency(tmp_path):
+    async def factory(task, limiter):
+        return FakeSession(delay=0.1)
+
+    tasks = _tasks(tmp_path, 8)
+    t0 = time.perf_counter()
+    serial = await run_batch(tasks, concurrency=1, workdir_root=tmp_path / "a", session_factory=factory)
+    t1 = time.perf_counter()
+    parallel = await run_batch(tasks, concurrency=8, workdir_root=tmp_path / "b", session_factory=factory)
+    t2 = time.perf_counter()
+    assert serial["summary"]["ok"] == parallel["summary"]["ok"] == 8
+    assert (t2 - t1) * 3 < (t1 - t0)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_reports_failures(tmp_path):
+    class Boom:
+        async def run_headless(self, prompts):
+            raise RuntimeError("nope")
+
+    async def factory(task, limiter):
+        return Boom() if task.id == "t1" else FakeSession(delay=0)
+
+    seen = []
+    report = await run_batch(_tasks(tmp_path, 3), workdir_root=tmp_path, session_factory=factory, on_result=seen.append)
+    assert report["summary"]["failed"] == 1
+    failed = next(r for r in report["results"] if not r["ok"])
+    assert failed["id"] == "t1" and "nope" in failed["error"]
+    assert len(seen) == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(20, burst=1)
+    t0 = time.perf_counter()
+    for _ in range(5):
+        await limiter.acquire()
+    assert time.perf_counter() - t0 >= 0.15
+
+
+def test_main_run_stdout_is_pure_jsonl(tmp_path):
+    import subprocess
+    import sys
+    import textwrap
+
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("\n".join(json.dumps({"id": f"t{i}", "prompt": f"p{i}"}) for i in range(3)) + "\n")
+    script = textwrap.dedent(
+        f"""
+        import asyncio, os
+        from muonry.batch import main_run
+
+        class Noisy:
+            async def run_headless(self, prompts):
+                print("🔍 Found 3 matches")  # tools print progress like this
+                os.write(1, b"raw fd write\\n")
+                return {{"output": prompts[-1]}}
+
+        async def factory(task, limiter):
+            print("registering tools...")
+            return Noisy()
+
+        raise SystemExit(asyncio.run(main_run(
+            ["--tasks", {str(path)!r}, "--workdir-root", {str(tmp_path / "runs")!r}], session_factory=factory
+        )))
+        """
+    )
+    proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    lines = proc.stdout.splitlines()
+    assert sorted(json.loads(line)["id"] for line in lines) == ["t0", "t1", "t2"]
+    assert "Found 3 matches" in proc.stderr and "raw fd write" in proc.stderr
@@ -0,0 +1,54 @@
+from tools.build_analyzer import MAX_LINE, MAX_TS_ISSUES, BuildLogAnalyzer, analyze_build_output
+
+
+def _codes(result):
+    return [i["code"] for i in result["issues"]]
+
+
+def test_extracts_known_failures():
+    out = analyze_build_output(
+        "src/a.ts:3:5 - error TS2307: Cannot find module 'lodash' or its corresponding type declarations.\n"
+        "src/b.tsx(10,2): error TS2322: Type 'string' is not assignable\n"
+        "Module not found: Error: Can't resolve 'react-dom' in '/app/src'\n"
+        "Error: Cannot find module './local'\n",
+        "bash: npm: command not found\nbun: command not found\nError: listen EADDRINUSE: address already in use :::3000",
+    )
+    assert _codes(out) == ["MISSING_MODULE", "MISSING_MODULE", "TS2307", "TS2322", "TOOL_NOT_FOUND", "PORT_IN_USE"]
+    assert [i["extra"]["module"] for i in out["issues"][:2]] == ["lodash", "react-dom"]
+    ts = out["issues"][3]
+    assert (ts["file"], ts["line"], ts["column"]) == ("src/b.tsx", 10, 2)
+    assert out["issues"][4]["message"] == "bun is not installed"
+    packages = [s["data"]["packages"] for s in out["suggestions"] if s.get("kind") == "install"]
+    assert packages == [["lodash"], ["react-dom"], ["@types/lodash"]]
+    assert out["confidence"] == 0.85
+
+    esm = analyze_build_output("", "Error [ERR_REQUIRE_ESM]: require() of ES Module x\nEACCES: permission denied")
+    assert _codes(esm) == ["ESM_CJS_MISMATCH", "PERMISSION_DENIED"]
+    assert analyze_build_output("compiled successfully\n", "") == {"issues": [], "suggestions": [], "confidence": 0.3}
+
+
+def test_streaming_chunks_match_one_shot():
+    stdout = "noise line\n" * 50 + "src/x.ts:1:1 - error TS2307: Cannot find module 'zod'\n" + "more\n" * 10
+    stderr = "Cannot find package 'chalk' imported from /a/b.js"
+    analyzer = BuildLogAnalyzer()
+    seen = []
+    for i in range(0, len(stdout), 7):
+        seen += analyzer.feed(stdout[i:i + 7], "stdout")
+    for i in range(0, len(stderr), 5):
+        seen += analyzer.feed(stderr[i:i + 5], "stderr")
+    assert [i.code for i in seen] == ["MISSING_MODULE", "TS2307"]  # stderr's last line is still partial
+    assert analyzer.result() == analyze_build_output(stdout, stderr)
+    assert analyzer.lines == 61
+
+
+def test_memory_bounds():
+    analyzer = BuildLogAnalyzer()
+    analyzer.feed("x" * (MAX_LINE * 3))  # one huge unterminated line is not accumulated
+    assert sum(len(v) for v in analyzer._partial.values()) <= MAX_LINE
+    analyzer.feed("".join(f"f.ts:{i}:1 - error TS1005: ';' expected.\n" for i in range(MAX_TS_ISSUES + 25)))
+    out = analyzer.result()
+    assert len(out["issues"]) == MAX_TS_ISSUES
+    assert out["dropped_issues"] == 25
+
+    long_line = "a" * (MAX_LINE * 2) + " Cannot find module 'late-dep'\n"
+    assert _codes(analyze_build_output(long_line, "")) == ["MISSING_MODULE"]
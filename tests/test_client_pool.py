@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from muonry.client_pool import ClientPool
+
+
+class FakeClient:
+    def __init__(self, config) -> None:
+        self.config = config
+        self.tools = []
+        self.closed = False
+
+    def register_tool(self, name: str) -> None:
+        self.tools.append(name)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _factory(config, client_cls):
+    return FakeClient(config)
+
+
+def _cfg(model: str = "groq/m", key: str = "k", base_url=None) -> dict:
+    return {"api_key": key, "model": model, "base_url": base_url}
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_client_and_runs_setup_once():
+    pool = ClientPool(max_size=4, factory=_factory)
+    calls = []
+
+    async def setup(client):
+        calls.append(client)
+        client.register_tool("echo")
+
+    c1 = await pool.get(_cfg(), profile="worker", setup=setup, setup_key="tools")
+    c2 = await pool.get(_cfg(), profile="worker", setup=setup, setup_key="tools")
+    assert c1 is c2
+    assert len(calls) == 1
+    assert c1.tools == ["echo"]
+    # Different profile or credentials never share a client
+    assert await pool.get(_cfg(), profile="planner") is not c1
+    assert await pool.get(_cfg(key="other"), profile="worker") is not c1
+    stats = pool.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_is_lru_bounded():
+    pool = ClientPool(max_size=2, factory=_factory)
+    a = await pool.get(_cfg("groq/a"))
+    await pool.get(_cfg("groq/b"))
+    await pool.get(_cfg("groq/a"))  # refresh a
+    await pool.get(_cfg("groq/c"))  # evicts b
+    assert len(pool) == 2
+    assert await pool.get(_cfg("groq/a")) is a
+    assert pool.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_evicts_unhealthy_clients():
+    pool = ClientPool(max_size=4, max_failures=2, factory=_factory)
+    c1 = await pool.get(_cfg())
+    pool.report(c1, ok=False)
+    pool.report(c1, ok=True)  # success resets the streak
+    pool.report(c1, ok=False)
+    assert await pool.get(_cfg()) is c1
+    pool.report(c1, ok=False)
+    pool.report(c1, ok=False)
+    pool.release(c1)
+    pool.release(c1)  # both leases returned: the evicted client can close
+    assert c1.closed
+    assert await pool.get(_cfg()) is not c1
+
+
+@pytest.mark.asyncio
+async def test_evicted_client_is_closed_only_after_last_release():
+    pool = ClientPool(max_size=4, max_failures=3, factory=_factory)
+    a = await pool.get(_cfg())  # worker 1
+    b = await pool.get(_cfg())  # worker 2 shares it
+    assert a is b
+    for _ in range(3):
+        pool.report(a, ok=False)
+    assert not a.closed  # both workers are still mid-task
+    fresh = await pool.get(_cfg())
+    assert fresh is not a
+    pool.release(a)
+    assert not a.closed
+    pool.release(b)
+    assert a.closed
+    pool.release(fresh)
+    assert not fresh.closed
+
+    async with pool.lease(_cfg("groq/x")) as x:
+        pass
+    pool.clear()
+    assert x.closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_wait_for_setup():
+    pool = ClientPool(max_size=4, factory=_factory)
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def setup(client):
+        calls.append(client)
+        started.set()
+        await release.wait()
+        client.register_tool("echo")
+
+    async def worker():
+        client = await pool.get(_cfg(), profile="worker", setup=setup, setup_key="tools")
+        return list(client.tools)
+
+    first = asyncio.create_task(worker())
+    await started.wait()
+    others = [asyncio.create_task(worker()) for _ in range(2)]
+    await asyncio.sleep(0.02)
+    assert not any(t.done() for t in others)  # blocked on the in-flight setup
+    release.set()
+    assert await asyncio.gather(first, *others) == [["echo"]] * 3
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_setup_is_retried_by_the_next_caller():
+    pool = ClientPool(max_size=4, factory=_factory)
+    attempts = []
+
+    async def flaky(client):
+        attempts.append(client)
+        if len(attempts) == 1:
+            raise RuntimeError("registration failed")
+        client.register_tool("echo")
+
+    with pytest.raises(RuntimeError):
+        await pool.get(_cfg(), setup=flaky, setup_key="tools")
+    client = await pool.get(_cfg(), setup=flaky, setup_key="tools")
+    assert client.tools == ["echo"] and len(attempts) == 2
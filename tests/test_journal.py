@@ -0,0 +1,57 @@
+import json
+
+from muonry.journal import SessionJournal, find_session, list_sessions, load_working_set
+from muonry.prompt_layout import MessageLayout
+
+
+def test_journal_roundtrip_compresses_large_content(tmp_path):
+    j = SessionJournal.create(tmp_path, meta={"model": "m"}, compress_over=100)
+    j.record({"role": "user", "content": "hi"})
+    j.record({"role": "assistant", "content": "x" * 5000})
+    j.close()
+    lines = [json.loads(l) for l in j.path.read_text().splitlines()]
+    assert lines[0]["t"] == "meta" and lines[0]["model"] == "m"
+    assert "z" in lines[2] and "content" not in lines[2]
+    assert j.path.stat().st_size < 1000
+    msgs = load_working_set(j.path)
+    assert msgs == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "x" * 5000}]
+
+
+def test_resume_loads_only_the_window_after_compaction(tmp_path):
+    j = SessionJournal.create(tmp_path)
+    layout = MessageLayout("sys", max_chars=100000, max_messages=10, journal=j)
+    for i in range(95):
+        layout.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"})
+    j.close()
+    assert layout.compactions > 0
+
+    msgs = load_working_set(j.path, max_messages=10, max_chars=100000)
+    assert msgs == layout.history
+
+    # Appending continues the sequence after reopening
+    j2 = SessionJournal(j.path)
+    assert j2.seq == 95
+    j2.record({"role": "user", "content": "more"})
+    j2.close()
+    assert load_working_set(j.path, max_messages=10)[-1]["content"] == "more"
+
+
+def test_budget_and_lookup(tmp_path):
+    j = SessionJournal.create(tmp_path)
+    for i in range(20):
+        j.record({"role": "user", "content": "y" * 100})
+    j.close()
+    assert len(load_working_set(j.path, max_chars=550)) == 5
+    assert find_session(tmp_path, "last") == j.path
+    assert find_session(tmp_path, j.id[:10]) == j.path
+    assert find_session(tmp_path, "nope") is None
+    assert list_sessions(tmp_path)[0]["first_prompt"] == "y" * 80
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    j = SessionJournal.create(tmp_path)
+    j.record({"role": "user", "content": "ok"})
+    j.close()
+    with j.path.open("a") as f:
+        f.write('{"t": "msg", "seq": 2, "role": "assist')
+    assert load_working_set(j.path) == [{"role": "user", "content": "ok"}]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import sys
+import types
+
+import pytest
+
+from muonry.json_stream import PlanStream, extract_plan
+
+PLAN = {"steps": [{"id": i, "description": f"story {{{i}}} \"quoted\" ]", "file_path": f"out/s{i}.md"} for i in range(1, 7)]}
+RESPONSE = (
+    "<think>Maybe {\"steps\": [{\"id\": 0}]} ... let me think [more</think>"
+    "Sure! Here is the plan:\n```json\n" + json.dumps(PLAN, indent=2) + "\n```\nLet me know {if} you need more."
+)
+
+
+def test_steps_are_emitted_as_soon_as_they_close():
+    stream = PlanStream()
+    seen = []
+    for i in range(0, len(RESPONSE), 5):
+        for step in stream.feed(RESPONSE[i:i + 5]):
+            # Step k is available before the text of step k+1 has been fed
+            seen.append((step["id"], i + 5 < RESPONSE.index(f'"id": {step["id"] + 1}') if step["id"] < 6 else True))
+    assert [s for s, _ in seen] == [1, 2, 3, 4, 5, 6]
+    assert all(early for _, early in seen)
+    assert stream.close() == PLAN
+
+
+def test_extract_plan_variants():
+    assert extract_plan('[{"id": 1,}, {"id": 2}]')[1] == [{"id": 1}, {"id": 2}]
+    value, steps = extract_plan('{"plan": {"subtasks": [{"id": "a"}]}, "note": "x"}')
+    assert steps == [{"id": "a"}] and value["plan"]["subtasks"] == steps
+    # Unbalanced brace in prose: steps are still recovered
+    assert extract_plan('I think { this is it: {"steps": [{"id": 1}]}')[1] == [{"id": 1}]
+
+
+@pytest.mark.asyncio
+async def test_planner_tool_streams_steps(monkeypatch, capsys):
+    from tools import toolset
+
+    class StreamingClient:
+        async def completion(self, messages, stream=False):
+            assert stream
+
+            async def gen():
+                for i in range(0, len(RESPONSE), 16):
+                    await asyncio.sleep(0)
+                    yield {"choices": [{"delta": {"content": RESPONSE[i:i + 16]}}]}
+
+            return gen()
+
+    class Pool:
+        async def get(self, config, **kwargs):
+            return StreamingClient()
+
+        def report(self, client, ok):
+            pass
+
+        def release(self, client):
+            pass
+
+    fake_bhumi = types.ModuleType("bhumi.base_client")
+    fake_bhumi.LLMConfig = lambda **kw: kw
+    monkeypatch.setitem(sys.modules, "bhumi", types.ModuleType("bhumi"))
+    monkeypatch.setitem(sys.modules, "bhumi.base_client", fake_bhumi)
+    monkeypatch.setattr(toolset, "default_pool", lambda: Pool())
+    monkeypatch.delenv("MUONRY_LLM_CACHE", raising=False)
+
+    out = await toolset.planner_tool("Create 6 stories in a folder named out")
+    printed = capsys.readouterr().out
+    assert all(f"Step {i} ready" in printed for i in range(1, 7))
+    assert "6 steps, 1 wave)" in out
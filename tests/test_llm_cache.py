@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+from muonry.llm_cache import CacheMiss, CompletionCache, cached_completion, make_key
+
+
+class CountingClient:
+    def __init__(self, text: str = "ok") -> None:
+        self.calls = 0
+        self.text = text
+        self.config = {"model": "groq/m", "temperature": 0}
+
+    async def completion(self, messages, **kwargs):
+        self.calls += 1
+        return {"text": self.text}
+
+
+MSGS = [{"role": "user", "content": "plan it"}]
+
+
+def test_key_depends_on_model_messages_tools_temperature():
+    base = make_key("m", MSGS)
+    assert base == make_key("m", [dict(m) for m in MSGS])
+    assert base != make_key("other", MSGS)
+    assert base != make_key("m", MSGS + [{"role": "user", "content": "x"}])
+    assert base != make_key("m", MSGS, tools=[{"name": "t"}])
+    assert base != make_key("m", MSGS, temperature=0.7)
+
+
+@pytest.mark.asyncio
+async def test_read_through_and_replay(tmp_path):
+    cache = CompletionCache(tmp_path, mode="on")
+    client = CountingClient()
+    r1 = await cached_completion(client, MSGS, cache=cache)
+    r2 = await cached_completion(client, MSGS, cache=cache)
+    assert r1 == r2 == {"text": "ok"}
+    assert client.calls == 1
+
+    replay = CompletionCache(tmp_path, mode="replay")
+    assert await cached_completion(client, MSGS, cache=replay) == {"text": "ok"}
+    with pytest.raises(CacheMiss):
+        await cached_completion(client, [{"role": "user", "content": "new"}], cache=replay)
+    assert client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_off_mode_and_empty_responses_are_not_cached(tmp_path):
+    client = CountingClient(text="")
+    cache = CompletionCache(tmp_path, mode="on")
+    await cached_completion(client, MSGS, cache=cache)
+    await cached_completion(client, MSGS, cache=cache)
+    assert client.calls == 2
+    off = CompletionCache(tmp_path, mode="off")
+    ok_client = CountingClient()
+    await cached_completion(ok_client, MSGS, cache=off)
+    assert not list(tmp_path.glob("*/*.json"))
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = CompletionCache(tmp_path, mode="on", ttl_s=10, max_bytes=400)
+    cache.put("aa" + "0" * 62, {"text": "x" * 150})
+    old = tmp_path / "aa" / ("aa" + "0" * 62 + ".json")
+    past = time.time() - 100
+    os.utime(old, (past, past))
+    cache.put("bb" + "0" * 62, {"text": "y" * 150})
+    cache.put("cc" + "0" * 62, {"text": "z" * 150})
+    # Oldest entry evicted to stay under the byte budget
+    assert not old.exists()
+    assert cache.evictions >= 1
+    assert cache.get("cc" + "0" * 62) == {"text": "z" * 150}
+
+    expired = CompletionCache(tmp_path, mode="on", ttl_s=0.001)
+    time.sleep(0.01)
+    assert expired.get("cc" + "0" * 62) is None
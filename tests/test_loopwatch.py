@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from muonry.loopwatch import LoopWatchdog
+
+
+def sleep_blocking(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def slow_probe_tool() -> None:
+    sleep_blocking(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_captured_and_attributed():
+    wd = LoopWatchdog(interval_s=0.01, threshold_s=0.05)
+    wd.start()
+    try:
+        await asyncio.sleep(0.05)
+        await slow_probe_tool()
+        await asyncio.sleep(0.05)
+    finally:
+        await wd.stop()
+    assert wd.events, "expected a blocking episode"
+    ev = wd.events[-1]
+    assert ev.tool == "slow_probe"
+    assert ev.duration_s >= 0.2
+    assert any("sleep_blocking" in line for line in ev.stack)
+    assert "slow_probe" in wd.report()
+
+
+@pytest.mark.asyncio
+async def test_no_events_when_loop_is_responsive():
+    wd = LoopWatchdog(interval_s=0.01, threshold_s=0.1)
+    wd.start()
+    try:
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+    finally:
+        await wd.stop()
+    assert not wd.events
+
+
+@pytest.mark.asyncio
+async def test_paused_prompt_wait_is_not_reported():
+    wd = LoopWatchdog(interval_s=0.01, threshold_s=0.05)
+    wd.start()
+    try:
+        await asyncio.sleep(0.05)
+        with wd.paused():
+            time.sleep(0.3)  # stands in for input() at the interactive prompt
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+    finally:
+        await wd.stop()
+    assert not wd.events
+    assert wd.report() == "No event-loop blocking detected."
@@ -0,0 +1,43 @@
+import pytest
+
+from muonry.metrics import Histogram, MetricsRegistry, format_stats
+
+
+def test_histogram_quantiles_within_bucket_error():
+    h = Histogram()
+    for ms in range(1, 1001):
+        h.observe(ms / 1000.0)
+    assert h.count == 1000
+    assert h.quantile(0.5) == pytest.approx(0.5, rel=0.07)
+    assert h.quantile(0.95) == pytest.approx(0.95, rel=0.07)
+    assert h.quantile(0.99) == pytest.approx(0.99, rel=0.07)
+    assert h.quantile(1.0) == pytest.approx(1.0)
+
+
+def test_registry_labels_and_prometheus_dump():
+    reg = MetricsRegistry()
+    reg.counter("muonry_tool_calls_total", "calls", tool="grep", state="done").inc()
+    reg.counter("muonry_tool_calls_total", tool="grep", state="done").inc()
+    reg.counter("muonry_tool_calls_total", tool="grep", state="error").inc()
+    reg.histogram("muonry_tool_latency_seconds", tool="grep").observe(0.01)
+    reg.gauge("muonry_tools_inflight").set(2)
+    assert reg.counter_total("muonry_tool_calls_total") == 3
+    assert reg.counter_total("muonry_tool_calls_total", state="done") == 2
+    text = reg.to_prometheus()
+    assert "# TYPE muonry_tool_calls_total counter" in text
+    assert 'muonry_tool_calls_total{state="done",tool="grep"} 2' in text
+    assert 'muonry_tool_latency_seconds{tool="grep",quantile="0.99"}' in text
+    assert 'muonry_tool_latency_seconds_count{tool="grep"} 1' in text
+    assert "muonry_tools_inflight 2" in text
+
+
+def test_format_stats_summarizes_models_and_tools():
+    reg = MetricsRegistry()
+    reg.histogram("muonry_llm_latency_seconds", model="groq/m").observe(1.5)
+    reg.counter("muonry_llm_requests_total", model="groq/m", outcome="ok").inc()
+    reg.histogram("muonry_tool_latency_seconds", tool="read_file").observe(0.2)
+    reg.counter("muonry_tool_calls_total", tool="read_file", state="done").inc()
+    out = format_stats(reg)
+    assert "waiting on models 1.50s" in out
+    assert "groq/m" in out and "read_file" in out
+    assert "LLM requests: 1" in out
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from muonry.plan_cache import PlanCache, fingerprint, minhash, normalize, similarity
+
+PLAN = [{"id": 1, "description": "Write story 1", "file_path": "stories/s1.md"}]
+TASK = "Create 6 short stories about a robot learning to paint, in a folder called stories"
+
+
+def test_normalize_and_fingerprint():
+    assert normalize("  Fix   the BUG, please! ") == "fix the bug please"
+    assert fingerprint("Fix the bug.") == fingerprint("fix  the bug")
+    assert fingerprint("fix the bug", {"steps": 6}) != fingerprint("fix the bug", {"steps": 7})
+
+
+def test_minhash_similarity_tracks_overlap():
+    near = "Create 6 short stories about a robot that learns to paint, in a folder called stories"
+    far = "Refactor the database layer to use connection pooling"
+    assert similarity(minhash(TASK), minhash(TASK)) == 1.0
+    assert similarity(minhash(TASK), minhash(near)) > similarity(minhash(TASK), minhash(far))
+    assert similarity(minhash(TASK), minhash(far)) < 0.2
+
+
+def test_exact_and_near_hits_respect_scope(tmp_path):
+    cache = PlanCache(tmp_path, enabled=True, threshold=0.5)
+    scope = {"tool": "planner", "steps": 6}
+    assert cache.store(TASK, PLAN, scope)
+
+    exact = cache.lookup(TASK.upper() + "!", scope)
+    assert exact["plan"] == PLAN and exact["similarity"] == 1.0
+
+    near = cache.lookup(TASK.replace("learning to paint", "learning how to paint"), scope)
+    assert near is not None and near["plan"] == PLAN and 0.5 <= near["similarity"] < 1.0
+
+    assert cache.lookup(TASK, {"tool": "planner", "steps": 7}) is None
+    assert cache.lookup("Refactor the database layer", scope) is None
+
+    # A fresh instance rebuilds the band index from disk
+    again = PlanCache(tmp_path, enabled=True, threshold=0.5)
+    assert again.lookup(TASK.replace("learning to paint", "learning how to paint"), scope)["plan"] == PLAN
+
+
+def test_disabled_and_eviction(tmp_path):
+    off = PlanCache(tmp_path, enabled=False)
+    assert not off.store(TASK, PLAN)
+    assert off.lookup(TASK) is None
+
+    cache = PlanCache(tmp_path, enabled=True, max_entries=2)
+    for i in range(4):
+        cache.store(f"task number {i} " * 3, PLAN)
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_replaces_plan(tmp_path):
+    cache = PlanCache(tmp_path, enabled=True)
+    cache.store(TASK, PLAN)
+    fresh = [{"id": 1, "description": "Write a better story 1", "file_path": "stories/s1.md"}]
+    calls = []
+
+    async def make_plan():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return fresh
+
+    t = cache.refresh_in_background(TASK, None, make_plan)
+    assert cache.refresh_in_background(TASK, None, make_plan) is None  # one refresh at a time
+    await t
+    assert calls == [1]
+    assert cache.lookup(TASK)["plan"] == fresh
+
+    no_refresh = PlanCache(tmp_path, enabled=True, refresh=False)
+    assert no_refresh.refresh_in_background(TASK, None, make_plan) is None
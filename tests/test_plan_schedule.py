@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+
+def test_plan_waves_group_independent_steps():
+    from tools.plan_schedule import plan_waves, tool_call_locks
+
+    stories = [{"file_path": f"fire/story{i}.md"} for i in range(6)]
+    assert plan_waves(stories) == [[0, 1, 2, 3, 4, 5]]
+
+    steps = [
+        {"file_path": "out/a.md"},
+        {"file_path": "out/b.md", "reads": ["out/a.md"]},
+        {"file_path": "out/c.md"},
+        {"writes": ["out/"]},
+        {"file_path": "README.md", "reads": ["docs"]},
+    ]
+    assert plan_waves(steps) == [[0, 2, 4], [1], [3]]
+    assert tool_call_locks("write_file", {"file_path": "a.py", "content": ""}) == [("a.py", "x")]
+    assert tool_call_locks("apply_patch", {"patch": "*** Begin Patch\n*** Update File: src/m.py\n@@\n-a\n+b\n*** End Patch"}) == [("src/m.py", "x")]
+    assert tool_call_locks("run_shell", {"command": "ls"}) == []
+
+
+@pytest.mark.asyncio
+async def test_executor_serializes_calls_on_the_same_file():
+    from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
+    from tools.plan_schedule import tool_call_locks
+
+    log = []
+
+    async def write_file(file_path, content):
+        log.append(("start", file_path, content))
+        await asyncio.sleep(0.03)
+        log.append(("end", file_path, content))
+        return "ok"
+
+    calls = [
+        ToolCallSpec("c1", "write_file", {"file_path": "a.md", "content": "1"}),
+        ToolCallSpec("c2", "write_file", {"file_path": "b.md", "content": "2"}),
+        ToolCallSpec("c3", "write_file", {"file_path": "a.md", "content": "3"}),
+    ]
+    t0 = asyncio.get_running_loop().time()
+    agg = await ParallelToolExecutor({"write_file": write_file}.get).execute(
+        calls, lock_cb=lambda spec: tool_call_locks(spec.name, spec.arguments)
+    )
+    elapsed = asyncio.get_running_loop().time() - t0
+    assert agg["summary"]["ok"] == 3
+    assert 0.055 < elapsed < 0.09  # b.md overlaps the first a.md write; the second a.md write waits
+    a_events = [(kind, c) for kind, path, c in log if path == "a.md"]
+    assert a_events == [("start", "1"), ("end", "1"), ("start", "3"), ("end", "3")]
+
+
+@pytest.mark.asyncio
+async def test_executor_read_after_write_sees_the_write(tmp_path):
+    from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
+    from tools.plan_schedule import tool_call_locks
+
+    target = tmp_path / "a.md"
+    target.write_text("old")
+
+    async def write_file(file_path, content):
+        await asyncio.sleep(0.02)
+        target.write_text(content)
+        return "ok"
+
+    async def read_file(file_path):
+        return target.read_text()
+
+    async def permission(spec):
+        await asyncio.sleep(0.05 if spec.name == "write_file" else 0)  # the write is approved last
+        return True
+
+    calls = [
+        ToolCallSpec("c1", "read_file", {"file_path": "a.md"}),
+        ToolCallSpec("c2", "write_file", {"file_path": "a.md", "content": "new"}),
+        ToolCallSpec("c3", "read_file", {"file_path": "a.md"}),
+    ]
+    agg = await ParallelToolExecutor({"write_file": write_file, "read_file": read_file}.get).execute(
+        calls, permission_cb=permission, lock_cb=lambda spec: tool_call_locks(spec.name, spec.arguments)
+    )
+    assert [r["result"] for r in agg["results"]] == ["old", "ok", "new"]
+
+
+@pytest.mark.asyncio
+async def test_executor_withdraws_locks_of_rejected_and_unknown_calls():
+    from tools.orchestratorv2 import ParallelToolExecutor, ToolCallSpec
+    from tools.plan_schedule import tool_call_locks
+
+    async def write_file(file_path, content):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def read_file(file_path):
+        return "read"
+
+    async def permission(spec):
+        return spec.tool_call_id != "c2"
+
+    calls = [
+        ToolCallSpec("c1", "write_file", {"file_path": "a.md", "content": "1"}),
+        ToolCallSpec("c2", "write_file", {"file_path": "a.md", "content": "2"}),
+        ToolCallSpec("c3", "edit_file", {"file_path": "a.md", "old_string": "x", "new_string": "y"}),
+        ToolCallSpec("c4", "read_file", {"file_path": "a.md"}),
+    ]
+    agg = await asyncio.wait_for(
+        ParallelToolExecutor({"write_file": write_file, "read_file": read_file}.get).execute(
+            calls, permission_cb=permission, lock_cb=lambda spec: tool_call_locks(spec.name, spec.arguments)
+        ),
+        timeout=2,
+    )
+    assert [r["error"] for r in agg["results"]] == [None, "rejected", "tool_not_found", None]
+    assert agg["results"][3]["result"] == "read"
@@ -0,0 +1,78 @@
+import json
+import time
+
+from muonry.profiler import TurnProfiler
+
+
+def _busy(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_slow_turn_is_dumped_with_top_self_time(tmp_path):
+    prof = TurnProfiler(interval_s=0.002, threshold_s=0.05, out_dir=tmp_path)
+    with prof.profile("slow") as result:
+        _busy(0.2)
+    assert result.path is not None and result.path.exists()
+    assert result.samples > 10
+    top = [name for name, _, _ in result.top_self(5)]
+    assert any("_busy" in name for name in top)
+    text = result.path.read_text()
+    assert "thread:MainThread" in text and "_busy" in text
+    assert "slow" in result.report()
+
+
+def test_fast_turn_is_not_dumped_and_speedscope_format(tmp_path):
+    prof = TurnProfiler(interval_s=0.002, threshold_s=10, out_dir=tmp_path, fmt="speedscope")
+    with prof.profile("fast") as result:
+        _busy(0.05)
+    assert result.path is None
+    assert not list(tmp_path.iterdir())
+    doc = result.speedscope()
+    assert doc["profiles"][0]["type"] == "sampled"
+    assert len(doc["profiles"][0]["samples"]) == len(doc["profiles"][0]["weights"])
+    json.dumps(doc)
+
+
+def test_idle_threads_do_not_hide_hot_spots(tmp_path):
+    import queue
+    import selectors
+    import threading
+
+    stop = threading.Event()
+    q: "queue.Queue[None]" = queue.Queue()
+
+    def selector_loop():  # like an idle event loop in another thread
+        with selectors.DefaultSelector() as sel:
+            while not stop.is_set():
+                sel.select(0.05)
+
+    def parked_sleeper():
+        while not stop.is_set():
+            time.sleep(0.05)
+
+    threads = [
+        threading.Thread(target=stop.wait, name="waiter"),
+        threading.Thread(target=q.get, name="queue-reader"),
+        threading.Thread(target=selector_loop, name="selector"),
+        threading.Thread(target=parked_sleeper, name="sleeper"),
+    ]
+    for t in threads:
+        t.start()
+    try:
+        prof = TurnProfiler(interval_s=0.002, threshold_s=10, out_dir=tmp_path)
+        with prof.profile("mixed") as result:
+            _busy(0.2)
+    finally:
+        stop.set()
+        q.put(None)
+        for t in threads:
+            t.join()
+    assert result.idle > 0
+    top = result.top_self(3)
+    assert "_busy" in top[0][0] and top[0][2] > 0.8
+    sampled_threads = {stack[0][0] for stack in result.stacks}
+    assert sampled_threads <= {"thread:MainThread", "thread:sleeper"}
@@ -0,0 +1,38 @@
+from muonry.prompt_layout import MessageLayout, extract_cache_usage
+
+
+def test_prefix_is_stable_across_appends():
+    layout = MessageLayout("SYS", volatile="ctx", max_chars=10_000)
+    layout.append({"role": "user", "content": "hi"})
+    first = layout.messages()
+    layout.append({"role": "assistant", "content": "hello"})
+    layout.append({"role": "user", "content": "more"})
+    second = layout.messages()
+    # Earlier request is a strict prefix of the later one
+    assert second[: len(first)] == first
+    assert second[0] == {"role": "system", "content": "SYS"}
+    assert second[1] == {"role": "system", "content": "ctx"}
+
+
+def test_compaction_is_bulk_and_skips_dangling_tool_results():
+    layout = MessageLayout("SYS", max_chars=100_000, max_messages=10, compact_ratio=0.5)
+    for i in range(10):
+        layout.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"})
+    assert layout.compactions == 0
+    layout.append({"role": "tool", "content": "t"})
+    assert layout.compactions == 1
+    hist = layout.history
+    assert len(hist) <= 5
+    assert hist[0]["role"] != "tool"
+    # Next few appends do not compact again
+    layout.append({"role": "user", "content": "x"})
+    assert layout.compactions == 1
+
+
+def test_extract_cache_usage_variants():
+    assert extract_cache_usage({"usage": {"prompt_tokens": 100, "prompt_tokens_details": {"cached_tokens": 80}}}) == (100, 80)
+    assert extract_cache_usage({"raw_response": {"usage": {"input_tokens": 50, "cache_read_input_tokens": 20}}}) == (50, 20)
+    assert extract_cache_usage({"text": "no usage"}) == (0, 0)
+    layout = MessageLayout("SYS")
+    layout.record_usage({"usage": {"prompt_tokens": 10, "prompt_tokens_details": {"cached_tokens": 5}}})
+    assert layout.stats()["cache_hit_rate"] == 0.5
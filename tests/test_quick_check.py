@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import pytest
+
+from tools.quick_check import SyntaxCache, find_projects, python_files, run_commands
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_only_changed_files_are_parsed(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    good = _write(src / "good.py", "x = 1\n")
+    bad = _write(src / "bad.py", "def f(:\n")
+    files = sorted(python_files(src, 100))
+    cache_dir = tmp_path / "cache"
+
+    checks, parsed = SyntaxCache(cache_dir, enabled=True).open(src).check(files)
+    assert parsed == 2
+    by_file = {c["file"]: c for c in checks}
+    assert by_file[str(good)]["ok"] is True
+    assert by_file[str(bad)]["ok"] is False and "SyntaxError" in by_file[str(bad)]["error"]
+
+    # A new instance (new process) answers from the on-disk index without parsing
+    cache = SyntaxCache(cache_dir, enabled=True).open(src)
+    assert cache.check(files) == (checks, 0)
+
+    _write(bad, "def f():\n    return 1\n")
+    checks, parsed = cache.check(files)
+    assert parsed == 1 and all(c["ok"] for c in checks)
+
+    # Touched but unchanged content is rehashed, not reparsed
+    st = good.stat()
+    os.utime(good, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    assert cache.check(files)[1] == 0
+
+
+def test_disabled_cache_parses_everything_and_writes_nothing(tmp_path):
+    f = _write(tmp_path / "a.py", "y = 2\n")
+    cache_dir = tmp_path / "cache"
+    cache = SyntaxCache(cache_dir, enabled=False).open(tmp_path)
+    assert cache.check([f])[1] == 1
+    assert cache.check([f])[1] == 1
+    assert not cache_dir.exists()
+
+
+def test_large_batches_use_the_process_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("MUONRY_QUICK_CHECK_POOL_MIN", "4")
+    monkeypatch.setenv("MUONRY_QUICK_CHECK_WORKERS", "2")
+    files = [_write(tmp_path / f"m{i}.py", f"v{i} = {i}\n" if i != 3 else "if:\n") for i in range(8)]
+    checks, parsed = SyntaxCache(tmp_path / "cache", enabled=True).open(tmp_path).check(files)
+    assert parsed == 8
+    assert [c["ok"] for c in checks] == [i != 3 for i in range(8)]
+
+
+def _py(code):
+    return [sys.executable, "-c", code]
+
+
+@pytest.mark.asyncio
+async def test_run_commands_runs_concurrently_in_job_order(tmp_path):
+    seen = []
+    start = time.monotonic()
+    results = await run_commands(
+        [(_py(f"import time; time.sleep(0.4); print({i})"), str(tmp_path)) for i in range(4)],
+        concurrency=4,
+        on_result=lambda i, r: seen.append(i),
+    )
+    assert time.monotonic() - start < 1.2
+    assert [r.stdout.strip() for r in results] == ["0", "1", "2", "3"]
+    assert sorted(seen) == [0, 1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_run_commands_fail_fast_kills_the_rest(tmp_path):
+    jobs = [(_py("import sys; sys.exit(3)"), str(tmp_path))] + [(_py("import time; time.sleep(30)"), str(tmp_path))] * 3
+    start = time.monotonic()
+    results = await run_commands(jobs, concurrency=4, max_failures=1)
+    assert time.monotonic() - start < 10
+    assert results[0].exit_code == 3
+    assert results[1:] == [None, None, None]
+
+    missing = await run_commands([(["muonry-no-such-binary"], str(tmp_path))])
+    assert missing[0].exit_code == 127
+
+
+def test_find_projects_stops_at_project_roots(tmp_path):
+    for d in ("a", "b/c", "a/nested", "node_modules/x"):
+        (tmp_path / d).mkdir(parents=True)
+        (tmp_path / d / "Cargo.toml").write_text("")
+    assert find_projects(tmp_path, "Cargo.toml") == [tmp_path / "a", tmp_path / "b" / "c"]
+    (tmp_path / "Cargo.toml").write_text("")
+    assert find_projects(tmp_path, "Cargo.toml") == [tmp_path]
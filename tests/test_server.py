@@ -0,0 +1,159 @@
+import asyncio
+import json
+
+import pytest
+
+from muonry.server import (
+    METHOD_NOT_FOUND,
+    SESSION_NOT_FOUND,
+    TOO_MANY_SESSIONS,
+    MuonryServer,
+    Outbox,
+)
+from tools.workspace import current_workdir
+
+
+class FakeAssistant:
+    def __init__(self, sink, delay=0.05):
+        self.sink = sink
+        self.delay = delay
+        self.layout_chars = None
+
+    def new_layout(self, max_chars=None):
+        self.layout_chars = max_chars
+
+    async def turn(self, prompt):
+        await self.sink({"type": "turn_start"})
+        await asyncio.sleep(self.delay)
+        await self.sink({"type": "text", "delta": prompt.upper()})
+        return f"{prompt} @ {current_workdir()}"
+
+
+class Harness:
+    def __init__(self, **kwargs):
+        self.messages = []
+
+        async def write(data: bytes) -> None:
+            self.messages.append(json.loads(data))
+
+        self.outbox = Outbox(write, max_pending=kwargs.pop("max_pending", 100))
+        self.outbox.start()
+
+        async def factory(sink):
+            return FakeAssistant(sink)
+
+        self.server = MuonryServer(self.outbox, session_factory=factory, **kwargs)
+        self._id = 0
+
+    async def call(self, method, **params):
+        self._id += 1
+        rid = self._id
+        await self.server.handle_line(json.dumps({"jsonrpc": "2.0", "id": rid, "method": method, "params": params}))
+        for _ in range(400):
+            for m in self.messages:
+                if m.get("id") == rid:
+                    return m
+            await asyncio.sleep(0.005)
+        raise AssertionError(f"no reply to {method}")
+
+    def events(self, sid):
+        return [m["params"]["event"] for m in self.messages if m.get("method") == "session.event" and m["params"]["session_id"] == sid]
+
+
+@pytest.mark.asyncio
+async def test_sessions_run_concurrently_and_stream_events(tmp_path):
+    h = Harness(session_chars=8000)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    a = (await h.call("session.create", workdir=str(tmp_path / "a")))["result"]["session_id"]
+    b = (await h.call("session.create", workdir=str(tmp_path / "b")))["result"]["session_id"]
+    assert h.server.sessions[a].assistant.layout_chars == 8000
+
+    t0 = asyncio.get_running_loop().time()
+    ra, rb = await asyncio.gather(h.call("session.prompt", session_id=a, prompt="x"), h.call("session.prompt", session_id=b, prompt="y"))
+    assert asyncio.get_running_loop().time() - t0 < 0.09
+    assert ra["result"]["output"].endswith(str(tmp_path / "a"))
+    assert rb["result"]["output"].endswith(str(tmp_path / "b"))
+    assert [e["type"] for e in h.events(a)] == ["turn_start", "text"]
+    assert h.events(b)[-1]["delta"] == "Y"
+
+
+@pytest.mark.asyncio
+async def test_errors_and_limits():
+    h = Harness(max_sessions=1)
+    assert (await h.call("nope"))["error"]["code"] == METHOD_NOT_FOUND
+    assert (await h.call("session.prompt", session_id="missing", prompt="x"))["error"]["code"] == SESSION_NOT_FOUND
+    await h.server.handle_line("{not json")
+    await asyncio.sleep(0.01)
+    assert any(m.get("error", {}).get("code") == -32700 for m in h.messages)
+
+    first = (await h.call("session.create"))["result"]["session_id"]
+    # An idle session is evicted to make room for a new one
+    second = (await h.call("session.create"))["result"]["session_id"]
+    assert list(h.server.sessions) == [second] and first != second
+    # A busy one is not
+    h.server.sessions[second].assistant.delay = 0.3
+    pending = asyncio.create_task(h.call("session.prompt", session_id=second, prompt="slow"))
+    await asyncio.sleep(0.05)
+    assert (await h.call("session.create"))["error"]["code"] == TOO_MANY_SESSIONS
+    assert (await h.call("session.cancel", session_id=second))["result"]["cancelled"] is True
+    assert (await pending)["error"]["code"] == -32800
+
+
+@pytest.mark.asyncio
+async def test_event_queue_is_bounded():
+    h = Harness(max_pending=2)
+    h.outbox._task.cancel()  # stalled client: nothing is drained
+    for _ in range(5):
+        h.outbox.post({"jsonrpc": "2.0", "method": "session.event", "params": {}})
+    assert h.outbox.dropped == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_respect_max_sessions():
+    h = Harness(max_sessions=2)
+    fail = {"next": False}
+
+    async def slow_factory(sink):
+        await asyncio.sleep(0.05)
+        if fail["next"]:
+            raise RuntimeError("setup failed")
+        return FakeAssistant(sink)
+
+    h.server._factory = slow_factory
+    replies = await asyncio.gather(*(h.call("session.create") for _ in range(5)))
+    assert sum(1 for r in replies if "result" in r) == 2
+    assert [r["error"]["code"] for r in replies if "error" in r] == [TOO_MANY_SESSIONS] * 3
+    assert len(h.server.sessions) == 2
+
+    # A failed factory gives its reserved slot back
+    h.server.sessions.clear()
+    fail["next"] = True
+    assert "error" in await h.call("session.create")
+    fail["next"] = False
+    replies = await asyncio.gather(*(h.call("session.create") for _ in range(2)))
+    assert all("result" in r for r in replies) and len(h.server.sessions) == 2
+
+
+@pytest.mark.asyncio
+async def test_close_rejects_prompts_queued_behind_the_running_turn():
+    h = Harness()
+    sid = (await h.call("session.create"))["result"]["session_id"]
+    assistant = h.server.sessions[sid].assistant
+    assistant.delay = 0.2
+    turns = []
+    real_turn = assistant.turn
+
+    async def turn(prompt):
+        turns.append(prompt)
+        return await real_turn(prompt)
+
+    assistant.turn = turn
+    running = asyncio.create_task(h.call("session.prompt", session_id=sid, prompt="first"))
+    await asyncio.sleep(0.02)
+    queued = asyncio.create_task(h.call("session.prompt", session_id=sid, prompt="second"))
+    await asyncio.sleep(0.02)
+    assert (await h.call("session.close", session_id=sid))["result"]["closed"] is True
+    assert (await running)["error"]["code"] == -32800
+    assert (await queued)["error"]["code"] == SESSION_NOT_FOUND
+    assert turns == ["first"]
@@ -0,0 +1,60 @@
+import json
+import shlex
+import sys
+import time
+
+import pytest
+
+from tools.shell import ShellRequest, run_shell
+from tools.toolset import smart_run_shell_tool
+
+DOOMED = (
+    "import sys, time\n"
+    "print(\"Error: Cannot find module 'left-pad'\", flush=True)\n"
+    "time.sleep(30)\n"
+    "sys.exit(1)\n"
+)
+
+
+def _py(code):
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+def test_run_shell_on_output_can_stop_the_command():
+    seen = []
+
+    def on_output(stream, chunk):
+        seen.append((stream, chunk))
+        return "stop" in chunk
+
+    start = time.monotonic()
+    res = run_shell(
+        ShellRequest(command=[sys.executable, "-c", "import time; print('go', flush=True); print('stop', flush=True); time.sleep(30)"]),
+        on_output=on_output,
+    )
+    assert time.monotonic() - start < 10
+    assert res.stopped and res.exit_code != 0
+    assert seen == [("stdout", "go\n"), ("stdout", "stop\n")]
+
+    plain = run_shell(ShellRequest(command=[sys.executable, "-c", "print('ok')"]))
+    assert (plain.exit_code, plain.stdout, plain.stopped) == (0, "ok\n", False)
+
+
+@pytest.mark.asyncio
+async def test_smart_run_shell_kills_on_fatal_missing_module(tmp_path):
+    start = time.monotonic()
+    payload = json.loads(await smart_run_shell_tool(_py(DOOMED), str(tmp_path), kill_on_fatal=True))
+    assert time.monotonic() - start < 10
+    assert payload["status"] == "error"
+    assert payload["attempts"][0]["stopped_early"]["code"] == "MISSING_MODULE"
+    assert [i["code"] for i in payload["issues"]] == ["MISSING_MODULE"]
+    assert payload["suggested_commands"] and payload["suggested_commands"][0].endswith(" left-pad")
+
+
+@pytest.mark.asyncio
+async def test_smart_run_shell_streams_analysis_without_killing(tmp_path):
+    code = "import sys; print(\"Cannot find module 'zod'\", file=sys.stderr); sys.exit(2)"
+    payload = json.loads(await smart_run_shell_tool(_py(code), str(tmp_path)))
+    assert payload["exit_code"] == 2
+    assert "stopped_early" not in payload["attempts"][0]
+    assert [i["extra"]["module"] for i in payload["issues"]] == ["zod"]
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not load before the first prompt (imported on first use)
+DEFERRED = ("bhumi", "tools.toolset", "tools.orchestratorv2", "tools.websearch", "tools.deepwiki", "exa_py", "orjson")
+
+# Time-to-prompt budget; generous for slow CI, override with MUONRY_STARTUP_BUDGET_MS
+BUDGET_MS = float(os.getenv("MUONRY_STARTUP_BUDGET_MS", "600"))
+
+STARTUP = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import assistant
+a = assistant.MuonryAssistant()
+ok = asyncio.run(a.setup())
+print(json.dumps({"ok": ok, "ms": (time.perf_counter() - t0) * 1000}))
+"""
+
+
+def _importtime(code: str):
+    env = dict(os.environ, GROQ_API_KEY="test-key")
+    # Bytecode must be written, so the warm run leaves caches for the measured one
+    for k in ("PYTHONDONTWRITEBYTECODE", "MUONRY_TRACE", "MUONRY_TRACE_FILE", "MUONRY_PROFILE", "MUONRY_LOOPWATCH", "MUONRY_STRICT_TOOLS"):
+        env.pop(k, None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum)
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    return cumulative, out
+
+
+def test_startup_defers_heavy_imports_and_stays_under_budget():
+    # Warm run populates bytecode caches so the measurement reflects imports, not compiles
+    _importtime(STARTUP)
+    modules, out = _importtime(STARTUP)
+    assert out["ok"] is True
+    loaded = sorted(m for m in modules if any(m == d or m.startswith(d + ".") for d in DEFERRED))
+    assert loaded == [], f"imported before first prompt: {loaded}"
+    assert modules["assistant"] / 1000 < BUDGET_MS, f"import assistant took {modules['assistant'] / 1000:.0f}ms"
+    assert out["ms"] < BUDGET_MS, f"time to prompt {out['ms']:.0f}ms > {BUDGET_MS:.0f}ms"
+
+
+class FakeClient:
+    def __init__(self):
+        self.registered = []
+
+    def register_tool(self, name, func, description, parameters):
+        self.registered.append((name, func, description, parameters))
+
+
+@pytest.mark.asyncio
+async def test_register_tools_uses_static_schemas_in_order():
+    import assistant
+    from muonry.tool_schemas import TOOL_NAMES
+
+    a = assistant.MuonryAssistant(headless=True)
+    a.client = FakeClient()
+    a.client.tool_registry = type("R", (), {"get_definitions": lambda self: a.client.registered})()
+    await a.register_tools()
+    assert [r[0] for r in a.client.registered] == list(TOOL_NAMES)
+    assert all(callable(r[1]) for r in a.client.registered)
@@ -0,0 +1,275 @@
+import asyncio
+import multiprocessing
+import threading
+
+import pytest
+
+from tools.task_store import TaskStore
+
+
+def _plan(n, files=None):
+    return {
+        "main_task": "t",
+        "created_at": 1.0,
+        "subtasks": [
+            {"id": f"task_{i}", "description": f"d{i}", "file_path": (files or {}).get(i), "status": "pending"}
+            for i in range(n)
+        ],
+        "workers": [{"id": f"w{i}", "status": "idle"} for i in range(4)],
+        "file_locks": {},
+    }
+
+
+def _drain(path, worker_id, out):
+    store = TaskStore(path)
+    claimed = []
+    while (task := store.claim(worker_id)) is not None:
+        claimed.append(task["id"])
+        store.finish(task["id"], result="ok")
+    out.put(claimed)
+
+
+def test_claim_respects_file_locks_and_finish_releases(tmp_path):
+    store = TaskStore(tmp_path / "s.db")
+    store.replace(_plan(3, files={0: "a.py", 1: "a.py"}))
+    first = store.claim("w0")
+    assert first["id"] == "task_0" and store.file_locks() == {"a.py": "w0"}
+    # task_1 targets the locked file, so w1 gets task_2
+    assert store.claim("w1")["id"] == "task_2"
+    assert store.claim("w2") is None
+    store.finish("task_0", result="done")
+    assert store.file_locks() == {}
+    assert store.claim("w2")["id"] == "task_1"
+    store.finish("task_2", error="boom")
+    assert store.counts() == {"pending": 0, "in_progress": 1, "completed": 1, "failed": 1}
+    assert store.task("task_0")["result"] == "done"
+    assert "w0" in store.idle_workers()
+
+
+def test_concurrent_claims_never_duplicate(tmp_path):
+    path = tmp_path / "s.db"
+    TaskStore(path).replace(_plan(300))
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_drain, args=(path, f"p{i}", out)) for i in range(3)]
+    for p in procs:
+        p.start()
+    # Threads in this process race the other processes on the same database
+    store = TaskStore(path)
+    threads = [threading.Thread(target=lambda i=i: _drain(path, f"t{i}", out)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    claimed = [tid for _ in range(6) for tid in out.get(timeout=30)]
+    for p in procs:
+        p.join(timeout=30)
+    assert sorted(claimed) == sorted(f"task_{i}" for i in range(300))
+    assert store.counts()["completed"] == 300
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_workers_use_store(tmp_path, monkeypatch):
+    from tools.orchestrator import AsyncWorkerAgent, OrchestratorState, SubTask, TaskOrchestrator, TaskStatus, WorkerAgent, WorkerStatus
+
+    orch = TaskOrchestrator(max_workers=2)
+    orch.state_file = tmp_path / "orch.db"
+    orch._save_state(OrchestratorState(
+        main_task="m",
+        subtasks=[SubTask(id=f"t{i}", description="x", file_path="same.txt", status=TaskStatus.PENDING) for i in range(2)],
+        workers=[WorkerAgent(id="worker_1", status=WorkerStatus.IDLE), WorkerAgent(id="worker_2", status=WorkerStatus.IDLE)],
+        file_locks={},
+        created_at=0.0,
+    ))
+
+    async def fake_work(self, task):
+        return f"did {task.id}"
+
+    monkeypatch.setattr(AsyncWorkerAgent, "_do_real_work", fake_work)
+    a, b = AsyncWorkerAgent("worker_1", orch), AsyncWorkerAgent("worker_2", orch)
+    task = await a._get_next_task()
+    assert task.id == "t0" and await b._get_next_task() is None
+    await a._execute_task(task)
+    status = orch.get_status()
+    assert status["tasks"]["completed"] == 1 and status["file_locks"] == {}
+    assert (await b._get_next_task()).id == "t1"
+    assert orch._load_state().subtasks[0].result == "did t0"
+
+
+@pytest.mark.asyncio
+async def test_queue_wakes_parked_worker_on_lock_release(tmp_path):
+    from muonry.metrics import registry
+    from tools.task_queue import TaskQueue
+
+    queue = TaskQueue(TaskStore(tmp_path / "s.db"))
+    plan = _plan(3, files={0: "a.py", 1: "a.py"})
+    plan["subtasks"][2]["priority"] = 5
+    queue.replace(plan)
+    # Priority first, then plan order
+    assert (await queue.get("w0"))["id"] == "task_2"
+    assert (await queue.get("w0"))["id"] == "task_0"
+
+    parked = asyncio.create_task(queue.get("w1"))
+    await asyncio.sleep(0.02)
+    assert not parked.done()  # task_1 waits for a.py
+    queue.finish("task_0", result="ok")
+    task = await asyncio.wait_for(parked, 1)
+    assert task["id"] == "task_1"
+    latency = TaskQueue.started(task["ready_at"])
+    assert latency < 0.05
+    assert registry().histograms("muonry_orchestrator_dispatch_seconds")
+
+
+async def _pid_work(worker, task):
+    import os
+
+    return str(os.getpid())
+
+
+@pytest.mark.asyncio
+async def test_process_pool_drains_store_and_streams_events(tmp_path):
+    import os
+
+    from tools.task_queue import TaskQueue
+    from tools.worker_pool import ProcessWorkerPool
+
+    path = tmp_path / "s.db"
+    queue = TaskQueue(TaskStore(path))
+    events = []
+    pool = ProcessWorkerPool(path, ["w0", "w1"], queue=queue, on_event=events.append, work="test_task_store:_pid_work")
+    assert await pool.start() == ["w0", "w1"]
+    procs = list(pool._procs.values())
+    try:
+        # Plan loaded after the children are parked: the wake-up must reach them
+        await asyncio.sleep(0.5)
+        queue.replace(_plan(6))
+        for _ in range(600):
+            if queue.store.counts()["completed"] == 6:
+                break
+            await asyncio.sleep(0.05)
+        assert queue.store.counts()["completed"] == 6
+        pids = {t["result"] for t in queue.store.tasks()}
+        assert str(os.getpid()) not in pids
+        await asyncio.sleep(0.1)
+        assert sorted(e["task_id"] for e in events if e["type"] == "finished") == [f"task_{i}" for i in range(6)]
+    finally:
+        await pool.stop()
+    assert not any(p.is_alive() for p in procs)
+
+
+def test_lock_manager_shared_exclusive_and_hierarchy():
+    from tools.lock_manager import EXCLUSIVE, SHARED, LockManager
+
+    locks = LockManager()
+    assert locks.acquire_nowait("a", [("src/util.py", SHARED)])
+    assert locks.acquire_nowait("b", [("src/util.py", SHARED), ("src/b.py", EXCLUSIVE)])
+    assert not locks.acquire_nowait("c", [("src/util.py", EXCLUSIVE)])
+    # A directory lock conflicts with anything below it, and vice versa
+    assert not locks.acquire_nowait("c", [("src", EXCLUSIVE)])
+    assert locks.acquire_nowait("c", [("docs/", EXCLUSIVE)])
+    assert not locks.acquire_nowait("d", [("docs/a/b.md", SHARED)])
+    # All-or-nothing: the free path is not taken when another one conflicts
+    assert not locks.acquire_nowait("d", [("lib/x.py", EXCLUSIVE), ("src/b.py", SHARED)])
+    assert all(owner != "d" for _, owner, _ in locks.held())
+    locks.release("b")
+    locks.release("c")
+    assert locks.acquire_nowait("d", [("docs/a/b.md", SHARED), ("src/b.py", SHARED)])
+    assert sorted(p for p, _, _ in locks.held()) == ["docs/a/b.md", "src/b.py", "src/util.py"]
+
+
+@pytest.mark.asyncio
+async def test_lock_manager_wait_queue():
+    from tools.lock_manager import EXCLUSIVE, SHARED, LockManager
+
+    locks = LockManager()
+    order = []
+
+    async def step(owner, reqs, delay):
+        async with locks.hold(owner, reqs):
+            order.append(f"+{owner}")
+            await asyncio.sleep(delay)
+            order.append(f"-{owner}")
+
+    await asyncio.gather(
+        step("w", [("pkg", EXCLUSIVE)], 0.02),
+        step("r1", [("pkg/a.py", SHARED)], 0.01),
+        step("r2", [("pkg/a.py", SHARED)], 0.01),
+    )
+    assert order[:2] == ["+w", "-w"]
+    assert set(order[2:4]) == {"+r1", "+r2"}  # readers run together
+    assert locks.held() == [] and locks.waiting == 0
+
+
+def test_store_claims_readers_together_and_respects_directories(tmp_path):
+    store = TaskStore(tmp_path / "s.db")
+    plan = _plan(4, files={0: "out/a.md", 1: "out/", 3: "out/b.md"})
+    plan["subtasks"][0]["reads"] = ["spec.md"]
+    plan["subtasks"][2]["reads"] = ["spec.md"]
+    store.replace(plan)
+    assert store.claim("w0")["id"] == "task_0"
+    # task_1 wants the whole out/ directory while out/a.md is held; task_2 only reads spec.md
+    assert store.claim("w1")["id"] == "task_2"
+    assert store.read_locks() == {"spec.md": ["w0", "w1"]}
+    assert store.claim("w2")["id"] == "task_3"
+    assert store.claim("w3") is None
+    store.finish("task_0", result="ok")
+    store.finish("task_3", result="ok")
+    assert store.claim("w3")["id"] == "task_1"
+    assert store.file_locks() == {"out/": "w3"}
+    assert store.task("task_0")["reads"] == ["spec.md"]
+
+
+@pytest.mark.asyncio
+async def test_lock_manager_is_fifo_per_conflict():
+    from tools.lock_manager import EXCLUSIVE, SHARED, LockManager
+
+    locks = LockManager()
+    order = []
+
+    async def step(owner, reqs, delay=0.01):
+        async with locks.hold(owner, reqs):
+            order.append(f"+{owner}")
+            await asyncio.sleep(delay)
+            order.append(f"-{owner}")
+
+    # read(f), write(f), read(f): the second read must not start before the write
+    await asyncio.gather(
+        step("r1", [("f.py", SHARED)]),
+        step("w", [("f.py", EXCLUSIVE)]),
+        step("r2", [("f.py", SHARED)]),
+        step("other", [("g.py", EXCLUSIVE)]),  # unrelated path is not held back
+    )
+    assert [e for e in order if "other" not in e] == ["+r1", "-r1", "+w", "-w", "+r2", "-r2"]
+    assert order.index("+other") < order.index("-r1")
+
+    # A queued directory writer also blocks later readers below it
+    assert locks.acquire_nowait("a", [("src/x.py", SHARED)])
+    waiter = asyncio.create_task(locks.acquire("b", [("src/", EXCLUSIVE)]))
+    await asyncio.sleep(0)
+    assert not locks.acquire_nowait("c", [("src/y.py", SHARED)])
+    assert locks.acquire_nowait("c", [("docs/y.md", SHARED)])
+    locks.release("a")
+    await waiter
+    assert locks.held() == [("docs/y.md", "c", SHARED), ("src", "b", EXCLUSIVE)]
+
+
+def test_flat_plans_claim_without_the_lock_trie(tmp_path, monkeypatch):
+    from tools import task_store
+    from tools.task_store import _flat_plan
+
+    assert _flat_plan([{"file_path": "a.py"}, {"file_path": "src/b.py"}, {"file_path": None}], [])
+    assert not _flat_plan([{"file_path": "out/"}, {"file_path": "out/a.md"}], [])  # directory lock
+    assert not _flat_plan([{"file_path": "a.py", "reads": ["spec.md"]}], [])  # shared lock
+    assert not _flat_plan([{"file_path": "./a.py"}, {"file_path": "a.py"}], [])  # same file, two spellings
+
+    def no_trie(rows):
+        raise AssertionError("flat claims must not rebuild the lock trie")
+
+    monkeypatch.setattr(task_store.LockManager, "from_rows", staticmethod(no_trie))
+    store = TaskStore(tmp_path / "s.db")
+    store.replace(_plan(4, files={0: "a.py", 1: "a.py", 2: "b.py"}))
+    assert [store.claim(w)["id"] for w in ("w0", "w1", "w2")] == ["task_0", "task_2", "task_3"]
+    assert store.claim("w3") is None  # task_1 waits for a.py
+    assert store.file_locks() == {"a.py": "w0", "b.py": "w1"}
+    store.finish("task_0", result="ok")
+    assert store.claim("w3")["id"] == "task_1"
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from muonry import tracing
+from muonry.tracing import SpanExporter, Tracer, set_tracer, span, traced
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    t = Tracer(SpanExporter(tmp_path / "trace.jsonl", "jsonl"))
+    set_tracer(t)
+    yield t
+    set_tracer(Tracer(None))
+
+
+def _spans(t):
+    t.flush()
+    return [json.loads(line) for line in t.exporter.path.read_text().splitlines()]
+
+
+def test_disabled_tracer_is_noop():
+    set_tracer(Tracer(None))
+    with span("x") as sp:
+        sp.set_attribute("k", 1)
+    assert tracing.current_span() is tracing._NOOP
+
+
+@pytest.mark.asyncio
+async def test_nested_spans_share_trace_and_link_parents(tracer):
+    @traced("tool.child")
+    async def child():
+        await asyncio.sleep(0)
+        return 1
+
+    with span("root", turn=1):
+        await asyncio.gather(child(), child())
+
+    spans = _spans(tracer)
+    root = next(s for s in spans if s["name"] == "root")
+    children = [s for s in spans if s["name"] == "tool.child"]
+    assert len(children) == 2
+    assert all(c["parent_span_id"] == root["span_id"] for c in children)
+    assert {s["trace_id"] for s in spans} == {root["trace_id"]}
+    assert root["attributes"] == {"turn": 1}
+
+
+def test_errors_are_recorded_and_chrome_export(tmp_path):
+    t = Tracer(SpanExporter(tmp_path / "trace.json", "chrome"))
+    set_tracer(t)
+    try:
+        with pytest.raises(ValueError):
+            with span("boom"):
+                raise ValueError("bad")
+        t.flush()
+        # Trace viewers accept an unterminated JSON array
+        events = json.loads(t.exporter.path.read_text() + "]")
+        assert events[0]["ph"] == "X" and events[0]["name"] == "boom"
+        assert "ValueError" in events[0]["args"]["error"]
+    finally:
+        set_tracer(Tracer(None))
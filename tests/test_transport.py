@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from muonry.transport import RecordingTransport, ReplayExhausted, ReplayTransport, Transport
+
+
+class EchoClient:
+    def __init__(self) -> None:
+        self.config = {"model": "groq/m"}
+        self.calls = 0
+        self.tool_registry = "registry"
+
+    async def completion(self, messages, **kwargs):
+        self.calls += 1
+        return {"text": f"echo {messages[-1]['content']}"}
+
+
+def _msgs(text: str) -> list:
+    return [{"role": "user", "content": text}]
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path):
+    path = tmp_path / "rec.jsonl"
+    rec = RecordingTransport(path)
+    client = EchoClient()
+    await rec.complete(client, _msgs("a"), channel="assistant")
+    await rec.complete(client, _msgs("b"), channel="assistant")
+    assert client.calls == 2
+    assert len(path.read_text().splitlines()) == 2
+
+    replay = ReplayTransport(path, latency_scale=0)
+    assert replay.offline
+    offline_client = EchoClient()
+    # Exact request match wins regardless of order
+    assert await replay.complete(offline_client, _msgs("b"), channel="assistant") == {"text": "echo b"}
+    # Unmatched request falls back to the next unused record on the channel
+    assert await replay.complete(offline_client, _msgs("changed"), channel="assistant") == {"text": "echo a"}
+    assert offline_client.calls == 0
+    with pytest.raises(ReplayExhausted):
+        await replay.complete(offline_client, _msgs("a"), channel="assistant")
+
+
+@pytest.mark.asyncio
+async def test_replay_scales_recorded_latency(tmp_path):
+    path = tmp_path / "rec.jsonl"
+    path.write_text('{"channel": "w", "key": "x", "latency_s": 0.2, "response": {"text": "hi"}}\n')
+    replay = ReplayTransport(path, latency_scale=0.25)
+    t0 = time.perf_counter()
+    assert await replay.complete(EchoClient(), _msgs("q"), channel="w") == {"text": "hi"}
+    elapsed = time.perf_counter() - t0
+    assert 0.04 <= elapsed < 0.2
+
+
+@pytest.mark.asyncio
+async def test_wrap_forwards_attributes(tmp_path):
+    client = EchoClient()
+    assert Transport().wrap(client) is client
+    wrapped = RecordingTransport(tmp_path / "r.jsonl").wrap(client, "worker")
+    assert wrapped.tool_registry == "registry"
+    assert await wrapped.completion(_msgs("z")) == {"text": "echo z"}
+    assert '"channel": "worker"' in (tmp_path / "r.jsonl").read_text()
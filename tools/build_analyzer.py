@@ -29,102 +29,196 @@ class Suggestion:
 _SAFE_PKG_RE = re.compile(r"^@?[a-z0-9._-]+(?:/[a-z0-9._-]+)?$", re.IGNORECASE)
 
 
-def _extract_missing_modules(text: str) -> List[str]:
-    modules: List[str] = []
-    patterns = [
+# Lines worth a closer look contain one of these (lowercased) keywords. A block
+# of output is lowercased once and searched with str.find per keyword, so the
+# bulk of a large build log never reaches the regex engine.
+_KEYWORDS = (
+    "cannot find module", "module not found", "failed to resolve import", "could not resolve",
+    "cannot find package", "import statement outside", "err_require_esm", "of es module",
+    "load es module", "command not found", "eacces", "permission denied", "eaddrinuse",
+    "address already in use", "port is already in use",
+)
+_TS_TRIGGER = re.compile(r"error\s+ts\d")
+# Which extractors a candidate line needs
+_TRIGGERS = re.compile(
+    r"(?P<module>cannot find module|module not found|failed to resolve import|could not resolve|cannot find package)"
+    r"|(?P<ts>error\s+ts\d)"
+    r"|(?P<esm>import statement outside|err_require_esm|of es module|load es module)"
+    r"|(?P<tool>command not found)"
+    r"|(?P<perm>eacces|permission denied)"
+    r"|(?P<port>eaddrinuse|address already in use|port is already in use)",
+    re.IGNORECASE,
+)
+_MODULE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
         r"Cannot find module ['\"]([^'\"\n]+)['\"]",
         r"Module not found:.*(?:Can't resolve|Cannot resolve) ['\"]([^'\"\n]+)['\"]",
         r"Failed to resolve import ['\"]([^'\"\n]+)['\"]",
-        r"error TS2307: Cannot find module ['\"]([^'\"\n]+)['\"]",
         r"Could not resolve ['\"]([^'\"\n]+)['\"] from",
         r"Cannot find package ['\"]([^'\"\n]+)['\"] imported from",
-    ]
-    for pat in patterns:
-        for m in re.finditer(pat, text, flags=re.IGNORECASE):
-            name = m.group(1)
-            if name and name not in modules:
-                modules.append(name)
-    # Filter out relative paths and non-package specifiers
-    modules = [m for m in modules if not m.startswith(('.', '/', '#'))]
-    return modules
-
-
-def _extract_ts_errors(text: str) -> List[Issue]:
-    issues: List[Issue] = []
-    # Format: path:line:col - error TS1234: message
-    for m in re.finditer(r"([^\s:][^\n:]*\.(?:ts|tsx|js|jsx)):(\d+):(\d+)\s+-\s+error\s+TS(\d+):\s+(.+)", text):
-        issues.append(Issue(
-            code=f"TS{m.group(4)}",
-            message=m.group(5).strip(),
-            file=m.group(1),
-            line=int(m.group(2)),
-            column=int(m.group(3)),
-        ))
-    # Alternate format: file(line,col): error TS1234: message
-    for m in re.finditer(r"([^\s:][^\n:]*\.(?:ts|tsx|js|jsx))\((\d+),(\d+)\):\s+error\s+TS(\d+):\s+(.+)", text):
-        issues.append(Issue(
-            code=f"TS{m.group(4)}",
-            message=m.group(5).strip(),
-            file=m.group(1),
-            line=int(m.group(2)),
-            column=int(m.group(3)),
-        ))
-    return issues
-
-
-def _extract_esm_cjs(text: str) -> Optional[Issue]:
-    if re.search(r"Cannot use import statement outside a module|ERR_REQUIRE_ESM|require\(\) of ES Module|Must use import to load ES Module", text):
-        return Issue(code="ESM_CJS_MISMATCH", message="ESM/CJS interop issue detected")
-    return None
-
-
-def _extract_tool_missing(text: str) -> Optional[Issue]:
-    if re.search(r"\bbun: command not found\b", text):
-        return Issue(code="TOOL_NOT_FOUND", message="bun is not installed")
-    if re.search(r"\bnpm: command not found\b", text):
-        return Issue(code="TOOL_NOT_FOUND", message="npm is not installed")
-    if re.search(r"\byarn: command not found\b", text):
-        return Issue(code="TOOL_NOT_FOUND", message="yarn is not installed")
-    if re.search(r"\bpnpm: command not found\b", text):
-        return Issue(code="TOOL_NOT_FOUND", message="pnpm is not installed")
-    return None
-
-
-def _extract_permission_or_port(text: str) -> List[Issue]:
-    issues: List[Issue] = []
-    if re.search(r"EACCES|Permission denied", text, re.IGNORECASE):
-        issues.append(Issue(code="PERMISSION_DENIED", message="Permission denied (EACCES)"))
-    if re.search(r"EADDRINUSE|address already in use|port is already in use", text, re.IGNORECASE):
-        issues.append(Issue(code="PORT_IN_USE", message="Port already in use"))
-    return issues
+    )
+]
+# path:line:col - error TS1234: message  |  path(line,col): error TS1234: message
+_TS_ERROR = re.compile(
+    r"([^\s:][^\n:]*\.(?:ts|tsx|js|jsx))(?::(\d+):(\d+)\s+-|\((\d+),(\d+)\):)\s+error\s+TS(\d+):\s+(.+)"
+)
+_TS_MISSING_MODULE = re.compile(r"Cannot find module ['\"]([^'\"]+)['\"]")
+_ESM_CJS = re.compile(r"Cannot use import statement outside a module|ERR_REQUIRE_ESM|require\(\) of ES Module|Must use import to load ES Module")
+_TOOL_NOT_FOUND = re.compile(r"\b(bun|npm|yarn|pnpm): command not found\b")
+_TOOLS = ("bun", "npm", "yarn", "pnpm")
 
+MAX_LINE = 64 * 1024  # longer lines (minified bundles) are only scanned up to here
+MAX_TS_ISSUES = 500
 
-def analyze_build_output(stdout: str, stderr: str) -> Dict:
-    text = f"{stdout}\n{stderr}" if stderr else stdout
-    issues: List[Issue] = []
-    suggestions: List[Suggestion] = []
-
-    # Missing modules
-    missing = _extract_missing_modules(text)
-    for mod in missing:
-        issues.append(Issue(code="MISSING_MODULE", message=f"Missing module '{mod}'", extra={"module": mod}))
-        if _SAFE_PKG_RE.match(mod):
-            suggestions.append(Suggestion(
-                title=f"Install missing module {mod}",
-                explanation=f"The build failed because module '{mod}' was not found.",
-                safe=True,
-                kind="install",
-                data={"packages": [mod], "dev": False}
-            ))
 
-    # TS errors
-    ts_issues = _extract_ts_errors(text)
-    issues.extend(ts_issues)
-    # Suggestions for missing type declarations
-    for it in ts_issues:
-        m = re.search(r"Cannot find module ['\"]([^'\"]+)['\"]", it.message)
-        if m:
-            mod = m.group(1)
+class BuildLogAnalyzer:
+    """Single-pass build log scanner with bounded memory.
+
+    Feed output chunks as they arrive (`feed(chunk, stream)`), then call
+    `result()`. Each chunk is searched once for trigger keywords and only the
+    lines containing one are parsed; partial lines are buffered per stream,
+    lines are capped at MAX_LINE characters and at most MAX_TS_ISSUES
+    TypeScript errors are kept.
+    """
+
+    def __init__(self) -> None:
+        self._partial: Dict[str, str] = {}
+        self._modules: List[str] = []
+        self._ts: List[Issue] = []
+        self._ts_dropped = 0
+        self._ts_types: List[str] = []
+        self._esm = False
+        self._tools: set = set()
+        self._perm = False
+        self._port = False
+        self.lines = 0
+
+    def feed(self, chunk: str, stream: str = "stdout") -> List[Issue]:
+        """Scan every complete line in `chunk`; returns the issues it revealed."""
+        if not chunk:
+            return []
+        buf = self._partial.get(stream, "") + chunk
+        cut = buf.rfind("\n") + 1
+        rest = buf[cut:]
+        new = self._scan_block(buf[:cut]) if cut else []
+        if len(rest) > MAX_LINE:
+            new.extend(self._scan_block(rest))
+            rest = ""
+        self._partial[stream] = rest
+        return new
+
+    def close(self) -> List[Issue]:
+        """Scan the unterminated last line of every stream."""
+        new: List[Issue] = []
+        for rest in self._partial.values():
+            if rest:
+                new.extend(self._scan_block(rest))
+        self._partial.clear()
+        return new
+
+    def _scan_block(self, block: str) -> List[Issue]:
+        self.lines += block.count("\n")
+        low = block.lower()
+        if len(low) != len(block):
+            # Lowercasing changed offsets (rare non-ASCII); fall back to per-line scanning
+            new: List[Issue] = []
+            for line in block.splitlines():
+                new.extend(self._scan(line))
+            return new
+        positions: List[int] = []
+        for kw in _KEYWORDS:
+            i = low.find(kw)
+            while i >= 0:
+                positions.append(i)
+                i = low.find(kw, i + len(kw))
+        positions.extend(m.start() for m in _TS_TRIGGER.finditer(low))
+        if not positions:
+            return []
+        positions.sort()
+        new = []
+        done = -1
+        for pos in positions:
+            if pos < done:
+                continue  # line already scanned
+            start = block.rfind("\n", 0, pos) + 1
+            end = block.find("\n", pos)
+            if end < 0:
+                end = len(block)
+            if end - start > MAX_LINE:
+                start = max(start, pos - 1024)
+                end = min(end, start + MAX_LINE)
+            new.extend(self._scan(block[start:end]))
+            done = end
+        return new
+
+    def _scan(self, line: str) -> List[Issue]:
+        if len(line) > MAX_LINE:
+            line = line[:MAX_LINE]
+        kinds = {m.lastgroup for m in _TRIGGERS.finditer(line)}
+        if not kinds:
+            return []
+        new: List[Issue] = []
+        if "module" in kinds:
+            for pat in _MODULE_PATTERNS:
+                for m in pat.finditer(line):
+                    name = m.group(1)
+                    if name and not name.startswith((".", "/", "#")) and name not in self._modules:
+                        self._modules.append(name)
+                        new.append(Issue(code="MISSING_MODULE", message=f"Missing module '{name}'", extra={"module": name}))
+        if "ts" in kinds:
+            for m in _TS_ERROR.finditer(line):
+                issue = Issue(
+                    code=f"TS{m.group(6)}",
+                    message=m.group(7).strip(),
+                    file=m.group(1),
+                    line=int(m.group(2) or m.group(4)),
+                    column=int(m.group(3) or m.group(5)),
+                )
+                tm = _TS_MISSING_MODULE.search(issue.message)
+                if tm and tm.group(1) not in self._ts_types:
+                    self._ts_types.append(tm.group(1))
+                if len(self._ts) < MAX_TS_ISSUES:
+                    self._ts.append(issue)
+                    new.append(issue)
+                else:
+                    self._ts_dropped += 1
+        if "esm" in kinds and not self._esm and _ESM_CJS.search(line):
+            self._esm = True
+            new.append(Issue(code="ESM_CJS_MISMATCH", message="ESM/CJS interop issue detected"))
+        if "tool" in kinds:
+            for m in _TOOL_NOT_FOUND.finditer(line):
+                if m.group(1) not in self._tools:
+                    self._tools.add(m.group(1))
+                    new.append(Issue(code="TOOL_NOT_FOUND", message=f"{m.group(1)} is not installed"))
+        if "perm" in kinds and not self._perm:
+            self._perm = True
+            new.append(Issue(code="PERMISSION_DENIED", message="Permission denied (EACCES)"))
+        if "port" in kinds and not self._port:
+            self._port = True
+            new.append(Issue(code="PORT_IN_USE", message="Port already in use"))
+        return new
+
+    def result(self) -> Dict:
+        self.close()
+        issues: List[Issue] = []
+        suggestions: List[Suggestion] = []
+
+        # Missing modules
+        for mod in self._modules:
+            issues.append(Issue(code="MISSING_MODULE", message=f"Missing module '{mod}'", extra={"module": mod}))
+            if _SAFE_PKG_RE.match(mod):
+                suggestions.append(Suggestion(
+                    title=f"Install missing module {mod}",
+                    explanation=f"The build failed because module '{mod}' was not found.",
+                    safe=True,
+                    kind="install",
+                    data={"packages": [mod], "dev": False}
+                ))
+
+        # TS errors, plus suggestions for missing type declarations
+        issues.extend(self._ts)
+        for mod in self._ts_types:
             if _SAFE_PKG_RE.match(mod):
                 suggestions.append(Suggestion(
                     title=f"Install types for {mod}",
@@ -134,65 +228,87 @@ def analyze_build_output(stdout: str, stderr: str) -> Dict:
                     data={"packages": [f"@types/{mod.lstrip('@').replace('/', '__')}"], "dev": True}
                 ))
 
-    # ESM/CJS
-    esm = _extract_esm_cjs(text)
-    if esm:
-        issues.append(esm)
-        suggestions.append(Suggestion(
-            title="Fix ESM/CJS configuration",
-            explanation="Consider setting package.json 'type' to 'module' or adjust tsconfig 'module' and imports.",
-            safe=False,
-            kind="config",
-        ))
-
-    # Tool missing
-    tool = _extract_tool_missing(text)
-    if tool:
-        issues.append(tool)
-        suggestions.append(Suggestion(
-            title=f"Install required tool: {tool.message}",
-            explanation="Install the missing tool and retry.",
-            safe=False,
-        ))
-
-    # Permission / Port
-    issues.extend(_extract_permission_or_port(text))
-
-    # Confidence heuristic
-    confidence = 0.3
-    if any(i.code == "MISSING_MODULE" for i in issues):
-        confidence = max(confidence, 0.85)
-    if any(i.code.startswith("TS") for i in issues):
-        confidence = max(confidence, 0.7)
-    if any(i.code in ("ESM_CJS_MISMATCH", "TOOL_NOT_FOUND") for i in issues):
-        confidence = max(confidence, 0.6)
-
-    # Serialize to plain dicts
-    out = {
-        "issues": [
-            {
-                "code": i.code,
-                "message": i.message,
-                **({"file": i.file} if i.file else {}),
-                **({"line": i.line} if i.line is not None else {}),
-                **({"column": i.column} if i.column is not None else {}),
-                **({"extra": i.extra} if i.extra else {}),
-            }
-            for i in issues
-        ],
-        "suggestions": [
-            {
-                "title": s.title,
-                "explanation": s.explanation,
-                "safe": s.safe,
-                **({"kind": s.kind} if s.kind else {}),
-                **({"data": s.data} if s.data else {}),
-            }
-            for s in suggestions
-        ],
-        "confidence": round(confidence, 2),
-    }
-    return out
+        # ESM/CJS
+        if self._esm:
+            issues.append(Issue(code="ESM_CJS_MISMATCH", message="ESM/CJS interop issue detected"))
+            suggestions.append(Suggestion(
+                title="Fix ESM/CJS configuration",
+                explanation="Consider setting package.json 'type' to 'module' or adjust tsconfig 'module' and imports.",
+                safe=False,
+                kind="config",
+            ))
+
+        # Tool missing (first by preference)
+        tool = next((t for t in _TOOLS if t in self._tools), None)
+        if tool:
+            issues.append(Issue(code="TOOL_NOT_FOUND", message=f"{tool} is not installed"))
+            suggestions.append(Suggestion(
+                title=f"Install required tool: {tool} is not installed",
+                explanation="Install the missing tool and retry.",
+                safe=False,
+            ))
+
+        # Permission / Port
+        if self._perm:
+            issues.append(Issue(code="PERMISSION_DENIED", message="Permission denied (EACCES)"))
+        if self._port:
+            issues.append(Issue(code="PORT_IN_USE", message="Port already in use"))
+
+        # Confidence heuristic
+        confidence = 0.3
+        if any(i.code == "MISSING_MODULE" for i in issues):
+            confidence = max(confidence, 0.85)
+        if any(i.code.startswith("TS") for i in issues):
+            confidence = max(confidence, 0.7)
+        if any(i.code in ("ESM_CJS_MISMATCH", "TOOL_NOT_FOUND") for i in issues):
+            confidence = max(confidence, 0.6)
+
+        # Serialize to plain dicts
+        out = {
+            "issues": [
+                {
+                    "code": i.code,
+                    "message": i.message,
+                    **({"file": i.file} if i.file else {}),
+                    **({"line": i.line} if i.line is not None else {}),
+                    **({"column": i.column} if i.column is not None else {}),
+                    **({"extra": i.extra} if i.extra else {}),
+                }
+                for i in issues
+            ],
+            "suggestions": [
+                {
+                    "title": s.title,
+                    "explanation": s.explanation,
+                    "safe": s.safe,
+                    **({"kind": s.kind} if s.kind else {}),
+                    **({"data": s.data} if s.data else {}),
+                }
+                for s in suggestions
+            ],
+            "confidence": round(confidence, 2),
+        }
+        if self._ts_dropped:
+            out["dropped_issues"] = self._ts_dropped
+        return out
+
+
+def is_fatal(issue: Issue) -> bool:
+    """Whether `issue` dooms the run and has a safe automatic fix (installing a missing package)."""
+    return issue.code == "MISSING_MODULE" and bool(_SAFE_PKG_RE.match(str((issue.extra or {}).get("module", ""))))
+
+
+_FEED_SIZE = 1 << 20
+
+
+def analyze_build_output(stdout: str, stderr: str) -> Dict:
+    """Analyze a finished command's output (fed in 1 MB slices to bound temporary copies)."""
+    analyzer = BuildLogAnalyzer()
+    text_parts = [stdout or "", "\n", stderr] if stderr else [stdout or ""]
+    for text in text_parts:
+        for i in range(0, len(text), _FEED_SIZE):
+            analyzer.feed(text[i:i + _FEED_SIZE])
+    return analyzer.result()
 
 
 def pick_package_manager(cwd: Optional[str]) -> str:
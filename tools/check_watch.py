@@ -0,0 +1,494 @@
+"""
+Watch mode for `quick_check`: a live diagnostics table kept current by
+filesystem events.
+
+With `MUONRY_QUICK_CHECK_WATCH=1` the first `quick_check` on a directory
+starts a `CheckWatcher` for it, and later calls on that directory (or anything
+below it) are answered from the watcher's table instead of re-checking:
+
+- changes arrive through inotify (via ctypes, recursive, no extra
+  dependency); where inotify is unavailable or out of watches, a stat scan
+  every `MUONRY_QUICK_CHECK_WATCH_POLL_MS` (default 500) is used instead;
+- only finished writes trigger a recheck: inotify reports a file once it is
+  closed after writing (or renamed into place), never on each write() of a
+  save, and the stat scan reports a file only once its (mtime, size) has
+  stayed the same across two scans, so half-written files are not checked;
+- the table holds one entry per *unit*: each .py file for Python; for Rust
+  and JS each `Cargo.toml` / `tsconfig.json` project (or each .rs file when
+  there is no Cargo project); a changed file rechecks only its own unit, so
+  an edit in one crate re-runs `cargo check` for that crate alone, and adding
+  or removing a project manifest rescans the unit list;
+- before answering, `snapshot()` syncs with the watcher thread: every event
+  queued by edits made before the call has been processed, so an answer is
+  never older than the caller's last write.
+
+Units are checked with `quick_check_tool` itself (Python files go straight
+to the content-hash cache in `tools.quick_check`).
+"""
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from tools.quick_check import SKIP_DIRS, default_jobs, default_syntax_cache, find_projects, source_files
+
+logger = logging.getLogger("muonry.check_watch")
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+_MARKERS = {"rust": "Cargo.toml", "js": "tsconfig.json"}
+_SUFFIXES = {
+    "python": (".py",),
+    "rust": (".rs", "Cargo.toml", "Cargo.lock"),
+    "js": (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".json"),
+}
+_MAX_WATCHERS = 8
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+# No IN_MODIFY: a save's truncate and each write() fire separately; IN_CLOSE_WRITE marks it done.
+# IN_CREATE is only acted on for directories (a new file is reported when its writer closes it).
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _skipped(root: Path, path: Path) -> bool:
+    return any(part in SKIP_DIRS or part.startswith(".") for part in path.relative_to(root).parts[:-1])
+
+
+def watch_enabled() -> bool:
+    return str(os.getenv("MUONRY_QUICK_CHECK_WATCH", "0")).strip().lower() in _TRUTHY
+
+
+def _walk_dirs(root: Path):
+    for d, dirs, _ in os.walk(root):
+        dirs[:] = [x for x in dirs if x not in SKIP_DIRS and not x.startswith(".")]
+        yield Path(d)
+
+
+class _Inotify:
+    """Recursive inotify watch on `root`; `read()` drains queued events without blocking."""
+
+    def __init__(self, root: Path) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+        self._wds: Dict[int, Path] = {}
+        try:
+            self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, root: Path) -> None:
+        for d in _walk_dirs(root):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(d)), _MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOENT:
+                    continue  # removed while walking
+                raise OSError(err, f"inotify_add_watch failed for {d}")
+            self._wds[wd] = d
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read(self) -> Tuple[Set[Path], bool]:
+        """(changed paths, rescan needed) for every event queued so far."""
+        changed: Set[Path] = set()
+        rescan = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            off = 0
+            while off + _EVENT.size <= len(buf):
+                wd, mask, _, length = _EVENT.unpack_from(buf, off)
+                name = buf[off + _EVENT.size: off + _EVENT.size + length].rstrip(b"\0")
+                off += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._wds.pop(wd, None)
+                    continue
+                base = self._wds.get(wd)
+                if base is None:
+                    continue
+                path = base / os.fsdecode(name) if name else base
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            self._add_tree(path)
+                        except OSError:
+                            rescan = True
+                    rescan = True  # files appeared or vanished with the directory
+                elif not mask & IN_CREATE:
+                    changed.add(path)
+        return changed, rescan
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _Poller:
+    """Stat-scan fallback: `read()` reports files whose (mtime, size) changed and then settled."""
+
+    def __init__(self, root: Path, suffixes: Tuple[str, ...]) -> None:
+        self.root = root
+        self.suffixes = suffixes
+        self._stats = self._scan()  # as last reported
+        self._last = dict(self._stats)  # as seen by the previous scan
+        self.unsettled = False  # some file changed but was still changing at the last scan
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        out: Dict[Path, Tuple[int, int]] = {}
+        for d in _walk_dirs(self.root):
+            try:
+                entries = list(os.scandir(d))
+            except OSError:
+                continue
+            for e in entries:
+                if e.name.endswith(self.suffixes) and e.is_file():
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    out[Path(e.path)] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def fileno(self) -> None:
+        return None
+
+    def read(self) -> Tuple[Set[Path], bool]:
+        new = self._scan()
+        last, self._last = self._last, new
+        changed: Set[Path] = set()
+        self.unsettled = False
+        for p in new.keys() | self._stats.keys():
+            cur = new.get(p)
+            if cur == self._stats.get(p):
+                continue
+            if cur != last.get(p):
+                self.unsettled = True  # still being written; look again next scan
+                continue
+            changed.add(p)
+            if cur is None:
+                self._stats.pop(p, None)
+            else:
+                self._stats[p] = cur
+        return changed, False
+
+    def close(self) -> None:
+        pass
+
+
+class CheckWatcher:
+    """Background thread keeping `quick_check` results for `root` up to date."""
+
+    def __init__(self, root: Path, kind: str, *, max_files: int = 20000, timeout_ms: int = 120000) -> None:
+        self.root = root.resolve()
+        self.kind = kind
+        self.max_files = max_files
+        self.timeout_ms = timeout_ms
+        self.table: Dict[Path, Dict[str, Any]] = {}  # unit -> check entry (python) or quick_check result
+        self.projects: List[Path] = []
+        self.truncated = False
+        self.backend = "none"
+        self.rechecks = 0
+        self._source: Any = None
+        self._cond = threading.Condition()
+        self._requested = 0
+        self._done = -1
+        self._stopped = False
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "CheckWatcher":
+        try:
+            self._source = _Inotify(self.root)
+            self.backend = "inotify"
+        except Exception as e:
+            logger.debug(f"check_watch: inotify unavailable ({e}), polling instead")
+            self._source = _Poller(self.root, _SUFFIXES[self.kind])
+            self.backend = "poll"
+        self._thread = threading.Thread(target=self._run, name=f"quick-check-watch-{self.kind}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._source is not None:
+            self._source.close()
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def sync(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every change made before this call has been rechecked."""
+        with self._cond:
+            self._requested += 1
+            want = self._requested
+        self._wake()
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done >= want or self._stopped, timeout) and not self._stopped
+
+    # --- watcher thread ----------------------------------------------------
+
+    def _run(self) -> None:
+        interval = max(10, _int_env("MUONRY_QUICK_CHECK_WATCH_POLL_MS", 500)) / 1000
+        settle = min(interval, 0.02)
+        first = True
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                requested = self._requested
+            try:
+                if first:
+                    self._rescan()
+                    first = False
+                else:
+                    changed, rescan = self._source.read()
+                    if rescan or any(p.name == _MARKERS.get(self.kind) for p in changed):
+                        self._rescan()
+                    elif changed:
+                        self._recheck(changed)
+            except Exception as e:
+                logger.debug(f"check_watch: recheck failed: {e}")
+            unsettled = getattr(self._source, "unsettled", False)
+            if not unsettled:  # a sync waits until pending polled changes have settled
+                with self._cond:
+                    self._done = requested
+                    self._cond.notify_all()
+            with self._cond:
+                waiting = self._requested > self._done
+            timeout = None if self.backend == "inotify" else (settle if unsettled and waiting else interval)
+            fds = [self._wake_r] + ([self._source.fileno()] if self._source.fileno() is not None else [])
+            try:
+                select.select(fds, [], [], timeout)
+            except (OSError, ValueError):
+                return
+            try:
+                while os.read(self._wake_r, 4096):
+                    pass
+            except (BlockingIOError, OSError):
+                pass
+
+    def _units(self) -> List[Path]:
+        if self.kind == "python":
+            files = source_files(self.root, ".py", self.max_files)
+            self.truncated = len(files) >= self.max_files
+            return [f for f in files if not _skipped(self.root, f)]  # only what inotify can see
+        self.projects = find_projects(self.root, _MARKERS[self.kind])
+        if self.projects:
+            return list(self.projects)
+        if self.kind == "rust":
+            files = source_files(self.root, ".rs", self.max_files)
+            self.truncated = len(files) >= self.max_files
+            return files
+        return [self.root]
+
+    def _unit_of(self, path: Path) -> Optional[Path]:
+        if self.kind == "python":
+            return path if path.suffix == ".py" else None
+        for project in self.projects:
+            if project == path or project in path.parents:
+                return project
+        if self.kind == "rust" and not self.projects and path.suffix == ".rs":
+            return path
+        if self.kind == "js" and not self.projects:
+            return self.root
+        return None
+
+    def _rescan(self) -> None:
+        units = self._units()
+        keep = set(units)
+        with self._cond:
+            self.table = {u: v for u, v in self.table.items() if u in keep}
+        self._check(units)
+
+    def _recheck(self, changed: Set[Path]) -> None:
+        units: Set[Path] = set()
+        for path in changed:
+            unit = self._unit_of(path)
+            if unit is None:
+                continue
+            if self.kind == "python" and not unit.exists():
+                with self._cond:
+                    self.table.pop(unit, None)
+                continue
+            units.add(unit)
+        if units:
+            self._check(sorted(units))
+
+    def _check(self, units: List[Path]) -> None:
+        self.rechecks += len(units)
+        if self.kind == "python":
+            checks, _ = default_syntax_cache().open(self.root).check(units)
+            with self._cond:
+                self.table.update(zip(units, checks))
+            return
+        from tools.toolset import quick_check_tool
+
+        async def run_all() -> List[str]:
+            sem = asyncio.Semaphore(default_jobs())
+
+            async def one(u: Path) -> str:
+                async with sem:
+                    return await quick_check_tool(self.kind, str(u), self.max_files, self.timeout_ms, watch=False)
+
+            return await asyncio.gather(*[one(u) for u in units])
+
+        results: Dict[Path, Dict[str, Any]] = {}
+        for unit, raw in zip(units, asyncio.run(run_all())):
+            try:
+                results[unit] = json.loads(raw)
+            except Exception:
+                continue
+        with self._cond:
+            self.table.update(results)
+
+    # --- answers -----------------------------------------------------------
+
+    def covers(self, target: Path) -> bool:
+        return target == self.root or self.root in target.parents
+
+    def snapshot(self, target: Path, max_files: int, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """quick_check result for `target` from the live table (None when it cannot answer)."""
+        if not self.sync(timeout) or self.truncated:
+            return None
+        target = target.resolve()
+        with self._cond:
+            table = dict(self.table)
+        if self.kind == "python":
+            keys = sorted(u for u in table if u == target or target in u.parents)[:max_files]
+            if not keys and target.is_file():
+                return None
+            checks = [table[k] for k in keys]
+            ok = sum(1 for c in checks if c.get("ok"))
+            return {
+                "status": "ok" if ok == len(checks) else "error",
+                "kind": self.kind,
+                "target": str(target),
+                "checks": checks,
+                "errors": [],
+                "suggestions": [],
+                "summary": f"Python syntax OK: {ok}/{len(checks)} files",
+                "parsed": 0,
+                "watch": self.backend,
+            }
+        keys = sorted(u for u in table if u == target or target in u.parents)
+        if not keys:
+            keys = [u for u in table if u in target.parents][:1]  # target inside one project
+        if not keys:
+            return None
+        results = [table[k] for k in keys]
+        if len(results) == 1:
+            return {**results[0], "watch": self.backend}
+        merged: Dict[str, Any] = {
+            "status": "error" if any(r.get("status") != "ok" for r in results) else "ok",
+            "kind": self.kind,
+            "target": str(target),
+            "checks": [c for r in results for c in r.get("checks", [])],
+            "errors": [e for r in results for e in r.get("errors", [])],
+            "suggestions": list(dict.fromkeys(s for r in results for s in r.get("suggestions", []))),
+            "watch": self.backend,
+        }
+        if self.projects:
+            ok = sum(1 for r in results if r.get("status") == "ok")
+            merged["summary"] = f"{self.kind} projects checked (watch): {ok}/{len(results)} OK"
+        else:
+            ok = sum(1 for c in merged["checks"] if c.get("exit_code") == 0)
+            merged["summary"] = f"Rust syntax OK (rustc metadata): {ok}/{len(merged['checks'])} files"
+        return merged
+
+
+_WATCHERS: Dict[Tuple[str, Path], CheckWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def watcher_for(kind: str, target: Path, *, timeout_ms: int = 120000) -> Optional[CheckWatcher]:
+    """Running watcher covering `target`, starting one for its directory if needed."""
+    if kind not in _SUFFIXES:
+        return None
+    target = target.resolve()
+    with _WATCHERS_LOCK:
+        for (k, _), w in _WATCHERS.items():
+            if k == kind and w.covers(target):
+                return w
+        root = target if target.is_dir() else target.parent
+        max_files = _int_env("MUONRY_QUICK_CHECK_WATCH_MAX_FILES", 20000)
+        w = CheckWatcher(root, kind, max_files=max_files, timeout_ms=timeout_ms).start()
+        _WATCHERS[(kind, w.root)] = w
+        if len(_WATCHERS) > _MAX_WATCHERS:
+            oldest = next(iter(_WATCHERS))
+            _WATCHERS.pop(oldest).stop()
+        logger.debug(f"check_watch: watching {w.root} for {kind} ({w.backend})")
+        return w
+
+
+def watch_answer(kind: str, target: Path, max_files: int, timeout_ms: int) -> Optional[Dict[str, Any]]:
+    """Answer a quick_check from a (possibly new) watcher; None falls back to a direct check."""
+    w = watcher_for(kind, target, timeout_ms=timeout_ms)
+    if w is None:
+        return None
+    return w.snapshot(target, max_files, timeout=max(1.0, timeout_ms / 1000))
+
+
+def stop_watchers() -> None:
+    with _WATCHERS_LOCK:
+        watchers = list(_WATCHERS.values())
+        _WATCHERS.clear()
+    for w in watchers:
+        w.stop()
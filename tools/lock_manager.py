@@ -0,0 +1,238 @@
+"""
+Hierarchical shared/exclusive file locks for concurrent workers.
+
+Replaces the flat `path -> worker` exclusive lock map:
+
+- locks are shared (`"s"`, readers) or exclusive (`"x"`, writers); any number
+  of owners may share a path, an exclusive lock excludes everyone else;
+- paths live in a trie keyed by path component, so a lock on a directory
+  (`"src/"`) covers everything below it and conflicts with locks on its
+  descendants, while each node keeps per-owner counts of the locks held below
+  it; a conflict check walks one root-to-node path instead of scanning every
+  lock;
+- a request is a *set* of locks acquired all-or-nothing in sorted path order,
+  so no owner ever holds some locks while waiting for others (no deadlock);
+- `acquire()` takes compatible locks immediately and otherwise waits in a
+  queue; each release grants, in arrival order, every queued request that has
+  become compatible;
+- grants are FIFO per conflict: a request is never granted ahead of an
+  earlier queued request it conflicts with (on the same path or an ancestor /
+  descendant), so read(f), write(f), read(f) runs in that order and a waiting
+  writer is not starved by a stream of readers. Requests on unrelated paths
+  still pass each other.
+
+Locks held by the same owner never conflict with each other.
+"""
+from __future__ import annotations
+
+import asyncio
+import posixpath
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+
+SHARED = "s"
+EXCLUSIVE = "x"
+
+LockRequest = Tuple[str, str]  # (path, mode)
+_Key = Tuple[str, ...]
+
+
+def lock_key(path: str) -> _Key:
+    """Trie key for a path: normalized components (`()` is the whole workspace)."""
+    p = posixpath.normpath(str(path).replace("\\", "/")).lstrip("/")
+    return () if p in ("", ".") else tuple(part for part in p.split("/") if part)
+
+
+def normalize(requests: Iterable[LockRequest]) -> List[Tuple[_Key, str]]:
+    """Merge duplicate paths (exclusive wins) and sort for ordered acquisition."""
+    merged: Dict[_Key, str] = {}
+    for path, mode in requests:
+        if not path:
+            continue
+        key = lock_key(path)
+        merged[key] = EXCLUSIVE if EXCLUSIVE in (mode, merged.get(key)) else SHARED
+    return sorted(merged.items())
+
+
+class _Node:
+    __slots__ = ("children", "holders", "below")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.holders: Dict[str, str] = {}  # owner -> mode held on this node
+        self.below: Dict[str, List[int]] = {}  # owner -> [shared, exclusive] held strictly below
+
+
+class LockManager:
+    """Trie of shared/exclusive locks with all-or-nothing acquisition."""
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self._held: Dict[str, Dict[_Key, str]] = {}
+        self._waiters: Deque[Tuple[str, List[Tuple[_Key, str]], asyncio.Future]] = deque()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, str]]) -> "LockManager":
+        """Build from (path, owner, mode) rows, e.g. a lock table snapshot."""
+        mgr = cls()
+        for path, owner, mode in rows:
+            mgr._grant(owner, [(lock_key(path), mode)])
+        return mgr
+
+    # --- checks ------------------------------------------------------------
+
+    def _conflicts(self, owner: str, key: _Key, mode: str) -> bool:
+        node = self._root
+        for depth in range(len(key) + 1):
+            for other, held in node.holders.items():
+                if other != owner and EXCLUSIVE in (held, mode):
+                    return True
+            if depth == len(key):
+                break
+            node = node.children.get(key[depth])
+            if node is None:
+                return False
+        for other, (shared, exclusive) in node.below.items():
+            if other != owner and (exclusive or (mode == EXCLUSIVE and shared)):
+                return True
+        return False
+
+    def can_acquire(self, owner: str, requests: Iterable[LockRequest]) -> bool:
+        return self._grantable(owner, normalize(requests), self._waiters)
+
+    def _grantable(self, owner: str, items: List[Tuple[_Key, str]], ahead: Iterable[Tuple[str, List[Tuple[_Key, str]], Any]]) -> bool:
+        """No conflict with held locks nor with any queued request in `ahead`."""
+        if any(self._conflicts(owner, k, m) for k, m in items):
+            return False
+        return not any(other != owner and _overlap(items, queued) for other, queued, _ in ahead)
+
+    # --- grant / release ---------------------------------------------------
+
+    def _grant(self, owner: str, items: List[Tuple[_Key, str]]) -> None:
+        held = self._held.setdefault(owner, {})
+        for key, mode in items:
+            if held.get(key) == EXCLUSIVE or held.get(key) == mode:
+                continue
+            if key in held:
+                self._drop(owner, key, held[key])
+            held[key] = mode
+            node = self._root
+            for part in key:
+                counts = node.below.setdefault(owner, [0, 0])
+                counts[mode == EXCLUSIVE] += 1
+                node = node.children.setdefault(part, _Node())
+            node.holders[owner] = mode
+
+    def _drop(self, owner: str, key: _Key, mode: str) -> None:
+        path = [self._root]
+        for part in key:
+            path.append(path[-1].children[part])
+        path[-1].holders.pop(owner, None)
+        for depth in range(len(key) - 1, -1, -1):
+            node = path[depth]
+            counts = node.below[owner]
+            counts[mode == EXCLUSIVE] -= 1
+            if counts == [0, 0]:
+                del node.below[owner]
+            child = path[depth + 1]
+            if not child.holders and not child.below and not child.children:
+                del node.children[key[depth]]
+
+    def acquire_nowait(self, owner: str, requests: Iterable[LockRequest]) -> bool:
+        """Take every lock in `requests` or none of them (never ahead of a conflicting waiter)."""
+        items = normalize(requests)
+        if not self._grantable(owner, items, self._waiters):
+            return False
+        self._grant(owner, items)
+        return True
+
+    def enqueue(self, owner: str, requests: Iterable[LockRequest]) -> asyncio.Future:
+        """Queue a request without awaiting; the future resolves once it is granted.
+
+        Requests enqueued one after another (e.g. a batch of calls, before any
+        of them awaits) are ordered exactly as enqueued. Pass the future to
+        `wait()`.
+        """
+        items = normalize(requests)
+        fut = asyncio.get_running_loop().create_future()
+        if self._grantable(owner, items, self._waiters):
+            self._grant(owner, items)
+            fut.set_result(None)
+        else:
+            self._waiters.append((owner, items, fut))
+        return fut
+
+    async def acquire(self, owner: str, requests: Iterable[LockRequest]) -> None:
+        """Wait until every lock in `requests` can be taken at once."""
+        await self.wait(owner, self.enqueue(owner, requests))
+
+    async def wait(self, owner: str, fut: asyncio.Future) -> None:
+        """Await a request from `enqueue()`; cancelling withdraws it (or releases if granted)."""
+        try:
+            await fut
+        except asyncio.CancelledError:
+            self.withdraw(owner, fut)
+            raise
+
+    def withdraw(self, owner: str, fut: asyncio.Future) -> None:
+        """Give up a request from `enqueue()`: drop it if still queued, release it if granted."""
+        if fut.done() and not fut.cancelled():
+            self.release(owner)
+            return
+        self._waiters = deque(w for w in self._waiters if w[2] is not fut)
+        fut.cancel()
+        self._wake()  # requests queued behind this one may now be grantable
+
+    def release(self, owner: str) -> None:
+        """Drop every lock held by `owner` and wake compatible waiters."""
+        for key, mode in self._held.pop(owner, {}).items():
+            self._drop(owner, key, mode)
+        self._wake()
+
+    def _wake(self) -> None:
+        still: Deque[Tuple[str, List[Tuple[_Key, str]], asyncio.Future]] = deque()
+        for owner, items, fut in self._waiters:
+            if fut.done():
+                continue
+            if not self._grantable(owner, items, still):  # still blocked, or behind a blocked conflict
+                still.append((owner, items, fut))
+                continue
+            self._grant(owner, items)
+            fut.set_result(None)
+        self._waiters = still
+
+    @asynccontextmanager
+    async def hold(self, owner: str, requests: Iterable[LockRequest]) -> AsyncIterator[None]:
+        await self.acquire(owner, requests)
+        try:
+            yield
+        finally:
+            self.release(owner)
+
+    # --- introspection -----------------------------------------------------
+
+    def held(self) -> List[Tuple[str, str, str]]:
+        """(path, owner, mode) for every lock currently held."""
+        return [("/".join(k) or ".", owner, mode) for owner, keys in self._held.items() for k, mode in keys.items()]
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+
+def _overlap(a: List[Tuple[_Key, str]], b: List[Tuple[_Key, str]]) -> bool:
+    """True when two lock sets conflict: overlapping paths with at least one exclusive."""
+    for ka, ma in a:
+        for kb, mb in b:
+            if EXCLUSIVE in (ma, mb) and (ka[: len(kb)] == kb or kb[: len(ka)] == ka):
+                return True
+    return False
+
+
+def task_locks(file_path: Optional[str], reads: Any = None) -> List[LockRequest]:
+    """Locks a task needs: exclusive on the file it writes, shared on the ones it reads."""
+    reqs: List[LockRequest] = [(r, SHARED) for r in (reads or []) if r]
+    if file_path:
+        reqs.append((file_path, EXCLUSIVE))
+    return reqs
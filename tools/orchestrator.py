@@ -1,13 +1,18 @@
 import asyncio
-import orjson
 import time
+import re
 import os
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
 import logging
 import dotenv
+
+from tools.task_queue import TaskQueue
+from tools.task_store import TaskStore
+from tools.worker_pool import ProcessWorkerPool, backend_from_env
+from muonry.plan_cache import default_plan_cache
 # concurrency in single threaded environments is hell! use with caution!
 dotenv.load_dotenv()
 
@@ -37,6 +42,39 @@ try:
 except Exception:
     SATYA_AVAILABLE = False
 
+
+def _desired_subtask_count(main_task: str) -> Optional[int]:
+    """Subtask count requested by the task text (e.g. "7 stories"), if any."""
+    m = re.search(r"(\d{1,2})\s*(?:stories|story|tasks|subtasks|chapters|files)", main_task, re.IGNORECASE)
+    if m:
+        val = int(m.group(1))
+        if 1 <= val <= 20:
+            return val
+    return None
+
+
+def _target_folder(main_task: str) -> Optional[str]:
+    """Folder named in the task text (exact case), if any."""
+    folder_patterns = [
+        r'folder called\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?',
+        r'create\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?\s+folder',
+        r'in\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?\s+folder',
+        r'folder\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?',
+    ]
+    for pattern in folder_patterns:
+        q = re.search(pattern, main_task, re.IGNORECASE)  # Case insensitive search but preserve original case
+        if q:
+            return q.group(1)
+    # Fall back: look for a simple token in quotes
+    q = re.search(r"'([\w\-\/]+)'", main_task)
+    return q.group(1) if q else None
+
+
+def _plan_entry(task: "SubTask") -> Dict[str, Any]:
+    """The plan-relevant fields of a subtask, as stored in the plan cache."""
+    return {"id": task.id, "description": task.description, "file_path": task.file_path, "reads": task.reads}
+
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress" 
@@ -55,6 +93,8 @@ class SubTask:
     description: str
     file_path: Optional[str]
     status: TaskStatus
+    priority: int = 0  # higher runs first
+    reads: Optional[List[str]] = None  # files/dirs read (shared locks); file_path is locked exclusively
     worker_id: Optional[str] = None
     created_at: float = 0.0
     started_at: Optional[float] = None
@@ -76,7 +116,7 @@ class OrchestratorState:
     main_task: str
     subtasks: List[SubTask]
     workers: List[WorkerAgent]
-    file_locks: Dict[str, str]  # file_path -> worker_id
+    file_locks: Dict[str, str]  # file_path -> worker_id (exclusive locks)
     created_at: float
     completed_at: Optional[float] = None
 
@@ -85,11 +125,19 @@ class OrchestratorState:
 class AsyncWorkerAgent:
     """Real async worker that does actual concurrent work"""
     
-    def __init__(self, worker_id: str, orchestrator: 'TaskOrchestrator'):
+    def __init__(self, worker_id: str, orchestrator: 'TaskOrchestrator', on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
         self.worker_id = worker_id
         self.orchestrator = orchestrator
         self.is_running = False
         self.current_task = None
+        self.on_event = on_event  # task events (claimed/finished/failed), e.g. streamed from a worker process
+    
+    def _emit(self, event: Dict[str, Any]):
+        if self.on_event is not None:
+            try:
+                self.on_event(event)
+            except Exception:
+                pass
         
     async def start_working(self):
         """Start the worker - continuously looks for and executes tasks"""
@@ -99,20 +147,18 @@ class AsyncWorkerAgent:
         
         while self.is_running:
             try:
-                # Try to get a task
+                # Park until a task is claimable (no polling)
                 logger.info(f"[{self.worker_id}] Looking for tasks...")
-                task = await self._get_next_task()
+                row = await self.orchestrator.queue.get(self.worker_id)
+                ready_at = row.pop("ready_at", None)
+                task = SubTask(**row)
                 
-                if task:
-                    # Working on task silently
-                    logger.info(f"[{self.worker_id}] CLAIMED task {task.id} ({task.description})")
-                    await self._execute_task(task)
-                    # Task completed silently
-                    logger.info(f"[{self.worker_id}] FINISHED task {task.id}")
-                else:
-                    # No tasks available, wait a bit
-                    logger.info(f"[{self.worker_id}] No tasks found, waiting...")
-                    await asyncio.sleep(0.5)
+                latency = TaskQueue.started(ready_at)
+                logger.info(f"[{self.worker_id}] CLAIMED task {task.id} ({task.description}) after {latency * 1e6:.0f}µs")
+                self._emit({"type": "claimed", "task_id": task.id, "dispatch_us": round(latency * 1e6)})
+                await self._execute_task(task)
+                # Task completed silently
+                logger.info(f"[{self.worker_id}] FINISHED task {task.id}")
                     
             except Exception as e:
                 # Error handled silently
@@ -120,86 +166,13 @@ class AsyncWorkerAgent:
                 await asyncio.sleep(1)
     
     async def _get_next_task(self) -> Optional[SubTask]:
-        """Get next available task for this worker - with proper concurrent claiming"""
-        
-        # Use file locking to prevent race conditions
-        import fcntl
-        import tempfile
-        
-        lock_file = tempfile.NamedTemporaryFile(mode='w', delete=False, 
-                                               suffix=f'_{self.worker_id}.lock')
-        
-        try:
-            # Try to acquire exclusive lock for task claiming
-            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            
-            state = self.orchestrator._load_state()
-            if not state:
-                logger.debug(f"[{self.worker_id}] No orchestrator state available yet")
-                return None
-            
-
-            
-            # Find first available pending task
-            for task in state.subtasks:
-                # Handle both enum and string status (from JSON deserialization)
-                task_status = task.status.value if hasattr(task.status, 'value') else str(task.status)
-                if task_status == "pending":
-                    # Check if file is locked by another worker
-                    if task.file_path and task.file_path in state.file_locks:
-                        logger.debug(f"[{self.worker_id}] Skipping task {task.id} due to lock on {task.file_path}")
-                        continue
-                    
-                    # ATOMIC CLAIM - update immediately
-                    task.status = "in_progress"  # Use string for consistency with JSON
-                    task.worker_id = self.worker_id
-                    task.started_at = time.time()
-                    
-                    # Lock file if needed
-                    if task.file_path:
-                        state.file_locks[task.file_path] = self.worker_id
-                    
-                    # Update worker status
-                    for worker in state.workers:
-                        if worker.id == self.worker_id:
-                            worker.status = WorkerStatus.WORKING
-                            worker.current_task_id = task.id
-                            worker.current_file = task.file_path
-                            break
-                    
-                    # Save state immediately to prevent other workers from taking same task
-                    self.orchestrator._save_state(state)
-                    
-                    logger.debug(f"[{self.worker_id}] Claimed task {task.id}; file_lock={task.file_path or 'None'}")
-                    
-                    # Release lock and return claimed task
-                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
-                    
-                    # Add small delay after claiming to give other workers a chance
-                    await asyncio.sleep(0.05)  # 50ms delay
-                    return task
-            
-            # No tasks available
-
-            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        """Claim the next available task for this worker (atomic in the task store)"""
+        row = self.orchestrator.queue.claim(self.worker_id)
+        if row is None:
             logger.debug(f"[{self.worker_id}] No pending tasks found")
             return None
-            
-        except (IOError, OSError):
-            # Lock failed - another worker is claiming tasks
-            # Add random backoff to prevent same worker from dominating
-            import random
-            backoff = random.uniform(0.1, 0.5)  # Random delay 100-500ms
-
-            logger.debug(f"[{self.worker_id}] Task claim lock busy, backing off {backoff:.3f}s")
-            await asyncio.sleep(backoff)
-            return None
-        finally:
-            try:
-                lock_file.close()
-                os.unlink(lock_file.name)
-            except:
-                pass
+        logger.debug(f"[{self.worker_id}] Claimed task {row['id']}; file_lock={row['file_path'] or 'None'}")
+        return SubTask(**row)
     
     async def _execute_task(self, task: SubTask):
         """Actually execute the task using real tools"""
@@ -209,43 +182,16 @@ class AsyncWorkerAgent:
             logger.info(f"[{self.worker_id}] Executing task {task.id}: {task.description}")
             result = await self._do_real_work(task)
             
-            # Mark task as completed
-            state = self.orchestrator._load_state()
-            if state:
-                for t in state.subtasks:
-                    if t.id == task.id:
-                        t.status = TaskStatus.COMPLETED
-                        t.completed_at = time.time()
-                        t.result = result
-                        break
-                
-                # Free up worker
-                for worker in state.workers:
-                    if worker.id == self.worker_id:
-                        worker.status = WorkerStatus.IDLE
-                        worker.current_task_id = None
-                        worker.current_file = None
-                        worker.tasks_completed += 1
-                        break
-                
-                # Release file lock
-                if task.file_path and task.file_path in state.file_locks:
-                    del state.file_locks[task.file_path]
-                
-                self.orchestrator._save_state(state)
-                logger.info(f"[{self.worker_id}] Completed task {task.id}")
+            # Mark task as completed, free the worker and release the file lock
+            self.orchestrator.queue.finish(task.id, result=result)
+            logger.info(f"[{self.worker_id}] Completed task {task.id}")
+            self._emit({"type": "finished", "task_id": task.id, "result": result})
                 
         except Exception as e:
             # Mark task as failed
-            state = self.orchestrator._load_state()
-            if state:
-                for t in state.subtasks:
-                    if t.id == task.id:
-                        t.status = TaskStatus.FAILED
-                        t.error = str(e)
-                        break
-                self.orchestrator._save_state(state)
+            self.orchestrator.queue.finish(task.id, error=str(e))
             logger.exception(f"[{self.worker_id}] Task {task.id} failed: {e}")
+            self._emit({"type": "failed", "task_id": task.id, "error": str(e)})
                 
         self.current_task = None
     
@@ -260,23 +206,33 @@ class AsyncWorkerAgent:
         from bhumi.base_client import BaseLLMClient, LLMConfig
         
         task_desc = task.description.lower()
-        
-        # Initialize Bhumi client for AI-powered work using execution model
-        from bhumi.base_client import BaseLLMClient, LLMConfig
             
         if not self.orchestrator.execution_config:
             return await self._do_manual_work(task)
-                
-        config = LLMConfig(**self.orchestrator.execution_config)
-        client = BaseLLMClient(config)
-        
-        # Register the REAL assistant tools (excluding orchestrator to prevent circular dependency)
-        logger.info(f"[{self.worker_id}] Registering worker tools...")
-        await self._register_worker_tools(client)
-        logger.info(f"[{self.worker_id}] Worker tools registered: {len(client.tool_registry.get_definitions()) if hasattr(client, 'tool_registry') else 'UNKNOWN'}")
+
+        # Shared pooled client: worker tools are registered once per client, not per task
+        from muonry.client_pool import default_pool
+        pool = default_pool()
+        client = await pool.get(
+            self.orchestrator.execution_config,
+            profile="orchestrator-worker",
+            setup=self._register_worker_tools,
+            setup_key="worker-tools",
+        )
+        try:
+            return await self._route_ai_work(client, task)
+        finally:
+            pool.release(client)
+
+    async def _route_ai_work(self, client: Any, task: SubTask) -> str:
+        """Run `task` on the leased worker client via the matching specialised prompt."""
+        task_desc = task.description.lower()
+        logger.debug(f"[{self.worker_id}] Using pooled worker client: {len(client.tool_registry.get_definitions()) if hasattr(client, 'tool_registry') else 'UNKNOWN'} tools")
         
         # Add orchestrator exclusion flag to prevent workers from calling orchestrator
         client._orchestrator_mode = True  # Flag to prevent circular calls
+        # Route completions through the record/replay transport (no-op when live)
+        client = self.orchestrator.transport.wrap(client, "orchestrator-worker")
             
 
             
@@ -301,7 +257,10 @@ class AsyncWorkerAgent:
             return await self._ai_generic_work(client, task)
     
     async def _register_worker_tools(self, client: 'BaseLLMClient'):
-        """Register the same tools as the main assistant (excluding orchestrator to prevent circular dependency)"""
+        """Register the same tools as the main assistant (excluding orchestrator to prevent circular dependency)
+
+        Runs once per pooled client; the client (and these tools) are shared by all workers.
+        """
         
         # Import assistant tool functions
         import os
@@ -315,7 +274,7 @@ class AsyncWorkerAgent:
                 path = Path(file_path)
                 path.parent.mkdir(parents=True, exist_ok=True)
                 path.write_text(content, encoding='utf-8')
-                logger.info(f"[{self.worker_id}] Wrote file {file_path} ({len(content)} chars)")
+                logger.info(f"[worker-tools] Wrote file {file_path} ({len(content)} chars)")
                 return f"Successfully wrote {len(content)} characters to {file_path}"
             except Exception as e:
                 return f"Error writing file {file_path}: {str(e)}"
@@ -360,7 +319,7 @@ class AsyncWorkerAgent:
                 if result.stderr:
                     output += f"STDERR:\n{result.stderr}\n"
                 
-                logger.info(f"[{self.worker_id}] Shell: {command} (exit {result.returncode})")
+                logger.info(f"[worker-tools] Shell: {command} (exit {result.returncode})")
                 return output
             except Exception as e:
                 return f"Error running command: {str(e)}"
@@ -712,22 +671,45 @@ This demonstrates real concurrent work execution.
 class TaskOrchestrator:
     def __init__(self, max_workers: int = 3):
         self.max_workers = max_workers
-        # Use absolute path to ensure state file is accessible
-        self.state_file = Path(".orchestrator_state.json")
+        # Shared SQLite task store (WAL); MUONRY_ORCHESTRATOR_DB overrides the location
+        self.state_file = Path(os.getenv("MUONRY_ORCHESTRATOR_DB") or ".orchestrator_state.db")
+        self._store: Optional[TaskStore] = None
+        self._queue: Optional[TaskQueue] = None
 
         self.worker_tasks = {}  # Track actual asyncio tasks
+        self.worker_pool: Optional[ProcessWorkerPool] = None  # process backend
         
         # Multi-model configuration for specialized tasks
         self.planning_config = None  # Cerebras Qwen for planning
         self.execution_config = None  # Groq Llama for execution
+        from muonry.transport import default_transport
+        self.transport = default_transport()
         self._setup_model_configs()
         self.debug = DEBUG_ENV
         logger.debug(f"TaskOrchestrator initialized (max_workers={self.max_workers}, debug={self.debug})")
+    
+    @property
+    def store(self) -> TaskStore:
+        """Task store for `state_file` (reopened if the path changes)"""
+        if self._store is None or self._store.path != self.state_file:
+            self._store = TaskStore(self.state_file)
+        return self._store
+    
+    @property
+    def queue(self) -> TaskQueue:
+        """Event-driven dispatcher over `store`; wakes parked workers on changes"""
+        store = self.store
+        if self._queue is None or self._queue.store is not store:
+            self._queue = TaskQueue(store)
+        return self._queue
         
     def _setup_model_configs(self):
         """Setup specialized models for different orchestrator tasks"""
         api_key = os.getenv('CEREBRAS_API_KEY')
         api_key_groq = os.getenv('GROQ_API_KEY') 
+        # Replayed sessions never reach the provider, so keys are optional
+        if not api_key and self.transport.offline:
+            api_key = 'replay'
         # Fallback: if GROQ key not provided, reuse Cerebras key
         if api_key and not api_key_groq:
             api_key_groq = api_key
@@ -760,7 +742,7 @@ class TaskOrchestrator:
         # FORCE RESET: Always clear any existing state when creating new plan
         if self.state_file.exists():
             logger.info("Resetting existing orchestrator state")
-            self.state_file.unlink()
+            self.store.clear()
         
         # AI-powered task decomposition using planning model
         logger.info("Starting AI task decomposition")
@@ -789,12 +771,51 @@ class TaskOrchestrator:
         return state
     
     async def _decompose_task_with_ai(self, main_task: str, context: str) -> List[SubTask]:
-        """AI-powered task decomposition using Cerebras Qwen planning model"""
+        """AI-powered task decomposition, reusing cached plans for (near-)identical tasks"""
         
         if not self.planning_config:
                 # Using fallback decomposition
             return self._decompose_task_fallback(main_task, context)
-            
+
+        plan_cache = default_plan_cache()
+        cache_task = f"{main_task}\n{context}" if context else main_task
+        cache_scope = {
+            "tool": "orchestrator",
+            "model": self.planning_config.get("model"),
+            "count": _desired_subtask_count(main_task),
+            "folder": _target_folder(main_task),
+        }
+        hit = plan_cache.lookup(cache_task, cache_scope)
+        if hit and isinstance(hit.get("plan"), list) and hit["plan"]:
+            logger.info(f"Reusing cached plan ({len(hit['plan'])} subtasks, similarity {hit['similarity']:.2f})")
+
+            async def _refresh() -> Optional[List[Dict[str, Any]]]:
+                fresh = await self._plan_subtasks_with_ai(main_task, context)
+                return [_plan_entry(t) for t in fresh] if fresh else None
+
+            plan_cache.refresh_in_background(cache_task, cache_scope, _refresh)
+            now = time.time()
+            return [
+                SubTask(
+                    id=str(t.get('id') or f'ai_task_{i+1}'),
+                    description=t.get('description') or f'AI task {i+1}',
+                    file_path=t.get('file_path'),
+                    reads=t.get('reads') or None,
+                    status=TaskStatus.PENDING,
+                    created_at=now,
+                )
+                for i, t in enumerate(hit["plan"])
+            ]
+
+        subtasks = await self._plan_subtasks_with_ai(main_task, context)
+        if not subtasks:
+            return self._decompose_task_fallback(main_task, context)
+        plan_cache.store(cache_task, [_plan_entry(t) for t in subtasks], cache_scope)
+        return subtasks
+
+    async def _plan_subtasks_with_ai(self, main_task: str, context: str) -> Optional[List[SubTask]]:
+        """Ask the Cerebras Qwen planning model for subtasks; None when planning fails"""
+
         try:
             from bhumi.base_client import BaseLLMClient, LLMConfig
             
@@ -808,47 +829,25 @@ class TaskOrchestrator:
             else:
                 extra_cfg = None
 
+            from muonry.client_pool import default_pool
             if extra_cfg:
                 config = LLMConfig(**self.planning_config, extra_config=extra_cfg)
                 logger.debug("Planning LLMConfig includes Satya response_format")
             else:
                 config = LLMConfig(**self.planning_config)
-            planning_client = BaseLLMClient(config)
+            planning_client = await default_pool().get(
+                config, profile="orchestrator-planner-schema" if extra_cfg else "orchestrator-planner"
+            )
             
             # Determine desired subtask count from the main task (e.g., "7 stories")
             import re as _re
-            desired_n = None
-            m = _re.search(r"(\d{1,2})\s*(?:stories|story|tasks|subtasks|chapters|files)", main_task, _re.IGNORECASE)
-            if m:
-                try:
-                    val = int(m.group(1))
-                    if 1 <= val <= 20:
-                        desired_n = val
-                except Exception:
-                    desired_n = None
+            desired_n = _desired_subtask_count(main_task)
 
             n_text = f"The 'subtasks' array should contain exactly {desired_n} items." if desired_n else "The 'subtasks' array should contain 4-6 items."
             gen_text = f"Generate exactly {desired_n} parallel subtasks." if desired_n else "Generate 4-6 parallel subtasks."
 
             # Extract target folder name from main task if mentioned (preserve exact case)
-            import re
-            folder = None
-            folder_patterns = [
-                r'folder called\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?',
-                r'create\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?\s+folder',
-                r'in\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?\s+folder',
-                r'folder\s+["\']?([^"\'\.\s]+(?:\s+[^"\'\.\s]+)*)["\']?',
-            ]
-            for pattern in folder_patterns:
-                q = re.search(pattern, main_task, re.IGNORECASE)  # Case insensitive search but preserve original case
-                if q:
-                    folder = q.group(1)
-                    break
-            # Fall back: look for a simple token in quotes
-            if not folder:
-                q = _re.search(r"'([\w\-\/]+)'", main_task)
-                if q:
-                    folder = q.group(1)
+            folder = _target_folder(main_task)
 
             # Messages: enforce schema and JSON-only via system prompt, task via user prompt
             folder_req = (
@@ -882,7 +881,13 @@ class TaskOrchestrator:
             ]
 
             logger.debug(f"Planning prompts prepared (system+user). main_task_len={len(main_task)}, context_len={len(context)}")
-            response = await planning_client.completion(messages)
+            from muonry.llm_cache import cached_completion
+            try:
+                response = await cached_completion(
+                    self.transport.wrap(planning_client, "orchestrator-planner"), messages, config=config, extra=extra_cfg
+                )
+            finally:
+                default_pool().release(planning_client)
 
             # Extract text from response object; support ReasoningResponse-like objects
             response_text = ''
@@ -1116,7 +1121,7 @@ class TaskOrchestrator:
                         _desc = it.get('description') or f"Create story {idx}"
                         _fp = it.get('file_path')
                         _fp = _ensure_filename(idx, _fp)
-                        out.append({'id': _id, 'description': _desc, 'file_path': _fp})
+                        out.append({'id': _id, 'description': _desc, 'file_path': _fp, 'reads': it.get('reads')})
                     # Adjust count
                     if desired_n is not None:
                         # Trim
@@ -1141,6 +1146,7 @@ class TaskOrchestrator:
                         id=task_data.get('id', f'ai_task_{i+1}'),
                         description=task_data.get('description', f'AI task {i+1}'),
                         file_path=task_data.get('file_path'),
+                        reads=task_data.get('reads') or None,
                         status=TaskStatus.PENDING,
                         created_at=time.time()
                     )
@@ -1150,12 +1156,12 @@ class TaskOrchestrator:
                 return subtasks
             except Exception as e:
                 logger.exception(f"Failed to parse/validate planning response: {e}")
-                return self._decompose_task_fallback(main_task, context)
+                return None
                 
         except Exception as e:
             # AI planning failed, using fallback
             logger.exception(f"Planning failed: {e}")
-            return self._decompose_task_fallback(main_task, context)
+            return None
     
     def _decompose_task_fallback(self, main_task: str, context: str) -> List[SubTask]:
         """Decompose main task into TRULY PARALLEL subtasks"""
@@ -1284,61 +1290,44 @@ class TaskOrchestrator:
     
     async def assign_tasks(self) -> Dict[str, Any]:
         """Assign pending tasks to available workers"""
-        state = self._load_state()
-        if not state:
+        store = self.store
+        if store.load_meta() is None:
             return {"error": "No orchestrator state found. Create a plan first."}
         
         assignments = []
         
-        # Find available workers
-        available_workers = [w for w in state.workers if w.status == WorkerStatus.IDLE]
-        logger.debug(f"assign_tasks: {len(available_workers)} idle workers, {len([t for t in state.subtasks if t.status == TaskStatus.PENDING])} pending tasks")
-        
-        # Find pending tasks that aren't file-locked
-        pending_tasks = [t for t in state.subtasks if t.status == TaskStatus.PENDING]
+        # Each idle worker claims the oldest pending task whose file isn't locked
+        available_workers = store.idle_workers()
+        logger.debug(f"assign_tasks: {len(available_workers)} idle workers, {store.counts()['pending']} pending tasks")
         
-        for task in pending_tasks:
-            if not available_workers:
+        for worker_id in available_workers:
+            task = store.claim(worker_id)
+            if task is None:
                 break
-                
-            # Check if file is locked by another worker
-            if task.file_path and task.file_path in state.file_locks:
-                continue
-                
-            # Assign task to worker
-            worker = available_workers.pop(0)
-            worker.status = WorkerStatus.WORKING
-            worker.current_task_id = task.id
-            worker.current_file = task.file_path
-            
-            task.status = "in_progress"
-            task.worker_id = worker.id
-            task.started_at = time.time()
-            
-            # Lock file if task has one
-            if task.file_path:
-                state.file_locks[task.file_path] = worker.id
-            
             assignments.append({
-                "worker_id": worker.id,
-                "task_id": task.id, 
-                "task_description": task.description,
-                "file_path": task.file_path
+                "worker_id": worker_id,
+                "task_id": task["id"], 
+                "task_description": task["description"],
+                "file_path": task["file_path"]
             })
-            logger.info(f"Assigned task {task.id} -> {worker.id} (file={task.file_path or 'None'})")
+            logger.info(f"Assigned task {task['id']} -> {worker_id} (file={task['file_path'] or 'None'})")
         
-        self._save_state(state)
         logger.info(f"Assignments complete: {len(assignments)} tasks assigned")
+        counts = store.counts()
         
         return {
             "assignments": assignments,
-            "total_pending": len([t for t in state.subtasks if t.status == TaskStatus.PENDING]),
-            "total_in_progress": len([t for t in state.subtasks if t.status == TaskStatus.IN_PROGRESS]),
-            "file_locks": state.file_locks
+            "total_pending": counts["pending"],
+            "total_in_progress": counts["in_progress"],
+            "file_locks": store.file_locks()
         }
     
-    async def start_real_workers(self) -> Dict[str, Any]:
-        """Start actual concurrent async workers that do real work"""
+    async def start_real_workers(self, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Start actual concurrent workers that do real work
+
+        backend: "async" (tasks on this event loop) or "process" (one process
+        per worker); defaults to MUONRY_ORCHESTRATOR_BACKEND.
+        """
         state = self._load_state()
         if not state:
             return {"error": "No orchestrator state found. Create a plan first."}
@@ -1346,6 +1335,20 @@ class TaskOrchestrator:
         # Stop any existing workers
         await self.stop_all_workers()
         
+        backend = backend or backend_from_env()
+        if backend == "process":
+            self.worker_pool = ProcessWorkerPool(
+                self.state_file, [w.id for w in state.workers], queue=self.queue, on_event=self._on_worker_event
+            )
+            started_workers = await self.worker_pool.start()
+            logger.info(f"Total worker processes started: {len(started_workers)}")
+            return {
+                "started_workers": started_workers,
+                "total_workers": len(started_workers),
+                "backend": backend,
+                "message": f"🚀 Started {len(started_workers)} worker processes!"
+            }
+        
         # Create and start real async workers
         started_workers = []
         
@@ -1369,11 +1372,23 @@ class TaskOrchestrator:
         return {
             "started_workers": started_workers,
             "total_workers": len(started_workers),
+            "backend": backend,
             "message": f"🚀 Started {len(started_workers)} real concurrent workers!"
         }
     
+    def _on_worker_event(self, event: Dict[str, Any]):
+        """Task events streamed back from worker processes"""
+        kind = event.get("type")
+        if kind == "finished":
+            logger.info(f"[{event.get('worker_id')}] result for {event.get('task_id')}: {str(event.get('result'))[:200]}")
+        elif kind == "failed":
+            logger.info(f"[{event.get('worker_id')}] {event.get('task_id')} failed: {event.get('error')}")
+    
     async def stop_all_workers(self):
         """Stop all running workers"""
+        if self.worker_pool is not None:
+            await self.worker_pool.stop()
+            self.worker_pool = None
         for worker_id, worker_info in self.worker_tasks.items():
             logger.info(f"Stopping worker {worker_id}")
             worker_info["worker"].stop()
@@ -1391,40 +1406,23 @@ class TaskOrchestrator:
     
     def complete_task(self, task_id: str, result: str = "Success") -> Dict[str, Any]:
         """Mark a task as completed and free up worker"""
-        state = self._load_state()
-        if not state:
+        store = self.store
+        if store.load_meta() is None:
             return {"error": "No orchestrator state found"}
         
-        # Find task
-        task = next((t for t in state.subtasks if t.id == task_id), None)
+        task = store.task(task_id)
         if not task:
             return {"error": f"Task {task_id} not found"}
-        
-        # Find worker
-        worker = next((w for w in state.workers if w.id == task.worker_id), None)
-        if not worker:
+        if not task["worker_id"]:
             return {"error": f"Worker for task {task_id} not found"}
         
-        # Update task
-        task.status = "completed"
-        task.completed_at = time.time()
-        task.result = result
-        
-        # Update worker
-        worker.status = WorkerStatus.IDLE
-        worker.tasks_completed += 1
-        worker.current_task_id = None
-        
-        # Release file lock
-        if task.file_path and task.file_path in state.file_locks:
-            del state.file_locks[task.file_path]
-        worker.current_file = None
-        
-        self._save_state(state)
+        # Update task, free worker and release file lock in one transaction
+        self.queue.finish(task_id, result=result)
         
         # Check if all tasks completed
-        completed_tasks = len([t for t in state.subtasks if t.status == TaskStatus.COMPLETED])
-        total_tasks = len(state.subtasks)
+        counts = store.counts()
+        completed_tasks = counts["completed"]
+        total_tasks = sum(counts.values())
         
         return {
             "task_id": task_id,
@@ -1435,60 +1433,40 @@ class TaskOrchestrator:
     
     def get_status(self) -> Dict[str, Any]:
         """Get current orchestrator status"""
-        state = self._load_state()
-        if not state:
+        store = self.store
+        meta = store.load_meta()
+        if meta is None:
             return {"error": "No orchestrator state found"}
         
-        task_summary = {
-            "pending": len([t for t in state.subtasks if t.status == TaskStatus.PENDING]),
-            "in_progress": len([t for t in state.subtasks if t.status == TaskStatus.IN_PROGRESS]), 
-            "completed": len([t for t in state.subtasks if t.status == TaskStatus.COMPLETED]),
-            "failed": len([t for t in state.subtasks if t.status == TaskStatus.FAILED])
-        }
-        
-        worker_summary = {
-            "idle": len([w for w in state.workers if w.status == WorkerStatus.IDLE]),
-            "working": len([w for w in state.workers if w.status == WorkerStatus.WORKING]),
-            "total": len(state.workers)
-        }
-        
         return {
-            "main_task": state.main_task,
-            "tasks": task_summary,
-            "workers": worker_summary,
-            "file_locks": state.file_locks,
+            "main_task": meta["main_task"],
+            "tasks": store.counts(),
+            "workers": store.worker_counts(),
+            "file_locks": store.file_locks(),
+            "read_locks": store.read_locks(),
             "detailed_tasks": [
                 {
-                    "id": t.id,
-                    "description": t.description,
-                    "status": t.status.value if hasattr(t.status, 'value') else str(t.status),
-                    "worker_id": t.worker_id,
-                    "file_path": t.file_path
+                    "id": t["id"],
+                    "description": t["description"],
+                    "status": t["status"],
+                    "worker_id": t["worker_id"],
+                    "file_path": t["file_path"]
                 }
-                for t in state.subtasks
+                for t in store.tasks()
             ]
         }
     
     def _save_state(self, state: OrchestratorState):
-        """Save orchestrator state to file"""
-        self.state_file.parent.mkdir(exist_ok=True)
-        with open(self.state_file, 'wb') as f:
-            # Convert to dict for JSON serialization
-            state_dict = asdict(state)
-            data = orjson.dumps(state_dict, option=orjson.OPT_INDENT_2)
-            f.write(data)
-        logger.debug(f"State saved to {self.state_file} ({len(data)} bytes)")
+        """Replace the whole plan in the task store"""
+        self.queue.replace(asdict(state))
+        logger.debug(f"State saved to {self.state_file} ({len(state.subtasks)} tasks)")
     
     def _load_state(self) -> Optional[OrchestratorState]:
-        """Load orchestrator state from file"""
-        if not self.state_file.exists():
-            return None
-        
+        """Load a full snapshot of the plan from the task store"""
         try:
-            with open(self.state_file, 'rb') as f:
-                raw = f.read()
-                state_dict = orjson.loads(raw)
-            logger.debug(f"State loaded from {self.state_file} ({len(raw)} bytes)")
+            state_dict = self.store.load()
+            if state_dict is None:
+                return None
             
             # Convert back to dataclass instances
             subtasks = [SubTask(**task) for task in state_dict['subtasks']]
@@ -1603,6 +1581,11 @@ async def get_orchestrator_status() -> str:
             for file_path, worker_id in status['file_locks'].items():
                 result += f"• {file_path} → {worker_id}\n"
         
+        if status.get('read_locks'):
+            result += f"**📖 Read Locks:**\n"
+            for file_path, workers in status['read_locks'].items():
+                result += f"• {file_path} → {', '.join(workers)}\n"
+        
         result += "\n**📋 Detailed Tasks:**\n"
         for task in status['detailed_tasks']:
             status_emoji = {"pending": "⏳", "in_progress": "🔄", "completed": "✅", "failed": "❌"}
@@ -1670,9 +1653,9 @@ async def reset_orchestrator() -> str:
     try:
         await _orchestrator.stop_all_workers()
         
-        # Remove state file if it exists
+        # Clear the task store if it exists
         if _orchestrator.state_file.exists():
-            _orchestrator.state_file.unlink()
+            _orchestrator.store.clear()
         
         return """
 🔄 **Orchestrator Reset Complete!**
@@ -22,7 +22,11 @@ import logging
 import time
 from dataclasses import dataclass, asdict
 from enum import Enum
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from muonry.metrics import registry as metrics_registry
+from tools.lock_manager import LockManager
+from muonry.tracing import get_tracer
 
 # Types
 JSON = Union[dict, list, str, int, float, bool, None]
@@ -67,6 +71,7 @@ class ToolCallResult:
 PermissionCallback = Callable[[ToolCallSpec], Awaitable[bool]]
 ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
 ToolResolver = Callable[[str], Optional[Callable[..., Awaitable[Any] | Any]]]
+LockCallback = Callable[[ToolCallSpec], List[Tuple[str, str]]]  # (path, "s" | "x") locks held while a call runs
 
 
 class ParallelToolExecutor:
@@ -75,6 +80,9 @@ class ParallelToolExecutor:
     Responsibilities:
     - Request approval per tool call via `permission_cb`
     - Run approved calls up to `concurrency` in parallel
+    - Optionally hold per-call file locks (`lock_cb`) so calls touching the
+      same files run one after another, in submission order (every call's
+      locks are queued, in order, before any call starts)
     - Stream per-call state transitions via `progress_cb`
     - Preserve `tool_call_id` and return aggregated results
 
@@ -119,15 +127,41 @@ class ParallelToolExecutor:
         progress_cb: Optional[ProgressCallback] = None,
         concurrency: int = 5,
         default_timeout_ms: int = 60000,
+        lock_cb: Optional[LockCallback] = None,
     ) -> Dict[str, Any]:
         semaphore = asyncio.Semaphore(max(1, concurrency))
+        locks = LockManager() if lock_cb else None
+        tracer = get_tracer()
+        metrics = metrics_registry()
+        inflight = metrics.gauge("muonry_tools_inflight", "Tool calls currently executing")
+
+        def _owner(spec: ToolCallSpec) -> str:
+            return f"{spec.tool_call_id}@{id(spec)}"
 
-        async def _run_one(spec: ToolCallSpec) -> ToolCallResult:
+        async def _run_one(spec: ToolCallSpec, lock_fut: Optional[asyncio.Future]) -> ToolCallResult:
+            with tracer.span("executor.run_one", tool=spec.name, tool_call_id=spec.tool_call_id) as sp:
+                try:
+                    res = await _run_one_inner(spec, lock_fut)
+                finally:
+                    # Also covers calls that never reached locks.wait() (rejected, tool_not_found):
+                    # their queued request must not be granted later and held forever.
+                    if locks is not None and lock_fut is not None:
+                        locks.withdraw(_owner(spec), lock_fut)
+                    elif locks is not None:
+                        locks.release(_owner(spec))
+                sp.set_attribute("state", res.state.value)
+            metrics.counter("muonry_tool_calls_total", "Tool calls by final state", tool=spec.name, state=res.state.value).inc()
+            if res.started_at and res.ended_at:
+                metrics.histogram("muonry_tool_latency_seconds", "Tool execution latency", tool=spec.name).observe(res.ended_at - res.started_at)
+            return res
+
+        async def _run_one_inner(spec: ToolCallSpec, lock_fut: Optional[asyncio.Future]) -> ToolCallResult:
             # Permission gate
             approved = True
             if permission_cb:
                 try:
-                    approved = await permission_cb(spec)
+                    with tracer.span("executor.permission", tool=spec.name):
+                        approved = await permission_cb(spec)
                 except Exception as e:
                     approved = False
                     self._log.debug(f"permission_cb error for {spec.tool_call_id}: {e}")
@@ -166,7 +200,17 @@ class ParallelToolExecutor:
 
             timeout = (spec.timeout_ms or default_timeout_ms) / 1000.0
 
-            await semaphore.acquire()
+            if locks is not None and lock_fut is not None:
+                with tracer.span("executor.lock_wait", tool=spec.name):
+                    await locks.wait(_owner(spec), lock_fut)
+            return await _run_locked(spec, tool, timeout)
+
+        async def _run_locked(spec: ToolCallSpec, tool: Callable[..., Any], timeout: float) -> ToolCallResult:
+            t_wait = time.perf_counter()
+            with tracer.span("executor.queue_wait", tool=spec.name):
+                await semaphore.acquire()
+            metrics.histogram("muonry_tool_queue_wait_seconds", "Time waiting for a concurrency slot").observe(time.perf_counter() - t_wait)
+            inflight.inc()
             try:
                 await self._emit(progress_cb, {
                     "type": "tool_state",
@@ -238,6 +282,7 @@ class ParallelToolExecutor:
                         ended_at=ended,
                     )
             finally:
+                inflight.dec()
                 semaphore.release()
 
         # Emit initial states
@@ -249,9 +294,25 @@ class ParallelToolExecutor:
                 "state": ToolCallState.PENDING.value,
             })
 
+        # Queue every call's locks in submission order before anything awaits
+        # (permission prompts included), so arrival order is submission order
+        lock_futs: List[Optional[asyncio.Future]] = []
+        for c in calls:
+            if locks is None:
+                lock_futs.append(None)
+                continue
+            try:
+                wanted = lock_cb(c) or []  # type: ignore[misc]
+            except Exception as e:
+                wanted = []
+                self._log.debug(f"lock_cb error for {c.tool_call_id}: {e}")
+            lock_futs.append(locks.enqueue(_owner(c), wanted))
+
         # Launch all tasks
-        tasks = [asyncio.create_task(_run_one(c)) for c in calls]
-        results: List[ToolCallResult] = await asyncio.gather(*tasks)
+        with tracer.span("executor.execute", calls=len(calls), concurrency=concurrency):
+            # Task names let the loop watchdog attribute blocking calls to tools
+            tasks = [asyncio.create_task(_run_one(c, f), name=f"tool:{c.name}") for c, f in zip(calls, lock_futs)]
+            results: List[ToolCallResult] = await asyncio.gather(*tasks)
 
         # Aggregate
         agg = {
@@ -329,9 +390,6 @@ if __name__ == "__main__":
 from dataclasses import dataclass, asdict, field
 from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-# Import async tools from our local registry
-from tools import toolset as ts
-
 logger = logging.getLogger("orchestratorv2")
 if not logger.handlers:
     _h = logging.StreamHandler()
@@ -399,6 +457,9 @@ class OrchestratorV2:
         self.registry = registry or self._default_registry()
 
     def _default_registry(self) -> Dict[str, Callable[..., Awaitable[str]]]:
+        # Async tools from our local registry (imported here, not at module load)
+        from tools import toolset as ts
+
         # Map display names to async tool funcs in tools/toolset.py
         return {
             "read_file": ts.read_file_tool,
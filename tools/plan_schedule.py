@@ -0,0 +1,104 @@
+"""
+Conflict-free scheduling of planner steps and parallel tool calls.
+
+Planner steps carry read/write sets (`reads`, `writes`; a bare `file_path` is
+treated as the step's only write). Two steps conflict when one writes a path
+the other reads or writes; paths compare hierarchically, so writing `out/`
+conflicts with anything under `out/` (same rules as `lock_manager`).
+
+- `plan_waves(steps)` groups steps into waves: every step lands in the first
+  wave after all earlier steps it conflicts with, so the steps of one wave are
+  independent and can run together (one `parallel` call), while steps that
+  touch the same files keep their plan order. Six stories in six files are a
+  single wave and finish in the time of the slowest one.
+- `tool_call_locks(name, arguments)` derives the locks a concrete tool call
+  needs (exclusive for writers such as write_file/search_replace/apply_patch,
+  shared for readers such as read_file/grep). `ParallelToolExecutor` holds
+  them while a call runs, so calls in one batch that touch the same file run
+  in submission order (a read after a write sees the write) and everything
+  else still runs concurrently.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from tools.lock_manager import EXCLUSIVE, SHARED, LockRequest, lock_key
+
+_READERS = {"read_file": "file_path", "grep": "file_path"}
+_WRITERS = {"write_file": "file_path", "search_replace": "file_path"}
+_PATCH_HEADERS = ("*** Add File: ", "*** Delete File: ", "*** Update File: ", "*** Move to: ", "_** Move to: ")
+
+
+def _paths(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value if v]
+
+
+def step_access(step: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(reads, writes) declared by a planner step."""
+    writes = _paths(step.get("writes")) or _paths(step.get("file_path"))
+    return _paths(step.get("reads")), writes
+
+
+def _overlap(a: Iterable[str], b: Iterable[str]) -> bool:
+    keys_b = [lock_key(p) for p in b]
+    for p in a:
+        ka = lock_key(p)
+        for kb in keys_b:
+            n = min(len(ka), len(kb))
+            if ka[:n] == kb[:n]:
+                return True
+    return False
+
+
+def steps_conflict(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    reads_a, writes_a = step_access(a)
+    reads_b, writes_b = step_access(b)
+    return _overlap(writes_a, writes_b) or _overlap(writes_a, reads_b) or _overlap(writes_b, reads_a)
+
+
+def plan_waves(steps: Sequence[Dict[str, Any]]) -> List[List[int]]:
+    """Group step indexes into waves of mutually independent steps, in plan order."""
+    wave_of: List[int] = []
+    for j, step in enumerate(steps):
+        wave = 0
+        for i in range(j):
+            if wave_of[i] >= wave and steps_conflict(steps[i], step):
+                wave = wave_of[i] + 1
+        wave_of.append(wave)
+    waves: List[List[int]] = [[] for _ in range(max(wave_of, default=-1) + 1)]
+    for idx, wave in enumerate(wave_of):
+        waves[wave].append(idx)
+    return waves
+
+
+def _patch_paths(patch: str) -> Set[str]:
+    out: Set[str] = set()
+    for line in str(patch or "").splitlines():
+        for header in _PATCH_HEADERS:
+            if line.startswith(header):
+                out.add(line[len(header):].strip())
+        if line.startswith("+++ ") or line.startswith("--- "):
+            path = line[4:].strip().split("\t")[0]
+            if path != "/dev/null":
+                out.add(path[2:] if path[:2] in ("a/", "b/") else path)
+    return out
+
+
+def tool_call_locks(name: str, arguments: Dict[str, Any]) -> List[LockRequest]:
+    """Locks a tool call must hold while it runs (empty when unknown)."""
+    args = arguments or {}
+    if name in _WRITERS:
+        return [(p, EXCLUSIVE) for p in _paths(args.get(_WRITERS[name]))]
+    if name in _READERS:
+        return [(p, SHARED) for p in _paths(args.get(_READERS[name]) or ".")]
+    if name in ("apply_patch", "applypatch"):
+        cwd = str(args.get("cwd") or ".")
+        paths = _patch_paths(args.get("patch", ""))
+        if not paths:
+            return [(cwd, EXCLUSIVE)]
+        return [(p if cwd == "." else f"{cwd.rstrip('/')}/{p}", EXCLUSIVE) for p in sorted(paths)]
+    return []
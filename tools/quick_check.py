@@ -0,0 +1,346 @@
+"""
+Incremental syntax checking and parallel command fan-out for `quick_check`.
+
+`quick_check(kind="python")` used to read and `ast.parse` every file on every
+call. `check_python_files()` only parses what changed:
+
+- a per-workspace index under `MUONRY_QUICK_CHECK_CACHE_DIR` (default
+  `.muonry/cache/quick_check`) maps each file's (mtime_ns, size) to the
+  sha256 of its content, and each content hash to its parse result; files
+  whose stat is unchanged are answered without being read;
+- files with a new stat are read and hashed, and only content that has never
+  been parsed before (by this Python version) is parsed;
+- when there are at least `MUONRY_QUICK_CHECK_POOL_MIN` (default 32) files to
+  parse, parsing is spread over a process pool (`MUONRY_QUICK_CHECK_WORKERS`,
+  default: CPU count up to 8) that is kept for the life of the process.
+
+`MUONRY_QUICK_CHECK_CACHE=0` disables the index (every file is parsed).
+
+Rust and JS checks are external commands (`rustc` per file, `cargo` / `tsc`
+per project). `run_commands()` runs them concurrently, at most
+`MUONRY_QUICK_CHECK_JOBS` at a time (default: CPU count up to 8), collects
+results as they complete and, given `max_failures`, kills whatever is still
+running once that many commands have failed (pass/fail callers need not wait
+for the rest).
+"""
+from __future__ import annotations
+
+import ast
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from muonry.metrics import registry as metrics_registry
+from tools.shell import ShellResult
+
+logger = logging.getLogger("muonry.quick_check")
+
+_FALSY = {"0", "false", "no", "off"}
+_MAX_ENTRIES = 50000
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def python_files(p: Path, max_files: int) -> List[Path]:
+    """`p` itself if it is a .py file, otherwise up to `max_files` .py files below it."""
+    if p.is_file() and p.suffix == ".py":
+        return [p]
+    return source_files(p if p.is_dir() else p.parent, ".py", max_files)
+
+
+SKIP_DIRS = {".git", "node_modules", "target", "__pycache__", ".venv", "venv", ".muonry"}
+
+
+def source_files(base: Path, suffix: str, max_files: int) -> List[Path]:
+    """Up to `max_files` files ending in `suffix` below `base`."""
+    files: List[Path] = []
+    for root, _, fnames in os.walk(base):
+        for fn in fnames:
+            if fn.endswith(suffix):
+                files.append(Path(root) / fn)
+                if len(files) >= max_files:
+                    return files
+    return files
+
+
+def find_projects(base: Path, marker: str, max_depth: int = 3) -> List[Path]:
+    """Directories at or below `base` containing `marker` (nested projects are not searched)."""
+    if (base / marker).exists():
+        return [base]
+    found: List[Path] = []
+    for root, dirs, fnames in os.walk(base):
+        depth = len(Path(root).relative_to(base).parts)
+        if marker in fnames and depth:
+            found.append(Path(root))
+            dirs[:] = []
+            continue
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")) if depth < max_depth else []
+    return sorted(found)
+
+
+def parse_source(data: bytes) -> Optional[str]:
+    """Error message for `data`, or None when it parses."""
+    try:
+        ast.parse(data.decode("utf-8"))
+    except SyntaxError as se:
+        return f"SyntaxError: {se}"
+    except (UnicodeDecodeError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse_path(path: str) -> Tuple[str, Optional[str]]:
+    """Pool worker: (content hash, error) for the file at `path` (hash is "" if unreadable)."""
+    try:
+        data = Path(path).read_bytes()
+    except OSError as e:
+        return "", f"{type(e).__name__}: {e}"
+    return _digest(data), parse_source(data)
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    """Process-wide parse pool, started on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            workers = _int_env("MUONRY_QUICK_CHECK_WORKERS", min(os.cpu_count() or 1, 8))
+            _POOL = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def _reset_pool() -> None:
+    """Drop a broken pool so the next batch starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class SyntaxCache:
+    """Stat -> content hash -> parse result index for one workspace, stored as one JSON file."""
+
+    def __init__(self, root: Optional[os.PathLike | str] = None, *, enabled: Optional[bool] = None) -> None:
+        if enabled is None:
+            enabled = str(os.getenv("MUONRY_QUICK_CHECK_CACHE", "1")).strip().lower() not in _FALSY
+        self.enabled = enabled
+        self.root = Path(root or os.getenv("MUONRY_QUICK_CHECK_CACHE_DIR") or Path(".muonry") / "cache" / "quick_check")
+        self.files: Dict[str, List[Any]] = {}  # path -> [mtime_ns, size, digest]
+        self.results: Dict[str, Optional[str]] = {}  # digest -> error (None = ok)
+        self._path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def open(self, workspace: Path) -> "SyntaxCache":
+        """Load the index for `workspace` (one index per workspace and Python version)."""
+        tag = hashlib.sha256(str(workspace.resolve()).encode("utf-8")).hexdigest()[:16]
+        path = self.root / f"python{sys.version_info[0]}{sys.version_info[1]}-{tag}.json"
+        if path == self._path:
+            return self
+        self._path = path
+        self.files, self.results = {}, {}
+        if self.enabled:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                self.files = data.get("files") or {}
+                self.results = data.get("results") or {}
+            except Exception:
+                pass
+        return self
+
+    def save(self) -> None:
+        if not self.enabled or self._path is None:
+            return
+        if len(self.files) > _MAX_ENTRIES:
+            self.files = dict(list(self.files.items())[-_MAX_ENTRIES:])
+        live = {entry[2] for entry in self.files.values()}
+        self.results = {d: r for d, r in self.results.items() if d in live}
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(json.dumps({"files": self.files, "results": self.results}), encoding="utf-8")
+            os.replace(tmp, self._path)
+        except Exception as e:
+            logger.debug(f"quick_check cache: write failed: {e}")
+
+    def check(self, files: Iterable[Path]) -> Tuple[List[Dict[str, Any]], int]:
+        """Check results for `files` (in order) and how many of them had to be parsed."""
+        with self._lock:
+            return self._check(list(files))
+
+    def _check(self, files: List[Path]) -> Tuple[List[Dict[str, Any]], int]:
+        errors: Dict[str, Optional[str]] = {}
+        to_parse: List[str] = []
+        dirty = False
+        for f in files:
+            key = str(f)
+            try:
+                st = f.stat()
+            except OSError as e:
+                errors[key] = f"{type(e).__name__}: {e}"
+                continue
+            entry = self.files.get(key) if self.enabled else None
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size and entry[2] in self.results:
+                errors[key] = self.results[entry[2]]
+                continue
+            if self.enabled:
+                try:
+                    digest = _digest(f.read_bytes())
+                except OSError as e:
+                    errors[key] = f"{type(e).__name__}: {e}"
+                    continue
+                self.files[key] = [st.st_mtime_ns, st.st_size, digest]
+                dirty = True
+                if digest in self.results:
+                    errors[key] = self.results[digest]
+                    continue
+            to_parse.append(key)
+
+        if len(to_parse) >= _int_env("MUONRY_QUICK_CHECK_POOL_MIN", 32):
+            try:
+                parsed = list(_parse_pool().map(_parse_path, to_parse, chunksize=max(1, len(to_parse) // 32)))
+            except Exception as e:
+                logger.debug(f"quick_check: parse pool failed, parsing inline: {e}")
+                _reset_pool()
+                parsed = [_parse_path(k) for k in to_parse]
+        else:
+            parsed = [_parse_path(k) for k in to_parse]
+        for key, (digest, error) in zip(to_parse, parsed):
+            errors[key] = error
+            if self.enabled and digest:
+                self.results[digest] = error
+                entry = self.files.get(key)
+                if entry is not None:
+                    entry[2] = digest  # content may have changed since it was hashed
+
+        metrics = metrics_registry()
+        metrics.counter("muonry_quick_check_files_total", "Files checked by quick_check", result="parsed").inc(len(to_parse))
+        metrics.counter("muonry_quick_check_files_total", "Files checked by quick_check", result="cached").inc(len(files) - len(to_parse))
+        if dirty:
+            self.save()
+
+        checks = []
+        for f in files:
+            error = errors[str(f)]
+            checks.append({"file": str(f), "ok": True} if error is None else {"file": str(f), "ok": False, "error": error})
+        return checks, len(to_parse)
+
+
+_CACHE: Optional[SyntaxCache] = None
+
+
+def default_syntax_cache() -> SyntaxCache:
+    """Process-wide syntax cache configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = SyntaxCache()
+    return _CACHE
+
+
+def check_python_files(workspace: Path, files: Iterable[Path]) -> Tuple[List[Dict[str, Any]], int]:
+    """Syntax-check `files` through the cached index for `workspace`."""
+    return default_syntax_cache().open(workspace).check(files)
+
+
+# --- Parallel command fan-out (rustc / cargo / tsc) ---------------------------
+
+Job = Tuple[List[str], str]  # (argv, cwd)
+
+
+def default_jobs() -> int:
+    return max(1, _int_env("MUONRY_QUICK_CHECK_JOBS", min(os.cpu_count() or 1, 8)))
+
+
+async def _run_one(argv: List[str], cwd: str, timeout_ms: int) -> ShellResult:
+    start = time.time()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *argv, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        return ShellResult(exit_code=127, stdout="", stderr=f"{argv[0]}: {e}", duration_ms=0)
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout_ms / 1000)
+        code = proc.returncode
+    except asyncio.TimeoutError:
+        proc.kill()
+        out, err = await proc.communicate()
+        code = 124
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    duration = int((time.time() - start) * 1000)
+    argv0 = os.path.basename(str(argv[0]))
+    metrics = metrics_registry()
+    metrics.histogram("muonry_shell_seconds", "run_shell wall time", argv0=argv0).observe(duration / 1000.0)
+    metrics.counter("muonry_shell_runs_total", "run_shell invocations", argv0=argv0, ok=str(code == 0).lower()).inc()
+    return ShellResult(
+        exit_code=code,
+        stdout=out.decode("utf-8", "replace"),
+        stderr=err.decode("utf-8", "replace"),
+        duration_ms=duration,
+    )
+
+
+async def run_commands(
+    jobs: Sequence[Job],
+    *,
+    timeout_ms: int = 120000,
+    concurrency: Optional[int] = None,
+    max_failures: int = 0,
+    on_result: Optional[Callable[[int, ShellResult], None]] = None,
+) -> List[Optional[ShellResult]]:
+    """Run `jobs` with bounded concurrency; results in job order, None for jobs cut short.
+
+    `on_result(index, result)` is called as each job completes. With
+    `max_failures` > 0 the remaining jobs are cancelled (running processes
+    killed) as soon as that many have exited non-zero.
+    """
+    results: List[Optional[ShellResult]] = [None] * len(jobs)
+    if not jobs:
+        return results
+    sem = asyncio.Semaphore(concurrency or default_jobs())
+
+    async def one(i: int, argv: List[str], cwd: str) -> Tuple[int, ShellResult]:
+        async with sem:
+            return i, await _run_one(argv, cwd, timeout_ms)
+
+    tasks = [asyncio.create_task(one(i, argv, cwd)) for i, (argv, cwd) in enumerate(jobs)]
+    failures = 0
+    try:
+        for fut in asyncio.as_completed(tasks):
+            i, r = await fut
+            results[i] = r
+            if on_result is not None:
+                on_result(i, r)
+            if r.exit_code != 0:
+                failures += 1
+                if max_failures and failures >= max_failures:
+                    break
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return results
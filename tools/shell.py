@@ -8,6 +8,9 @@ import time
 from dataclasses import dataclass
 from typing import Callable, Dict, List, Optional
 
+from muonry.metrics import registry as metrics_registry
+from muonry.tracing import current_span, traced
+
 
 @dataclass
 class ShellRequest:
@@ -25,12 +28,41 @@ class ShellResult:
     stdout: str
     stderr: str
     duration_ms: int
+    stopped: bool = False  # terminated because on_output asked to stop
 
 
 ApprovalFn = Callable[[str], bool]
-
-
-def run_shell(req: ShellRequest, approve: Optional[ApprovalFn] = None) -> ShellResult:
+OutputFn = Callable[[str, str], Optional[bool]]  # (stream, chunk) -> True to stop the command
+
+
+def _terminate(proc: subprocess.Popen, group: bool, grace_s: float = 2.0) -> None:
+    """SIGTERM the command (its whole process group when `group`), SIGKILL after `grace_s`."""
+    def send(sig: int) -> None:
+        try:
+            if group:
+                os.killpg(proc.pid, sig)
+            else:
+                proc.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    if proc.poll() is not None:
+        return
+    send(signal.SIGTERM)
+    try:
+        proc.wait(timeout=grace_s)
+    except subprocess.TimeoutExpired:
+        send(signal.SIGKILL)
+
+
+@traced("shell.run_shell")
+def run_shell(req: ShellRequest, approve: Optional[ApprovalFn] = None, on_output: Optional[OutputFn] = None) -> ShellResult:
+    """Run a command to completion, collecting its output.
+
+    `on_output(stream, line)` ("stdout"/"stderr") sees output as it is read;
+    returning True terminates the command (and, since such commands run in
+    their own session, any children it started) and marks the result `stopped`.
+    """
     if not req.command:
         raise ValueError("command must be a non-empty list")
     if req.with_escalated_permissions:
@@ -53,29 +85,32 @@ def run_shell(req: ShellRequest, approve: Optional[ApprovalFn] = None) -> ShellR
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
+        start_new_session=on_output is not None,
     )
 
     stdout_chunks: List[str] = []
     stderr_chunks: List[str] = []
+    stop = threading.Event()
+    output_lock = threading.Lock()
 
-    def consume(stream, sink: List[str]):
+    def consume(stream, sink: List[str], name: str):
         for chunk in iter(lambda: stream.readline(), ""):
             sink.append(chunk)
-
-    t_out = threading.Thread(target=consume, args=(proc.stdout, stdout_chunks))  # type: ignore[arg-type]
-    t_err = threading.Thread(target=consume, args=(proc.stderr, stderr_chunks))  # type: ignore[arg-type]
+            if on_output is None or stop.is_set():
+                continue
+            with output_lock:
+                if stop.is_set() or not on_output(name, chunk):
+                    continue
+                stop.set()
+            threading.Thread(target=_terminate, args=(proc, True), daemon=True).start()
+
+    t_out = threading.Thread(target=consume, args=(proc.stdout, stdout_chunks, "stdout"))  # type: ignore[arg-type]
+    t_err = threading.Thread(target=consume, args=(proc.stderr, stderr_chunks, "stderr"))  # type: ignore[arg-type]
     t_out.start(); t_err.start()
 
     def kill_after_timeout():
         time.sleep(req.timeout_ms / 1000)
-        if proc.poll() is None:
-            try:
-                proc.terminate()
-                time.sleep(2)
-                if proc.poll() is None:
-                    proc.kill()
-            except ProcessLookupError:
-                pass
+        _terminate(proc, on_output is not None)
 
     killer = threading.Thread(target=kill_after_timeout)
     killer.daemon = True
@@ -84,10 +119,18 @@ def run_shell(req: ShellRequest, approve: Optional[ApprovalFn] = None) -> ShellR
     exit_code = proc.wait()
     t_out.join(); t_err.join()
     duration = int((time.time() - start) * 1000)
+    sp = current_span()
+    sp.set_attribute("argv0", str(req.command[0]))
+    sp.set_attribute("exit_code", exit_code)
+    argv0 = os.path.basename(str(req.command[0]))
+    metrics = metrics_registry()
+    metrics.histogram("muonry_shell_seconds", "run_shell wall time", argv0=argv0).observe(duration / 1000.0)
+    metrics.counter("muonry_shell_runs_total", "run_shell invocations", argv0=argv0, ok=str(exit_code == 0).lower()).inc()
 
     return ShellResult(
         exit_code=exit_code,
         stdout="".join(stdout_chunks),
         stderr="".join(stderr_chunks),
         duration_ms=duration,
+        stopped=stop.is_set(),
     )
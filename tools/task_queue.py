@@ -0,0 +1,105 @@
+"""
+Event-driven dispatch on top of the orchestrator task store.
+
+Workers used to poll the state every 500 ms when idle, back off 100-500 ms on
+claim contention and sleep 50 ms after every claim, so short tasks were
+dominated by scheduler latency. `TaskQueue` replaces the polling:
+
+- `get(worker_id)` claims straight from the store (highest `priority` first,
+  then plan order, skipping tasks whose file is locked) and, when nothing is
+  claimable, parks the worker on an event instead of sleeping;
+- anything that can make a task claimable (a new plan, a finished task
+  releasing its file lock) goes through the queue and wakes every parked
+  worker immediately;
+- dispatch latency — from the moment a task became claimable to the moment a
+  worker starts it — is recorded in microseconds as
+  `muonry_orchestrator_dispatch_seconds`.
+
+The store stays the single source of truth, so claims remain atomic across
+workers and processes; the queue only decides *when* to try.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from muonry.metrics import registry as metrics_registry
+from tools.task_store import TaskStore
+
+
+class TaskQueue:
+    """Wakes idle workers as soon as a task may have become claimable."""
+
+    def __init__(self, store: TaskStore) -> None:
+        self.store = store
+        self._changed: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready_at = time.perf_counter()
+        # Called on every non-local notify (e.g. to relay wake-ups to worker processes)
+        self.listeners: List[Callable[[], None]] = []
+
+    def _event(self) -> asyncio.Event:
+        # Events bind to the loop they are awaited on; start fresh on a new loop
+        loop = asyncio.get_running_loop()
+        if self._changed is None or self._loop is not loop:
+            self._changed = asyncio.Event()
+            self._loop = loop
+        return self._changed
+
+    def notify(self, *, local: bool = False) -> None:
+        """Wake every parked worker (call after anything that can free a task).
+
+        `local=True` skips the listeners, for wake-ups relayed from elsewhere.
+        """
+        self._ready_at = time.perf_counter()
+        changed, self._changed = self._changed, None
+        if changed is not None:
+            changed.set()
+        if not local:
+            for listener in list(self.listeners):
+                try:
+                    listener()
+                except Exception:
+                    pass
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Non-blocking claim; None when nothing is claimable right now."""
+        return self.store.claim(worker_id)
+
+    async def get(self, worker_id: str) -> Dict[str, Any]:
+        """Claim the next task, parking until one becomes claimable.
+
+        The returned task carries `ready_at` (perf_counter) for dispatch timing.
+        """
+        ready_at = time.perf_counter()
+        while True:
+            # Take the event before claiming so a notify in between is not lost
+            changed = self._event()
+            task = self.store.claim(worker_id)
+            if task is not None:
+                task["ready_at"] = ready_at
+                return task
+            await changed.wait()
+            ready_at = self._ready_at
+
+    def replace(self, state: Dict[str, Any]) -> None:
+        self.store.replace(state)
+        self.notify()
+
+    def finish(self, task_id: str, *, result: Optional[str] = None, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Complete/fail a task and wake workers blocked on its file lock."""
+        row = self.store.finish(task_id, result=result, error=error)
+        self.notify()
+        return row
+
+    @staticmethod
+    def started(ready_at: Optional[float]) -> float:
+        """Record dispatch latency for a task that is about to run; returns seconds."""
+        if ready_at is None:
+            return 0.0
+        latency = max(0.0, time.perf_counter() - ready_at)
+        metrics_registry().histogram(
+            "muonry_orchestrator_dispatch_seconds", "Time from a task becoming claimable to a worker starting it"
+        ).observe(latency)
+        return latency
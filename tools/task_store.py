@@ -0,0 +1,348 @@
+"""
+SQLite task store for the orchestrator.
+
+Replaces the JSON state file that was rewritten and re-parsed on every claim,
+completion and status check:
+
+- one database per plan (WAL mode, so readers never block the claiming writer
+  and any number of workers/processes can share it);
+- tasks are indexed by `(status, priority, seq)`; claims run inside one
+  `BEGIN IMMEDIATE` transaction together with their lock rows, so two
+  workers can never claim the same task or conflicting files;
+- flat plans (no `reads`, and no task path equal to or below another's once
+  normalized) can only conflict on identical paths, so a claim is one
+  indexed `UPDATE ... WHERE status = 'pending' ... RETURNING` whose
+  subquery skips tasks whose path is in the lock table (a primary-key
+  lookup); this is decided once per plan in `replace()`;
+- plans with shared or directory locks fall back to walking pending tasks
+  in Python against a `LockManager` trie built from the lock table: claim
+  cost grows with held locks and blocked tasks scanned, the price of
+  hierarchical and reader/writer conflicts;
+- completion/failure releases the worker and the file lock in one transaction.
+
+Rows are plain dicts with the same keys as the orchestrator dataclasses.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools.lock_manager import EXCLUSIVE, LockManager, lock_key, task_locks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL,
+    file_path TEXT,
+    reads TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    created_at REAL NOT NULL DEFAULT 0,
+    started_at REAL,
+    completed_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, priority DESC, seq);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'idle',
+    current_task_id TEXT,
+    current_file TEXT,
+    tasks_completed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS file_locks (
+    path TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'x',
+    PRIMARY KEY (path, worker_id)
+);
+CREATE INDEX IF NOT EXISTS file_locks_worker ON file_locks (worker_id);
+"""
+
+_TASK_COLS = ("id", "description", "file_path", "reads", "status", "priority", "worker_id", "created_at", "started_at", "completed_at", "result", "error")
+_WORKER_COLS = ("id", "status", "current_task_id", "current_file", "tasks_completed", "created_at")
+
+_CLAIM = f"""
+UPDATE tasks SET status = 'in_progress', worker_id = ?, started_at = ?
+WHERE seq = ?
+RETURNING {", ".join(_TASK_COLS)}
+"""
+
+_PENDING = "SELECT seq, file_path, reads FROM tasks WHERE status = 'pending' ORDER BY priority DESC, seq"
+
+# Flat plans: a pending task conflicts only with a lock on exactly its path
+_CLAIM_FLAT = f"""
+UPDATE tasks SET status = 'in_progress', worker_id = ?, started_at = ?
+WHERE seq = (
+    SELECT t.seq FROM tasks AS t
+    WHERE t.status = 'pending'
+      AND (t.file_path IS NULL OR NOT EXISTS (
+          SELECT 1 FROM file_locks AS l WHERE l.path = t.file_path AND l.worker_id != ?
+      ))
+    ORDER BY t.priority DESC, t.seq
+    LIMIT 1
+)
+RETURNING {", ".join(_TASK_COLS)}
+"""
+
+
+_TASK_DEFAULTS = {"status": "pending", "priority": 0, "created_at": 0.0}
+_WORKER_DEFAULTS = {"status": "idle", "tasks_completed": 0, "created_at": 0.0}
+
+
+def _row(d: Dict[str, Any], cols: tuple, defaults: Dict[str, Any]) -> tuple:
+    out = []
+    for c in cols:
+        v = d.get(c)
+        if v is None:
+            v = defaults.get(c)
+        if isinstance(v, (list, tuple)):
+            v = json.dumps(list(v))
+        # Enum members (TaskStatus/WorkerStatus) are str subclasses
+        out.append(v.value if hasattr(v, "value") else v)
+    return tuple(out)
+
+
+def _flat_plan(tasks: List[Dict[str, Any]], held: List[str]) -> bool:
+    """True when no two lock paths can overlap except by being the same string."""
+    if any(t.get("reads") for t in tasks):
+        return False
+    raw_by_key: Dict[tuple, str] = {}
+    for path in [t.get("file_path") for t in tasks] + list(held):
+        if not path:
+            continue
+        key = lock_key(path)
+        if not key or raw_by_key.setdefault(key, path) != path:
+            return False  # whole-workspace lock, or one path spelled two ways
+    keys = set(raw_by_key)
+    return not any(key[:i] in keys for key in keys for i in range(1, len(key)))
+
+
+def _task(row: sqlite3.Row) -> Dict[str, Any]:
+    task = dict(row)
+    task["reads"] = json.loads(task["reads"]) if task.get("reads") else None
+    return task
+
+
+class TaskStore:
+    """Orchestrator state in a SQLite database shared by all workers."""
+
+    def __init__(self, path: os.PathLike | str, *, busy_timeout_ms: int = 10_000) -> None:
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._conn().executescript(_SCHEMA)
+
+    # --- connections -------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and per process (connections must not cross a fork)
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _tx(self) -> "_Transaction":
+        return _Transaction(self._conn())
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # --- plan --------------------------------------------------------------
+
+    def replace(self, state: Dict[str, Any]) -> None:
+        """Overwrite the whole plan (tasks, workers, file locks, meta)."""
+        with self._tx() as db:
+            db.execute("DELETE FROM tasks")
+            db.execute("DELETE FROM workers")
+            db.execute("DELETE FROM file_locks")
+            db.execute("DELETE FROM meta")
+            subtasks = state.get("subtasks", [])
+            flat = _flat_plan(subtasks, list((state.get("file_locks") or {}).keys()))
+            db.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(k, state.get(k)) for k in ("main_task", "created_at", "completed_at")] + [("flat_locks", int(flat))],
+            )
+            db.executemany(
+                f"INSERT INTO tasks ({', '.join(_TASK_COLS)}) VALUES ({', '.join('?' * len(_TASK_COLS))})",
+                [_row({**t, "file_path": t.get("file_path") or None}, _TASK_COLS, _TASK_DEFAULTS) for t in subtasks],
+            )
+            db.executemany(
+                f"INSERT INTO workers ({', '.join(_WORKER_COLS)}) VALUES ({', '.join('?' * len(_WORKER_COLS))})",
+                [_row(w, _WORKER_COLS, _WORKER_DEFAULTS) for w in state.get("workers", [])],
+            )
+            db.executemany(
+                "INSERT INTO file_locks (path, worker_id, mode) VALUES (?, ?, ?)",
+                [(path, worker_id, EXCLUSIVE) for path, worker_id in (state.get("file_locks") or {}).items()],
+            )
+
+    def clear(self) -> None:
+        """Drop the current plan."""
+        with self._tx() as db:
+            for table in ("tasks", "workers", "file_locks", "meta"):
+                db.execute(f"DELETE FROM {table}")
+
+    def load_meta(self) -> Optional[Dict[str, Any]]:
+        """main_task/created_at/completed_at, or None when no plan exists."""
+        meta = {r["key"]: r["value"] for r in self._conn().execute("SELECT key, value FROM meta")}
+        if meta.get("main_task") is None:
+            return None
+        return {"main_task": meta["main_task"], "created_at": meta.get("created_at") or 0.0, "completed_at": meta.get("completed_at")}
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The whole plan as a dict, or None when no plan exists."""
+        meta = self.load_meta()
+        if meta is None:
+            return None
+        db = self._conn()
+        return {
+            **meta,
+            "subtasks": self.tasks(),
+            "workers": [dict(r) for r in db.execute(f"SELECT {', '.join(_WORKER_COLS)} FROM workers ORDER BY rowid")],
+            "file_locks": self.file_locks(),
+        }
+
+    # --- worker operations -------------------------------------------------
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically claim the highest-priority, oldest pending task whose locks are free.
+
+        A task takes an exclusive lock on `file_path` and shared locks on its
+        `reads`; directory paths lock their whole subtree (see lock_manager).
+        Flat plans claim with a single indexed statement; others scan pending
+        tasks against the lock trie.
+        """
+        with self._tx() as db:
+            flat = db.execute("SELECT value FROM meta WHERE key = 'flat_locks'").fetchone()
+            if flat is not None and flat["value"]:
+                rows = db.execute(_CLAIM_FLAT, (worker_id, time.time(), worker_id)).fetchall()
+                if not rows:
+                    return None
+                task = _task(rows[0])
+                return self._take(db, worker_id, task, task_locks(task["file_path"]))
+            locks = LockManager.from_rows(db.execute("SELECT path, worker_id, mode FROM file_locks").fetchall())
+            seq, wanted = None, []
+            cur = db.execute(_PENDING)
+            try:
+                for row in cur:
+                    reqs = task_locks(row["file_path"], json.loads(row["reads"]) if row["reads"] else None)
+                    if locks.can_acquire(worker_id, reqs):
+                        seq, wanted = row["seq"], reqs
+                        break
+            finally:
+                cur.close()
+            if seq is None:
+                return None
+            task = _task(db.execute(_CLAIM, (worker_id, time.time(), seq)).fetchall()[0])
+            return self._take(db, worker_id, task, wanted)
+
+    @staticmethod
+    def _take(db: sqlite3.Connection, worker_id: str, task: Dict[str, Any], wanted: List[Any]) -> Dict[str, Any]:
+        """Record a claimed task's lock rows and busy worker (inside the claim transaction)."""
+        db.executemany(
+            "INSERT INTO file_locks (path, worker_id, mode) VALUES (?, ?, ?) "
+            "ON CONFLICT (path, worker_id) DO UPDATE SET mode = CASE WHEN excluded.mode = 'x' THEN 'x' ELSE mode END",
+            [(path, worker_id, mode) for path, mode in wanted],
+        )
+        db.execute(
+            "UPDATE workers SET status = 'working', current_task_id = ?, current_file = ? WHERE id = ?",
+            (task["id"], task["file_path"], worker_id),
+        )
+        return task
+
+    def finish(self, task_id: str, *, result: Optional[str] = None, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Mark a task completed (or failed when `error` is given), freeing its worker and file lock."""
+        status = "failed" if error is not None else "completed"
+        with self._tx() as db:
+            rows = db.execute(
+                "UPDATE tasks SET status = ?, completed_at = ?, result = ?, error = ? WHERE id = ? "
+                "RETURNING id, worker_id, file_path",
+                (status, time.time(), result, error, task_id),
+            ).fetchall()
+            if not rows:
+                return None
+            row = rows[0]
+            # A worker runs one task at a time, so all of its locks belong to this task
+            db.execute("DELETE FROM file_locks WHERE worker_id = ?", (row["worker_id"],))
+            db.execute(
+                "UPDATE workers SET status = 'idle', current_task_id = NULL, current_file = NULL, "
+                "tasks_completed = tasks_completed + ? WHERE id = ? AND current_task_id = ?",
+                (1 if status == "completed" else 0, row["worker_id"], task_id),
+            )
+        return dict(row)
+
+    # --- queries -----------------------------------------------------------
+
+    def counts(self) -> Dict[str, int]:
+        """Task count per status (index-only)."""
+        out = {"pending": 0, "in_progress": 0, "completed": 0, "failed": 0}
+        for r in self._conn().execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status"):
+            out[r["status"]] = r["n"]
+        return out
+
+    def worker_counts(self) -> Dict[str, int]:
+        out = {"idle": 0, "working": 0, "total": 0}
+        for r in self._conn().execute("SELECT status, COUNT(*) AS n FROM workers GROUP BY status"):
+            out[r["status"]] = r["n"]
+            out["total"] += r["n"]
+        return out
+
+    def task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT {', '.join(_TASK_COLS)} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _task(row) if row else None
+
+    def tasks(self) -> List[Dict[str, Any]]:
+        return [_task(r) for r in self._conn().execute(f"SELECT {', '.join(_TASK_COLS)} FROM tasks ORDER BY seq")]
+
+    def file_locks(self) -> Dict[str, str]:
+        """Exclusive (write) locks: path -> worker."""
+        return {r["path"]: r["worker_id"] for r in self._conn().execute("SELECT path, worker_id FROM file_locks WHERE mode = 'x'")}
+
+    def read_locks(self) -> Dict[str, List[str]]:
+        """Shared (read) locks: path -> workers."""
+        out: Dict[str, List[str]] = {}
+        for r in self._conn().execute("SELECT path, worker_id FROM file_locks WHERE mode = 's' ORDER BY worker_id"):
+            out.setdefault(r["path"], []).append(r["worker_id"])
+        return out
+
+    def idle_workers(self) -> List[str]:
+        return [r["id"] for r in self._conn().execute("SELECT id FROM workers WHERE status = 'idle' ORDER BY rowid")]
+
+
+class _Transaction:
+    """`BEGIN IMMEDIATE` ... `COMMIT`, rolled back on error."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.db.execute("COMMIT")
+        else:
+            self.db.execute("ROLLBACK")
@@ -9,17 +9,24 @@ import os
 import platform
 import re
 import shlex
+import shutil
 import subprocess
 import time
 from pathlib import Path
 from typing import Any
 
-from bhumi.base_client import BaseLLMClient, LLMConfig
 from tools.apply_patch import apply_patch as do_apply_patch
 from tools.shell import run_shell, ShellRequest
 from tools.update_plan import load_plan, update_plan as do_update_plan, PlanItem, Status
-from tools.build_analyzer import analyze_build_output, pick_package_manager
+from tools.build_analyzer import BuildLogAnalyzer, is_fatal, pick_package_manager
+from tools.plan_schedule import plan_waves, step_access
 from tools.deepwiki import list_pages as deepwiki_list_pages, get_page as deepwiki_get_page
+from tools.workspace import current_workdir, resolve, resolve_dir
+from muonry.client_pool import default_pool
+from muonry.json_stream import PlanStream
+from muonry.llm_cache import cached_completion
+from muonry.plan_cache import default_plan_cache
+from muonry.tracing import traced
 
 # --- Minimal helpers (no ANSI formatting to avoid dependency on assistant) ---
 
@@ -33,6 +40,7 @@ def _error(msg: str) -> str: return msg
 
 
 # --- Talk ---
+@traced("tool.talk")
 async def talk_tool(content: str) -> str:
     try:
         print("\n🗣️ Assistant")
@@ -43,7 +51,58 @@ async def talk_tool(content: str) -> str:
 
 
 # --- Planner ---
+def _chunk_text(chunk: Any) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, dict):
+        if isinstance(chunk.get("text"), str):
+            return chunk["text"]
+        try:
+            return chunk["choices"][0]["delta"].get("content") or ""
+        except Exception:
+            return ""
+    return str(getattr(chunk, "text", "") or "")
+
+
+async def _completion_chunks(client: Any, messages: list[dict], config: Any):
+    """Yield the response text as it streams; one chunk when streaming is unavailable.
+
+    Streams only for live, uncached calls (MUONRY_PLANNER_STREAM=0 disables).
+    """
+    from muonry.llm_cache import default_cache
+    from muonry.transport import default_transport
+
+    streaming = (
+        os.getenv("MUONRY_PLANNER_STREAM", "1").strip().lower() not in {"0", "false", "no", "off"}
+        and not default_cache().enabled
+        and default_transport().mode == "live"
+    )
+    if streaming:
+        try:
+            stream = await client.completion(messages, stream=True)
+        except Exception:
+            stream = None
+        if stream is not None and hasattr(stream, "__aiter__"):
+            async for chunk in stream:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+            return
+        if isinstance(stream, dict):
+            yield stream.get("text") or ""
+            return
+    response = await cached_completion(client, messages, config=config)
+    if response and "text" in response:
+        yield response["text"]
+
+
+@traced("tool.planner")
 async def planner_tool(task: str, context: str = "") -> str:
+    """Plan `task` into steps, reporting each step as soon as it streams in.
+
+    Streaming is progress-only: the model receives the plan once the stream
+    ends, and steps do not start executing while later ones are generated.
+    """
     try:
         # Small terminal animation while planning
         async def _animate_planning(stop_event: asyncio.Event):
@@ -77,9 +136,6 @@ async def planner_tool(task: str, context: str = "") -> str:
             except Exception:
                 pass
 
-        import orjson
-        import json as builtin_json
-
         # Optional Satya schema validation
         try:
             from satya import Field, Model
@@ -88,6 +144,8 @@ async def planner_tool(task: str, context: str = "") -> str:
                 id: int = Field(description="Step ID number")
                 description: str = Field(description="Step description")
                 file_path: str = Field(description="Target file path")
+                reads: list[str] | None = Field(None, description="Files the step reads")
+                writes: list[str] | None = Field(None, description="Files the step writes")
 
             class PlanningPlan(Model):
                 steps: list[PlanningStep] = Field(description="List of planning steps")
@@ -97,26 +155,18 @@ async def planner_tool(task: str, context: str = "") -> str:
             satya_available = False
             print(_warn("⚠️ Satya not available - using basic validation"))
 
-        planning_config = LLMConfig(
-            api_key=os.getenv("CEREBRAS_API_KEY"),
-            model="cerebras/qwen-3-235b-a22b-thinking-2507",
-            base_url="https://api.cerebras.ai/v1",
-            # debug=True,
-        )
-        planning_client = BaseLLMClient(planning_config)
-
         numbers = re.findall(r"\b(\d+)\b", task.lower())
         target_count = int(numbers[0]) if numbers else 5
         folder_match = re.search(r"folder(?:\s+named|\s+called)?\s+[\"']?([^\s\"']+)[\"']?", task.lower())
         target_folder = folder_match.group(1) if folder_match else "output"
 
-        system_prompt = f"""You are a task planning assistant. Break down the given task into {target_count} specific, actionable sequential steps.
+        system_prompt = f"""You are a task planning assistant. Break down the given task into {target_count} specific, actionable steps.
 
 IMPORTANT: Return ONLY a JSON object with this exact structure:
 {{
   "steps": [
-    {{"id": 1, "description": "Step 1 description", "file_path": "{target_folder}/file1.txt"}},
-    {{"id": 2, "description": "Step 2 description", "file_path": "{target_folder}/file2.txt"}},
+    {{"id": 1, "description": "Step 1 description", "file_path": "{target_folder}/file1.txt", "reads": [], "writes": ["{target_folder}/file1.txt"]}},
+    {{"id": 2, "description": "Step 2 description", "file_path": "{target_folder}/file2.txt", "reads": ["{target_folder}/file1.txt"], "writes": ["{target_folder}/file2.txt"]}},
     ...
   ]
 }}
@@ -125,13 +175,14 @@ Rules:
 - Create exactly {target_count} steps
 - Each step should be specific and actionable
 - All file paths should be under the '{target_folder}' folder
-- Focus on sequential file creation, one step at a time
+- "reads"/"writes" list every file (or folder, ending in /) the step reads or modifies; steps that touch different files run in parallel
+- Only make a step read another step's file when it really depends on it
 - NO markdown code fences, just pure JSON"""
 
         user_prompt = f"""TASK: {task}
 CONTEXT: {context}
 
-Break this into {target_count} sequential steps. Each step should create one specific file.
+Break this into {target_count} steps. Each step should create one specific file.
 Return only the JSON object."""
 
         messages = [
@@ -139,98 +190,148 @@ Return only the JSON object."""
             {"role": "user", "content": user_prompt},
         ]
 
-        print(_info(f"🧠 Planning task with {target_count} steps..."))
-        stop_event = asyncio.Event()
-        anim_task = asyncio.create_task(_animate_planning(stop_event))
-        try:
-            response = await planning_client.completion(messages)
-        finally:
-            stop_event.set()
-            with contextlib.suppress(Exception):
-                await anim_task
-
-        if not response or "text" not in response:
-            return "❌ Error: No response from planning model"
-
-        response_text = response["text"].strip()
-        print(_info(f"🔍 Raw AI response: {response_text[:200]}..."))
-
-        clean_text = response_text.strip()
-        if clean_text.startswith("```"):
-            lines = clean_text.split("\n")
-            clean_text = "\n".join(lines[1:-1]) if len(lines) > 2 else clean_text
-
-        plan_data: Any = None
-        try:
-            plan_data = orjson.loads(clean_text)
-            print(_success("✅ Parsed with orjson"))
-        except Exception:
+        async def _request_steps(interactive: bool) -> list[dict] | str:
+            """Ask the planning model; returns the steps or an error message."""
+            from bhumi.base_client import LLMConfig
+
+            planning_config = LLMConfig(
+                api_key=os.getenv("CEREBRAS_API_KEY"),
+                model="cerebras/qwen-3-235b-a22b-thinking-2507",
+                base_url="https://api.cerebras.ai/v1",
+                # debug=True,
+            )
+            pool = default_pool()
+            planning_client = await pool.get(planning_config, profile="planner")
+
+            stop_event = asyncio.Event()
+            anim_task = asyncio.create_task(_animate_planning(stop_event)) if interactive else None
+
+            async def _stop_animation() -> None:
+                stop_event.set()
+                if anim_task is not None:
+                    with contextlib.suppress(Exception):
+                        await anim_task
+
+            # Steps are extracted as they stream in, skipping thinking/prose/fences
+            plan_stream = PlanStream()
+            chunks: list[str] = []
             try:
-                plan_data = builtin_json.loads(clean_text)
-                print(_success("✅ Parsed with builtin json"))
+                async for chunk in _completion_chunks(planning_client, messages, planning_config):
+                    chunks.append(chunk)
+                    for step in plan_stream.feed(chunk):
+                        if not interactive:
+                            continue  # background refresh: no output
+                        await _stop_animation()
+                        print(_info(f"📌 Step {len(plan_stream.steps)} ready: {str(step.get('description', ''))[:80]}"))
+                pool.report(planning_client, ok=True)
             except Exception:
-                # last resort: try to extract {...}
-                import re as _re
-                m = _re.search(r"\{[\s\S]*\}", clean_text)
-                if not m:
+                pool.report(planning_client, ok=False)
+                raise
+            finally:
+                pool.release(planning_client)
+                await _stop_animation()
+
+            response_text = "".join(chunks).strip()
+            if not response_text:
+                return "❌ Error: No response from planning model"
+            if interactive:
+                print(_info(f"🔍 Raw AI response: {response_text[:200]}..."))
+
+            plan_data: Any = plan_stream.close()
+            if not (isinstance(plan_data, dict) and isinstance(plan_data.get("steps"), list)):
+                if not plan_stream.steps:
                     return "❌ Error: Unable to parse planning JSON"
-                try:
-                    plan_data = orjson.loads(m.group(0))
-                    print(_success("✅ Parsed with regex + orjson"))
-                except Exception:
-                    plan_data = builtin_json.loads(m.group(0))
-                    print(_success("✅ Parsed with regex + builtin json"))
+                plan_data = {"steps": plan_stream.steps}
+            if interactive:
+                print(_success(f"✅ Parsed plan ({len(plan_data['steps'])} steps)"))
 
-        if satya_available:
-            try:
-                # type: ignore[name-defined]
-                plan = PlanningPlan(**plan_data)
-                # Convert Satya/Pydantic model instances or dict-like steps into plain dicts
-                steps: list[dict] = []
-                for s in getattr(plan, "steps", []) or []:
-                    s_dict: dict
-                    try:
-                        if hasattr(s, "dict") and callable(getattr(s, "dict")):
-                            s_dict = s.dict()  # type: ignore[attr-defined]
-                        elif hasattr(s, "model_dump") and callable(getattr(s, "model_dump")):
-                            s_dict = s.model_dump()  # type: ignore[attr-defined]
-                        elif isinstance(s, dict):
-                            s_dict = s
-                        else:
-                            # Fallback to attribute access
-                            s_dict = {
-                                "id": getattr(s, "id", None),
-                                "description": getattr(s, "description", None),
-                                "file_path": getattr(s, "file_path", None),
-                            }
-                    except Exception:
-                        s_dict = {}
-                    steps.append(s_dict)
-                print(_success(f"✅ Satya validation successful - {len(steps)} steps"))
-            except Exception as e:
-                print(_warn(f"⚠️ Satya validation failed: {e}"))
-                steps = plan_data.get("steps", [])
+            if satya_available:
+                try:
+                    # type: ignore[name-defined]
+                    plan = PlanningPlan(**plan_data)
+                    # Convert Satya/Pydantic model instances or dict-like steps into plain dicts
+                    steps: list[dict] = []
+                    for s in getattr(plan, "steps", []) or []:
+                        s_dict: dict
+                        try:
+                            if hasattr(s, "dict") and callable(getattr(s, "dict")):
+                                s_dict = s.dict()  # type: ignore[attr-defined]
+                            elif hasattr(s, "model_dump") and callable(getattr(s, "model_dump")):
+                                s_dict = s.model_dump()  # type: ignore[attr-defined]
+                            elif isinstance(s, dict):
+                                s_dict = s
+                            else:
+                                # Fallback to attribute access
+                                s_dict = {
+                                    "id": getattr(s, "id", None),
+                                    "description": getattr(s, "description", None),
+                                    "file_path": getattr(s, "file_path", None),
+                                    "reads": getattr(s, "reads", None),
+                                    "writes": getattr(s, "writes", None),
+                                }
+                        except Exception:
+                            s_dict = {}
+                        steps.append(s_dict)
+                    if interactive:
+                        print(_success(f"✅ Satya validation successful - {len(steps)} steps"))
+                except Exception as e:
+                    if interactive:
+                        print(_warn(f"⚠️ Satya validation failed: {e}"))
+                    steps = plan_data.get("steps", [])
+            else:
+                if "steps" not in plan_data:
+                    return "❌ Error: Invalid plan format - missing 'steps' array"
+                steps = plan_data["steps"]
+
+            for i, step in enumerate(steps, 1):
+                step.setdefault("file_path", f"{target_folder}/file{i}.txt")
+            return steps
+
+        # Reuse a plan made for the same (or a near-identical) task before calling the model
+        plan_cache = default_plan_cache()
+        cache_task = f"{task}\n{context}" if context else task
+        cache_scope = {"tool": "planner", "steps": target_count, "folder": target_folder}
+        hit = plan_cache.lookup(cache_task, cache_scope)
+        if hit and isinstance(hit.get("plan"), list) and hit["plan"]:
+            steps = hit["plan"]
+            print(_success(f"♻️ Reusing cached plan (similarity {hit['similarity']:.2f})"))
+
+            async def _refresh() -> list[dict] | None:
+                fresh = await _request_steps(interactive=False)
+                return fresh if isinstance(fresh, list) else None
+
+            plan_cache.refresh_in_background(cache_task, cache_scope, _refresh)
         else:
-            if "steps" not in plan_data:
-                return "❌ Error: Invalid plan format - missing 'steps' array"
-            steps = plan_data["steps"]
-
-        result = f"📋 **Task Plan Created** ({len(steps)} steps)\n\n"
+            print(_info(f"🧠 Planning task with {target_count} steps..."))
+            steps_or_error = await _request_steps(interactive=True)
+            if isinstance(steps_or_error, str):
+                return steps_or_error
+            steps = steps_or_error
+            plan_cache.store(cache_task, steps, cache_scope)
+        waves = plan_waves(steps)
+
+        result = f"📋 **Task Plan Created** ({len(steps)} steps, {len(waves)} wave{'s' if len(waves) != 1 else ''})\n\n"
         result += f"**Main Task:** {task}\n"
         result += f"**Target Folder:** {target_folder}\n\n"
-        result += "**Sequential Steps:**\n"
-        for i, step in enumerate(steps, 1):
-            desc = step.get("description", f"Step {i}")
-            file_path = step.get("file_path", f"{target_folder}/file{i}.txt")
-            result += f"{i}. **{desc}**\n   → File: `{file_path}`\n"
-        result += "\n✅ Plan ready! Use write_file tool to execute each step sequentially."
-        print(_info(f"📋 Generated plan with {len(steps)} steps"))
+        for w, wave in enumerate(waves, 1):
+            result += f"**Wave {w}** ({'independent, run together' if len(wave) > 1 else 'single step'}):\n"
+            for i in wave:
+                step = steps[i]
+                desc = step.get("description", f"Step {i + 1}")
+                reads, _ = step_access(step)
+                result += f"{i + 1}. **{desc}**\n   → File: `{step['file_path']}`\n"
+                if reads:
+                    result += f"   ← Reads: {', '.join(f'`{r}`' for r in reads)}\n"
+            result += "\n"
+        result += "✅ Plan ready! Run each wave's steps together in one `parallel` call (write_file/apply_patch per step); start a wave only after the previous one finishes."
+        print(_info(f"📋 Generated plan with {len(steps)} steps in {len(waves)} waves"))
         return result
     except Exception as e:
         return f"❌ Error in planning: {str(e)}"
 
 
 # --- Patch ---
+@traced("tool.apply_patch")
 async def apply_patch_tool(patch: str, cwd: str = ".") -> str:
     """Apply a patch.
 
@@ -304,7 +405,7 @@ async def apply_patch_tool(patch: str, cwd: str = ".") -> str:
         wrapped = _auto_wrap_unified(patch)
         if wrapped is not None:
             patch_to_apply = wrapped
-        do_apply_patch(patch_to_apply, cwd)
+        do_apply_patch(patch_to_apply, str(resolve(cwd)))
         print(_success(f"🔧 Patch applied successfully in {cwd}"))
         return f"Patch applied successfully in {cwd}"
     except Exception as e:
@@ -312,10 +413,11 @@ async def apply_patch_tool(patch: str, cwd: str = ".") -> str:
 
 
 # --- Shell wrappers ---
+@traced("tool.run_shell")
 async def run_shell_tool(command: str, workdir: str | None = None, timeout_ms: int = 30000) -> str:
     try:
         cmd_parts = shlex.split(command)
-        req = ShellRequest(command=cmd_parts, workdir=workdir, timeout_ms=timeout_ms)
+        req = ShellRequest(command=cmd_parts, workdir=resolve_dir(workdir), timeout_ms=timeout_ms)
         result = run_shell(req)
         output = f"Exit code: {result.exit_code}\n"
         if result.stdout:
@@ -329,9 +431,10 @@ async def run_shell_tool(command: str, workdir: str | None = None, timeout_ms: i
         return f"Error running command: {str(e)}"
 
 
+@traced("tool.update_plan")
 async def update_plan_tool(steps: list | None = None, explanation: str | None = None) -> str:
     try:
-        plan_path = "Muonry/.plan.json"
+        plan_path = str(resolve("Muonry/.plan.json"))
         if steps:
             plan_items = [
                 PlanItem(step=s, status=Status.IN_PROGRESS if i == 0 else Status.PENDING)
@@ -346,12 +449,24 @@ async def update_plan_tool(steps: list | None = None, explanation: str | None =
         return f"Error updating plan: {str(e)}"
 
 
+@traced("tool.smart_run_shell")
 async def smart_run_shell_tool(
     command: str,
     workdir: str | None = None,
     timeout_ms: int = 300000,
     auto_fix: bool = False,
+    kill_on_fatal: bool | None = None,
 ) -> str:
+    """Run `command`, analyzing its output as it streams.
+
+    With `kill_on_fatal` (default: `auto_fix`) the command is stopped as soon
+    as its output shows a failure with a safe fix (e.g. a missing module), so
+    the fix starts right away instead of after the doomed run finishes.
+    """
+    workdir = resolve_dir(workdir)
+    if kill_on_fatal is None:
+        kill_on_fatal = auto_fix
+
     def _tail(s: str, n: int = 2000) -> str:
         if not s:
             return ""
@@ -384,18 +499,40 @@ async def smart_run_shell_tool(
         res = run_shell(req)
         return (res.exit_code if res.exit_code is not None else -1), res.stdout, res.stderr, res.duration_ms
 
-    attempts: list[dict] = []
+    def _exec_analyzed(cmd_str: str, phase: str):
+        """Run the build command with its output fed to the analyzer while it runs."""
+        analyzer = BuildLogAnalyzer()
+        fatal: list = []
+
+        def on_output(stream: str, chunk: str) -> bool:
+            for issue in analyzer.feed(chunk, stream):
+                if kill_on_fatal and is_fatal(issue):
+                    fatal.append(issue)
+                    return True
+            return False
+
+        req = ShellRequest(command=shlex.split(cmd_str), workdir=workdir, timeout_ms=timeout_ms)
+        res = run_shell(req, on_output=on_output)
+        code = res.exit_code if res.exit_code is not None else -1
+        if res.stopped and code == 0:
+            code = -1  # killed before it could fail on its own
+        attempt = {
+            "phase": phase,
+            "exit_code": code,
+            "duration_ms": res.duration_ms,
+            "stdout_tail": _tail(res.stdout),
+            "stderr_tail": _tail(res.stderr),
+        }
+        if res.stopped and fatal:
+            attempt["stopped_early"] = {"code": fatal[0].code, "message": fatal[0].message}
+            print(_warn(f"⛔ Stopped early: {fatal[0].message}"))
+        attempts.append(attempt)
+        analysis = analyzer.result() if code != 0 else {"issues": [], "suggestions": [], "confidence": 0.0}
+        return code, res.stdout, res.stderr, res.duration_ms, analysis
 
-    code, out, err, dur = _exec(command)
-    attempts.append({
-        "phase": "initial",
-        "exit_code": code,
-        "duration_ms": dur,
-        "stdout_tail": _tail(out),
-        "stderr_tail": _tail(err),
-    })
+    attempts: list[dict] = []
 
-    analysis = analyze_build_output(out or "", err or "") if code != 0 else {"issues": [], "suggestions": [], "confidence": 0.0}
+    code, out, err, dur, analysis = _exec_analyzed(command, "initial")
 
     suggested_commands: list[str] = []
     if code != 0 and analysis.get("suggestions"):
@@ -432,16 +569,7 @@ async def smart_run_shell_tool(
             })
             if f_code != 0:
                 break
-        r_code, r_out, r_err, r_dur = _exec(command)
-        attempts.append({
-            "phase": "re_run",
-            "exit_code": r_code,
-            "duration_ms": r_dur,
-            "stdout_tail": _tail(r_out),
-            "stderr_tail": _tail(r_err),
-        })
-        code, out, err, dur = r_code, r_out, r_err, r_dur
-        analysis = analyze_build_output(out or "", err or "") if code != 0 else {"issues": [], "suggestions": [], "confidence": 0.0}
+        code, out, err, dur, analysis = _exec_analyzed(command, "re_run")
 
     top_errors: list[str] = []
     if err:
@@ -463,9 +591,10 @@ async def smart_run_shell_tool(
 
 
 # --- File/system helpers ---
+@traced("tool.read_file")
 async def read_file_tool(file_path: str, start_line: int | None = None, end_line: int | None = None) -> str:
     try:
-        path = Path(file_path)
+        path = resolve(file_path)
         if not path.exists():
             return f"File not found: {file_path}"
         content = path.read_text(encoding="utf-8")
@@ -483,6 +612,7 @@ async def read_file_tool(file_path: str, start_line: int | None = None, end_line
         return f"Error reading file {file_path}: {str(e)}"
 
 
+@traced("tool.grep")
 async def grep_tool(pattern: str, file_path: str = ".", recursive: bool = True, case_sensitive: bool = False) -> str:
     try:
         cmd = ["grep"]
@@ -493,10 +623,11 @@ async def grep_tool(pattern: str, file_path: str = ".", recursive: bool = True,
         else:
             cmd.append("-n")
         cmd.extend([pattern, file_path])
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10, cwd=resolve_dir(None))
         if result.returncode == 0:
             output = result.stdout.strip()
-            print(_info(f"🔍 Found {len(output.split('\n'))} matches for '{pattern}'"))
+            n_matches = len(output.split("\n"))
+            print(_info(f"🔍 Found {n_matches} matches for '{pattern}'"))
             return f"Search results for '{pattern}' in {file_path}:\n{'-'*40}\n{output}"
         elif result.returncode == 1:
             return f"No matches found for '{pattern}' in {file_path}"
@@ -506,9 +637,10 @@ async def grep_tool(pattern: str, file_path: str = ".", recursive: bool = True,
         return f"Error running grep: {str(e)}"
 
 
+@traced("tool.search_replace")
 async def search_replace_tool(file_path: str, search_text: str, replace_text: str, all_occurrences: bool = True) -> str:
     try:
-        path = Path(file_path)
+        path = resolve(file_path)
         if not path.exists():
             return f"File not found: {file_path}"
         content = path.read_text(encoding="utf-8")
@@ -527,12 +659,13 @@ async def search_replace_tool(file_path: str, search_text: str, replace_text: st
         return f"Error in search/replace: {str(e)}"
 
 
+@traced("tool.get_system_info")
 async def get_system_info_tool() -> str:
     try:
         info = {
             "os": f"{platform.system()} {platform.release()}",
             "python_version": platform.python_version(),
-            "current_directory": os.getcwd(),
+            "current_directory": current_workdir(),
             "architecture": platform.machine(),
             "user": os.getenv("USER", "unknown"),
         }
@@ -543,7 +676,29 @@ async def get_system_info_tool() -> str:
         return f"Error getting system info: {str(e)}"
 
 
-async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, timeout_ms: int = 120000) -> str:
+@traced("tool.quick_check")
+async def quick_check_tool(
+    kind: str,
+    target: str = ".",
+    max_files: int = 200,
+    timeout_ms: int = 120000,
+    fail_fast: int = 0,
+    watch: bool | None = None,
+) -> str:
+    """Sanity-check a project; `fail_fast` > 0 stops the rustc/cargo/tsc fan-out after that many failures.
+
+    With `watch` (default: MUONRY_QUICK_CHECK_WATCH) the answer comes from a
+    background watcher's live table, rechecking only what changed since.
+    """
+    from tools.check_watch import watch_answer, watch_enabled
+
+    if watch if watch is not None else watch_enabled():
+        try:
+            live = await asyncio.to_thread(watch_answer, kind.lower(), resolve(target), max_files, timeout_ms)
+        except Exception:
+            live = None
+        if live is not None:
+            return json.dumps(live)
     import traceback
     res: dict[str, Any] = {
         "status": "ok",
@@ -555,72 +710,82 @@ async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, t
         "summary": "",
     }
     try:
-        p = Path(target)
+        p = resolve(target)
         if kind.lower() == "python":
-            files: list[Path] = []
-            if p.is_file() and p.suffix == ".py":
-                files = [p]
-            else:
-                for root, _, fnames in os.walk(p if p.is_dir() else p.parent):
-                    for fn in fnames:
-                        if fn.endswith(".py"):
-                            files.append(Path(root) / fn)
-                            if len(files) >= max_files:
-                                break
-                    if len(files) >= max_files:
-                        break
-            ok = 0
-            for f in files:
-                try:
-                    src = f.read_text(encoding="utf-8")
-                    import ast as _ast
-                    _ast.parse(src)
-                    res["checks"].append({"file": str(f), "ok": True})
-                    ok += 1
-                except SyntaxError as se:
-                    res["checks"].append({"file": str(f), "ok": False, "error": f"SyntaxError: {se}"})
+            from tools.quick_check import check_python_files, python_files
+
+            files = python_files(p, max_files)
+            # Only files whose content changed since the last check are parsed
+            checks, parsed = await asyncio.to_thread(check_python_files, Path(current_workdir()), files)
+            res["checks"] = checks
+            res["parsed"] = parsed
+            ok = sum(1 for c in checks if c["ok"])
             res["summary"] = f"Python syntax OK: {ok}/{len(files)} files"
             if ok < len(files):
                 res["status"] = "error"
 
         elif kind.lower() == "rust":
-            cargo_toml = p / "Cargo.toml" if p.is_dir() else (p.parent / "Cargo.toml")
-            def _exec(cmd: str):
-                parts = shlex.split(cmd)
-                req = ShellRequest(command=parts, workdir=str(p if p.is_dir() else p.parent), timeout_ms=timeout_ms)
-                r = run_shell(req)
-                return r.exit_code, r.stdout, r.stderr, r.duration_ms
-            code, _, _, _ = _exec("cargo --version")
-            if code == 0 and cargo_toml.exists():
-                mcode, mout, merr, _ = _exec("cargo metadata -q --no-deps")
-                res["checks"].append({"step": "cargo metadata", "exit_code": mcode, "stderr": (merr or "").splitlines()[-3:]})
-                if mcode != 0:
-                    res["status"] = "error"
-                    res["errors"].append("cargo metadata failed; check Cargo.toml")
-                else:
-                    ccode, _, cerr, _ = _exec("cargo check -q --locked")
-                    res["checks"].append({"step": "cargo check", "exit_code": ccode, "stderr": (cerr or "").splitlines()[-5:]})
-                    if ccode != 0:
-                        res["status"] = "error"
-                        res["errors"].append("cargo check failed (may need network to fetch crates)")
+            from tools.quick_check import find_projects, run_commands, source_files
+
+            base = p if p.is_dir() else p.parent
+            if shutil.which("cargo") is None:
+                projects = []
+            elif p.is_dir():
+                projects = find_projects(base, "Cargo.toml")
+            else:
+                projects = [base] if (base / "Cargo.toml").exists() else []
+            if projects:
+                # Every project is checked concurrently: metadata first, then cargo check where it passed
+                meta = await run_commands(
+                    [(["cargo", "metadata", "-q", "--no-deps"], str(d)) for d in projects],
+                    timeout_ms=timeout_ms, max_failures=fail_fast,
+                )
+                failed = 0
+                ready: list[Path] = []
+                for d, r in zip(projects, meta):
+                    if r is None:
+                        res["checks"].append({"step": "cargo metadata", "project": str(d), "skipped": True})
+                        continue
+                    res["checks"].append({"step": "cargo metadata", "project": str(d), "exit_code": r.exit_code, "stderr": (r.stderr or "").splitlines()[-3:]})
+                    if r.exit_code != 0:
+                        failed += 1
+                        res["errors"].append(f"cargo metadata failed; check {d / 'Cargo.toml'}")
+                    else:
+                        ready.append(d)
+                if ready and not (fail_fast and failed >= fail_fast):
+                    checked = await run_commands(
+                        [(["cargo", "check", "-q", "--locked"], str(d)) for d in ready],
+                        timeout_ms=timeout_ms, max_failures=(fail_fast - failed) if fail_fast else 0,
+                    )
+                    for d, r in zip(ready, checked):
+                        if r is None:
+                            res["checks"].append({"step": "cargo check", "project": str(d), "skipped": True})
+                            continue
+                        res["checks"].append({"step": "cargo check", "project": str(d), "exit_code": r.exit_code, "stderr": (r.stderr or "").splitlines()[-5:]})
+                        if r.exit_code != 0:
+                            failed += 1
+                            res["errors"].append(f"cargo check failed in {d} (may need network to fetch crates)")
+                    if failed:
                         res["suggestions"].append("Ensure dependencies are fetched: `cargo fetch` with network, then re-run")
-                res["summary"] = "Rust project checked via cargo"
+                if failed:
+                    res["status"] = "error"
+                res["summary"] = "Rust project checked via cargo" if len(projects) == 1 else f"Rust projects checked via cargo: {len(projects) - failed}/{len(projects)} OK"
             else:
                 files = [p] if (p.is_file() and p.suffix == ".rs") else []
                 if p.is_dir():
-                    for root, _, fnames in os.walk(p):
-                        for fn in fnames:
-                            if fn.endswith(".rs"):
-                                files.append(Path(root) / fn)
-                                if len(files) >= max_files:
-                                    break
-                        if len(files) >= max_files:
-                            break
+                    files = source_files(p, ".rs", max_files)
+                # One rustc per file, run concurrently
+                runs = await run_commands(
+                    [(["rustc", "--emit=metadata", "-o", "/dev/null", str(f)], str(base)) for f in files],
+                    timeout_ms=timeout_ms, max_failures=fail_fast,
+                )
                 ok = 0
-                for f in files:
-                    code, _, err, _ = _exec(f"rustc --emit=metadata -o /dev/null {shlex.quote(str(f))}")
-                    res["checks"].append({"file": str(f), "exit_code": code, "stderr": (err or "").splitlines()[-3:]})
-                    if code == 0:
+                for f, r in zip(files, runs):
+                    if r is None:
+                        res["checks"].append({"file": str(f), "skipped": True})
+                        continue
+                    res["checks"].append({"file": str(f), "exit_code": r.exit_code, "stderr": (r.stderr or "").splitlines()[-3:]})
+                    if r.exit_code == 0:
                         ok += 1
                 res["summary"] = f"Rust syntax OK (rustc metadata): {ok}/{len(files)} files"
                 if ok < len(files):
@@ -629,30 +794,35 @@ async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, t
                     res["suggestions"].append("Provide a Cargo.toml for project-level checks or a .rs file for single-file checks")
 
         elif kind.lower() == "js":
+            from tools.quick_check import find_projects, run_commands
+
             base = p if p.is_dir() else p.parent
-            tsconfig = base / "tsconfig.json"
             pkg = base / "package.json"
-            used_pm = pick_package_manager(str(base))
-            def _exec(cmd: str):
-                parts = shlex.split(cmd)
-                req = ShellRequest(command=parts, workdir=str(base), timeout_ms=timeout_ms)
-                r = run_shell(req)
-                return r.exit_code, r.stdout, r.stderr, r.duration_ms
-            if tsconfig.exists():
-                if used_pm == "bun":
-                    code, _, err, _ = _exec("bun x tsc --noEmit")
-                elif used_pm == "pnpm":
-                    code, _, err, _ = _exec("pnpm exec tsc --noEmit")
-                elif used_pm == "yarn":
-                    code, _, err, _ = _exec("yarn run -s tsc --noEmit")
-                else:
-                    code, _, err, _ = _exec("npm run -s tsc -- --noEmit")
-                res["checks"].append({"step": "tsc --noEmit", "exit_code": code, "stderr": (err or "").splitlines()[-5:]})
-                if code != 0:
+            projects = find_projects(base, "tsconfig.json") if p.is_dir() else ([base] if (base / "tsconfig.json").exists() else [])
+            if projects:
+                tsc_cmds = {
+                    "bun": "bun x tsc --noEmit",
+                    "pnpm": "pnpm exec tsc --noEmit",
+                    "yarn": "yarn run -s tsc --noEmit",
+                }
+                # One tsc per tsconfig project, run concurrently
+                runs = await run_commands(
+                    [(shlex.split(tsc_cmds.get(pick_package_manager(str(d)), "npm run -s tsc -- --noEmit")), str(d)) for d in projects],
+                    timeout_ms=timeout_ms, max_failures=fail_fast,
+                )
+                failed = 0
+                for d, r in zip(projects, runs):
+                    if r is None:
+                        res["checks"].append({"step": "tsc --noEmit", "project": str(d), "skipped": True})
+                        continue
+                    res["checks"].append({"step": "tsc --noEmit", "project": str(d), "exit_code": r.exit_code, "stderr": (r.stderr or "").splitlines()[-5:]})
+                    if r.exit_code != 0:
+                        failed += 1
+                        res["errors"].append(f"TypeScript check failed or tsc not available locally ({d})")
+                if failed:
                     res["status"] = "error"
-                    res["errors"].append("TypeScript check failed or tsc not available locally")
                     res["suggestions"].append("Install TypeScript locally: add devDep 'typescript' and run your PM's install")
-                res["summary"] = "JS/TS checked via tsc"
+                res["summary"] = "JS/TS checked via tsc" if len(projects) == 1 else f"JS/TS checked via tsc: {len(projects) - failed}/{len(projects)} projects OK"
             elif pkg.exists():
                 try:
                     data = json.loads(pkg.read_text(encoding="utf-8"))
@@ -679,6 +849,7 @@ async def quick_check_tool(kind: str, target: str = ".", max_files: int = 200, t
 
 
 # --- Interactive shell via PTY ---
+@traced("tool.interactive_shell")
 async def interactive_shell_tool(
     command: str,
     workdir: str | None = None,
@@ -699,6 +870,7 @@ async def interactive_shell_tool(
         except re.error:
             compiled.append({"pattern": re.compile(re.escape(str(a.get("expect")))), "send": a.get("send", "")})
 
+    workdir = resolve_dir(workdir)
     pid, master_fd = pty.fork()
     if pid == 0:
         try:
@@ -799,9 +971,10 @@ async def interactive_shell_tool(
     return json.dumps(payload)
 
 
+@traced("tool.write_file")
 async def write_file_tool(file_path: str, content: str, overwrite: bool = True) -> str:
     try:
-        path = Path(file_path)
+        path = resolve(file_path)
         if path.exists() and not overwrite:
             return f"File {file_path} already exists and overwrite=False"
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -813,6 +986,7 @@ async def write_file_tool(file_path: str, content: str, overwrite: bool = True)
 
 
 # --- DeepWiki (naive HTTP) ---
+@traced("tool.deepwiki")
 async def deepwiki_tool(
     action: str = "list",
     repo: str = "jennyzzt/dgm",
@@ -829,7 +1003,7 @@ async def deepwiki_tool(
             res = deepwiki_list_pages(repo=repo, limit=limit)
             if dest and isinstance(res, dict):
                 try:
-                    p = Path(dest)
+                    p = resolve(dest)
                     p.parent.mkdir(parents=True, exist_ok=True)
                     p.write_text(json.dumps(res, indent=2), encoding="utf-8")
                     res["saved_to"] = str(p)
@@ -840,7 +1014,7 @@ async def deepwiki_tool(
             res = deepwiki_get_page(repo=repo, path=path)
             if dest and isinstance(res, dict):
                 try:
-                    p = Path(dest)
+                    p = resolve(dest)
                     p.parent.mkdir(parents=True, exist_ok=True)
                     # Prefer text content when present
                     content = res.get("text") if isinstance(res, dict) else None
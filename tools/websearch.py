@@ -44,9 +44,8 @@ from __future__ import annotations
 import json
 import os
 from typing import Optional, Any, Dict
-import dotenv
 
-dotenv.load_dotenv()
+# Environment (.env, ~/.muonry/.env) is loaded once by the entry point, not here.
 
 
 def _to_plain(obj: Any) -> Any:
@@ -0,0 +1,178 @@
+"""
+Multi-process worker backend for the orchestrator.
+
+With `MUONRY_ORCHESTRATOR_BACKEND=process` (or
+`start_real_workers(backend="process")`) every worker runs its own
+`AsyncWorkerAgent` loop in a separate process, so CPU-heavy steps (AST checks,
+large file generation, parsing huge model outputs) no longer serialize on one
+event loop and one GIL:
+
+- workers coordinate only through the shared SQLite task store (atomic claims,
+  file locks), exactly like in-process workers;
+- each worker's `orchestrator` log records and task events (`claimed`,
+  `finished`, `failed` with the result/error) stream back to the parent over a
+  multiprocessing queue;
+- wake-ups are relayed both ways: a task finishing in one process wakes
+  parked workers in every other process, and a plan loaded in the parent
+  wakes all children, so there is still no polling.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("orchestrator")
+
+BACKENDS = ("async", "process")
+
+
+def backend_from_env() -> str:
+    backend = str(os.getenv("MUONRY_ORCHESTRATOR_BACKEND", "async")).strip().lower()
+    return backend if backend in BACKENDS else "async"
+
+
+def _resolve(ref: str) -> Callable[..., Any]:
+    module, _, attr = ref.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _worker_main(worker_id: str, db_path: str, inbox: Any, events: Any, work: Optional[str]) -> None:
+    """Child process: run one worker against the shared store until told to stop."""
+    from tools.orchestrator import AsyncWorkerAgent, TaskOrchestrator
+
+    log = logging.getLogger("orchestrator")
+    log.handlers[:] = [logging.handlers.QueueHandler(events)]
+    log.propagate = False
+
+    orch = TaskOrchestrator(max_workers=1)
+    orch.state_file = Path(db_path)
+    queue = orch.queue
+    queue.listeners.append(lambda: events.put({"type": "changed", "worker_id": worker_id}))
+    worker = AsyncWorkerAgent(worker_id, orch, on_event=lambda ev: events.put({"worker_id": worker_id, **ev}))
+    if work:
+        fn = _resolve(work)
+        worker._do_real_work = lambda task: fn(worker, task)
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        main = asyncio.current_task()
+
+        def read_inbox() -> None:
+            while True:
+                msg = inbox.get()
+                if msg == "wake":
+                    loop.call_soon_threadsafe(lambda: queue.notify(local=True))
+                else:
+                    loop.call_soon_threadsafe(main.cancel)
+                    return
+
+        threading.Thread(target=read_inbox, name=f"inbox-{worker_id}", daemon=True).start()
+        try:
+            await worker.start_working()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+
+
+class ProcessWorkerPool:
+    """One process per worker id, sharing the task store at `db_path`."""
+
+    def __init__(
+        self,
+        db_path: os.PathLike | str,
+        worker_ids: List[str],
+        *,
+        queue: Any = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        work: Optional[str] = None,
+    ) -> None:
+        self.db_path = str(Path(db_path).resolve())
+        self.worker_ids = list(worker_ids)
+        self.queue = queue  # parent TaskQueue: its notifications are broadcast to children
+        self.on_event = on_event
+        self.work = work  # optional "module:function" async (worker, task) -> str replacing _do_real_work
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._inboxes: Dict[str, Any] = {}
+        self._procs: Dict[str, Any] = {}
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> List[str]:
+        self._loop = asyncio.get_running_loop()
+        for worker_id in self.worker_ids:
+            inbox = self._ctx.Queue()
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.db_path, inbox, self._events, self.work),
+                name=f"muonry-{worker_id}",
+                daemon=True,
+            )
+            proc.start()
+            self._inboxes[worker_id] = inbox
+            self._procs[worker_id] = proc
+            logger.info(f"Started worker process {worker_id} (pid={proc.pid})")
+        self._reader = threading.Thread(target=self._read_events, name="worker-pool-events", daemon=True)
+        self._reader.start()
+        if self.queue is not None:
+            self.queue.listeners.append(self.broadcast)
+        return list(self._procs)
+
+    def broadcast(self) -> None:
+        """Wake parked workers in every child process."""
+        for inbox in self._inboxes.values():
+            try:
+                inbox.put_nowait("wake")
+            except Exception:
+                pass
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                item = self._events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            if isinstance(item, logging.LogRecord):
+                logger.handle(item)
+                continue
+            if item.get("type") == "changed":
+                # A child freed something: wake the parent's workers and every other child
+                if self.queue is not None and self._loop is not None:
+                    self._loop.call_soon_threadsafe(self.queue.notify)
+                continue
+            if self.on_event is not None and self._loop is not None:
+                self._loop.call_soon_threadsafe(self.on_event, item)
+
+    def alive(self) -> List[str]:
+        return [wid for wid, p in self._procs.items() if p.is_alive()]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        if self.queue is not None and self.broadcast in self.queue.listeners:
+            self.queue.listeners.remove(self.broadcast)
+        for inbox in self._inboxes.values():
+            try:
+                inbox.put_nowait("stop")
+            except Exception:
+                pass
+        loop = asyncio.get_running_loop()
+        for worker_id, proc in self._procs.items():
+            await loop.run_in_executor(None, proc.join, timeout)
+            if proc.is_alive():
+                logger.info(f"Terminating worker process {worker_id}")
+                proc.terminate()
+                await loop.run_in_executor(None, proc.join, 1.0)
+        self._events.put(None)
+        if self._reader is not None:
+            await loop.run_in_executor(None, self._reader.join, 2.0)
+        self._procs.clear()
+        self._inboxes.clear()
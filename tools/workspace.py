@@ -0,0 +1,53 @@
+"""
+Per-session working directory for tools.
+
+Tools normally resolve relative paths against the process cwd. Headless batch
+runs execute many sessions in one event loop, so `os.chdir` is not an option;
+instead a session binds its directory with `use_workdir()` and tools resolve
+paths through `resolve()` / `resolve_dir()`. The binding is a contextvar, so
+it follows asyncio tasks (and `asyncio.to_thread`) without leaking between
+sessions. With nothing bound, behaviour is unchanged.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+_WORKDIR: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("muonry_workdir", default=None)
+
+
+def bound_workdir() -> Optional[str]:
+    """The session workdir, or None when tools use the process cwd."""
+    return _WORKDIR.get()
+
+
+def current_workdir() -> str:
+    return _WORKDIR.get() or os.getcwd()
+
+
+def resolve(path: str | os.PathLike[str]) -> Path:
+    """Resolve a tool path argument against the session workdir."""
+    p = Path(path)
+    base = _WORKDIR.get()
+    if base is None or p.is_absolute():
+        return p
+    return Path(base) / p
+
+
+def resolve_dir(workdir: Optional[str]) -> Optional[str]:
+    """Resolve an optional `workdir`/`cwd` tool argument (None stays None without a binding)."""
+    if workdir is None:
+        return _WORKDIR.get()
+    return str(resolve(workdir))
+
+
+@contextmanager
+def use_workdir(path: str | os.PathLike[str]) -> Iterator[str]:
+    token = _WORKDIR.set(str(Path(path).resolve()))
+    try:
+        yield _WORKDIR.get()  # type: ignore[misc]
+    finally:
+        _WORKDIR.reset(token)